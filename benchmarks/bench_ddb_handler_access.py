@@ -0,0 +1,72 @@
+'''
+DynamodbCacheResourceHandler access path, 200 coroutines:
+- old: take the handler lock and build the Table on every call
+- new: the lock-free "access(target='table')"
+
+the table is served by a local moto server (pip install "moto[server]"),
+run from the repo root: python benchmarks/bench_ddb_handler_access.py
+'''
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.update(
+    AWS_ENDPOINT_URL_DYNAMODB='http://127.0.0.1:5055',
+    AWS_ACCESS_KEY_ID='testing',
+    AWS_SECRET_ACCESS_KEY='testing',
+    AWS_DEFAULT_REGION='ap-northeast-1',
+)
+
+import boto3
+from moto.server import ThreadedMotoServer
+from src.configs.conf import TABLE_CACHE
+from src.apps.resources.handlers.cache_resource import DynamodbCacheResourceHandler
+
+
+COROUTINES = 200
+CALLS = 500
+
+
+async def ops_per_sec(call) -> int:
+    async def worker():
+        for _ in range(CALLS):
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(COROUTINES)])
+    return int(COROUTINES * CALLS / (time.perf_counter() - start))
+
+
+async def main():
+    handler = DynamodbCacheResourceHandler()
+    dynamodb = await handler.access()
+
+    async def old():
+        async with handler.lock:
+            pass
+        await dynamodb.Table(TABLE_CACHE)
+
+    async def new():
+        await handler.access(target='table')
+
+    print(f'{COROUTINES} coroutines x {CALLS} calls')
+    print(f'old (lock + Table): {await ops_per_sec(old):>10} ops/s')
+    print(f'new (access):       {await ops_per_sec(new):>10} ops/s')
+    await handler.close()
+
+
+if __name__ == '__main__':
+    server = ThreadedMotoServer(port=5055, verbose=False)
+    server.start()
+    try:
+        boto3.client('dynamodb').create_table(
+            TableName=TABLE_CACHE,
+            KeySchema=[{'AttributeName': 'cache_key', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'cache_key', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+        asyncio.run(main())
+    finally:
+        server.stop()
@@ -0,0 +1,111 @@
+'''
+HttpResourceHandler, HTTP/1.1 vs HTTP/2 against a local TLS upstream stub
+(hypercorn, 20ms handler latency), pip install hypercorn h2
+
+the stub server's CPU is the ceiling of the throughput, compare the modes
+not the absolute numbers,
+run from the repo root: python benchmarks/bench_http2_upstream.py [concurrency ...]
+'''
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+PORT = 8443
+DOMAIN = f'https://localhost:{PORT}'
+URL = f'{DOMAIN}/ping'
+HYPERCORN_CONFIG = '''
+keep_alive_max_requests = 1000000
+h2_max_concurrent_streams = 1000
+'''
+
+
+# the upstream stub
+async def app(scope, receive, send):
+    if scope['type'] != 'http':
+        return
+    await asyncio.sleep(0.02)
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': b'{"code":"0","msg":"ok","data":{"ok":true}}'})
+
+
+async def run(mode: str, concurrency: int, total: int):
+    # the flags are read by conf at import
+    from src.apps.resources.handlers.http_resource import HttpResourceHandler
+
+    handler = HttpResourceHandler([DOMAIN])
+    await handler.initial()
+    client = await handler.accessing(URL)
+    await client.get(URL)
+
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(URL)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[one() for _ in range(total)], return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for r in results if isinstance(r, Exception))
+    latencies.sort()
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)] if latencies else float('nan')
+    print(f'{mode:6} conc={concurrency:<5} rps={(total - errors) / elapsed:7.0f} '
+          f'p99={p99 * 1000:7.1f}ms errors={errors}/{total}', flush=True)
+    await handler.close()
+
+
+def main(concurrencies):
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key, config = (os.path.join(tmp, name) for name in ('cert.pem', 'key.pem', 'hypercorn.toml'))
+        subprocess.run([
+            'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+            '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost',
+            '-keyout', key, '-out', cert,
+        ], check=True, capture_output=True)
+        with open(config, 'w') as f:
+            f.write(HYPERCORN_CONFIG)
+
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'hypercorn', '-c', config, 'bench_http2_upstream:app',
+             '--bind', f'127.0.0.1:{PORT}', '--certfile', cert, '--keyfile', key],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            time.sleep(2)
+            for concurrency in concurrencies:
+                for mode in ('http1', 'h2'):
+                    env = dict(
+                        os.environ,
+                        SSL_CERT_FILE=cert,
+                        HTTP2_ENABLE='true' if mode == 'h2' else 'false',
+                        HTTP_WARMUP_ENABLE='false',
+                    )
+                    total = max(1000, concurrency * 3)
+                    subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), '--run', mode, str(concurrency), str(total)],
+                        env=env, check=True,
+                    )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--run':
+        import logging
+        logging.disable(logging.WARNING)
+        mode, concurrency, total = sys.argv[2], int(sys.argv[3]), int(sys.argv[4])
+        asyncio.run(run(mode, concurrency, total))
+    else:
+        main([int(c) for c in sys.argv[1:]] or [50, 200, 1000])
@@ -0,0 +1,65 @@
+'''
+response envelope serialization of a SearchJobListVO:
+- old: model_dump + jsonable_encoder + JSONResponse
+- new: res_success with the VO itself (model) or its dict
+
+both produce the same bytes (asserted),
+run from the repo root: python benchmarks/bench_response_serializer.py
+'''
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from src.routers.res.response import res_success
+from src.domains.search.value_objects.c_value_objects import SearchJobListVO, SearchJobDTO
+
+
+def search_job_list(n: int) -> SearchJobListVO:
+    random.seed(1)
+    items = [
+        SearchJobDTO(
+            jid=i, cid=i * 7, name=f'學校 {i} "école"', logo='https://x/y.png',
+            title='English teacher\n', continent_code='AS', country_code='TW',
+            location='台北', salary='NT$ 60k',
+            salary_from=random.choice([None, 50000.0, 1234.5, 0.3]), salary_to=60000.0,
+            tags=['a', 'b', '中文'], views=i, updated_at=1700000000000 + i,
+            region='jp', followed=i % 2 == 0,
+        )
+        for i in range(n)
+    ]
+    return SearchJobListVO(items=items, next='abc').init()
+
+
+def old_res_success(data, msg='ok', code='0'):
+    return JSONResponse(status_code=200, content=jsonable_encoder({'code': code, 'msg': msg, 'data': data}))
+
+
+def ms_per_call(call, reps: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reps):
+        call()
+    return (time.perf_counter() - start) / reps * 1e3
+
+
+def main():
+    for n in (100, 1000, 5000):
+        vo = search_job_list(n)
+        data = vo.model_dump()
+        body = old_res_success(data).body
+        assert body == res_success(data=vo).body == res_success(data=data).body
+
+        reps = max(3, 2000 // n)
+        old = ms_per_call(lambda: old_res_success(vo.model_dump()), reps)
+        new_model = ms_per_call(lambda: res_success(data=vo), reps)
+        new_dict = ms_per_call(lambda: res_success(data=data), reps)
+        print(f'items={n:<5} body={len(body) // 1024}KB '
+              f'old={old:.2f}ms new(model)={new_model:.2f}ms new(dict)={new_dict:.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+'''
+decode of an upstream SearchJobListVO body:
+- old: response.json() + model_validate
+- new: data_envelope.decode_data (model_validate_json, one pass)
+
+both produce the same model (asserted),
+run from the repo root: python benchmarks/bench_upstream_decode.py
+'''
+import os
+import sys
+import json
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import httpx
+from src.domains.search.value_objects.c_value_objects import SearchJobListVO
+from src.infra.client.data_envelope import decode_data
+
+
+ITEM = {
+    'jid': 1, 'cid': 2, 'name': 'Tokyo English School', 'logo': 'https://x/y.png',
+    'title': 'English teacher for kids', 'region': 'jp', 'salary': '3000 USD',
+    'salary_from': 3000, 'salary_to': 4000, 'tags': ['english', 'kids', 'full-time'],
+    'continent_code': 'AS', 'country_code': 'JP', 'views': 1234,
+    'updated_at': 1700000000, 'published_in': '2024-01-01',
+}
+
+
+def ms_per_call(call, number: int) -> float:
+    return min(timeit.repeat(call, number=number, repeat=5)) / number * 1e3
+
+
+def main():
+    for n in (20, 200, 1000):
+        data = {'items': [dict(ITEM, jid=i) for i in range(n)], 'next': 'abc'}
+        body = json.dumps({'code': '0', 'msg': 'ok', 'data': data}).encode()
+        response = httpx.Response(200, content=body)
+
+        old = lambda: SearchJobListVO.model_validate(response.json()['data'])
+        new = lambda: decode_data(response.content, SearchJobListVO)
+        assert old().model_dump() == new().model_dump()
+
+        number = 200 if n < 1000 else 30
+        t_old, t_new = ms_per_call(old, number), ms_per_call(new, number)
+        print(f'items={n:<5} body={len(body) // 1024}KB '
+              f'old={t_old:.3f}ms new={t_new:.3f}ms x{t_old / t_new:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -17,7 +17,10 @@ from src.routers.v1 import auth, \
     search, media, payment
 from src.routers.v2 import auth as authv2
 from src.routers.res.response import res_err
+from src.routers.res.compression import CompressionMiddleware
 from src.apps.resources.manager import io_resource_manager
+from src.apps.events.pub.event_bus import event_bus
+from src.apps.events.sub.subscribers import subscribe_all
 from src.configs import exceptions
 from src.configs.region_hosts import RegionException
 
@@ -36,6 +39,8 @@ app.add_middleware(
     allow_methods=['*'],
     allow_headers=['*'],
 )
+# added last, runs first: compresses the final responses (incl. the CORS headers)
+app.add_middleware(CompressionMiddleware)
 
 
 
@@ -46,10 +51,15 @@ async def startup_event():
     # init global connection pool
     await io_resource_manager.initial()
     asyncio.create_task(io_resource_manager.keeping_probe())
+    # cache-invalidation events
+    subscribe_all()
+    await event_bus.start()
 
 
 @app.on_event('shutdown')
 async def shutdown_event():
+    # flush the pending events before the connection pool is closed
+    await event_bus.close()
     # close connection pool
     await io_resource_manager.close()
 
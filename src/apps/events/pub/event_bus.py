@@ -0,0 +1,15 @@
+from ...resources.manager import io_resource_manager
+from ...resources.handlers.cache_resource import RedisCacheResourceHandler
+from ....domains.event_bus import IEventBus
+from ....infra.events.local_event_bus import LocalEventBus
+from ....infra.events.redis_event_bus import RedisEventBus
+from ....infra.events.batching_event_bus import BatchingEventBus
+from ....configs.conf import EVENT_BUS_BACKEND
+
+
+# shared by the publishers (the writers) and the subscribers (see events/sub)
+if EVENT_BUS_BACKEND == 'redis':
+    redis_resource_handler: RedisCacheResourceHandler = io_resource_manager.get('redis_cache')
+    event_bus: IEventBus = BatchingEventBus(RedisEventBus(redis_resource_handler))
+else:
+    event_bus: IEventBus = BatchingEventBus(LocalEventBus())
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List
+from ....domains.cache import ICache
+from ....domains.event_bus import COMPANY, JOB, TEACHER, RESUME
+from ....infra.cache.two_tier_cache_adapter import TwoTierCacheAdapter
+from ....infra.cache.detail_cache import DetailCache
+from ....infra.cache import negative_cache as negative
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+class CacheInvalidationSubscriber:
+    '''
+    evicts the in-process copies on the invalidation events:
+    - the local tier of gw_cache (TwoTierCacheAdapter), the shared tier is
+      already up to date (the writer wrote/invalidated it)
+    - the negative cache of the public job/resume pages
+    '''
+
+    def __init__(self, cache: ICache, negative_cache: negative.NegativeCache = negative.negative_cache):
+        self.local = cache if isinstance(cache, TwoTierCacheAdapter) else None
+        # for the key formats of the detail cache
+        self.detail = DetailCache(cache)
+        self.negative = negative_cache
+        self.events = 0
+        self.evicted = 0
+
+    async def handle(self, events: List[Dict[str, Any]]):
+        keys: List[str] = []
+        for event in events:
+            self.events += 1
+            keys.extend(event.get('keys', []))
+            keys.extend(self.__evict(event.get('entity', None), event.get('ids', [])))
+
+        if self.local is not None and len(keys) > 0:
+            self.evicted += self.local.evict_local(keys)
+
+    # return the local keys to evict
+    def __evict(self, entity: str, ids: List[Any]) -> List[str]:
+        if entity == JOB and len(ids) == 2:
+            self.negative.invalidate(negative.JOB, *ids)
+            return [self.detail.version_key(negative.JOB, ids[0]),
+                    self.detail.entry_key(negative.JOB, *ids)]
+
+        if entity == RESUME and len(ids) == 2:
+            self.negative.invalidate(negative.RESUME, *ids)
+            return [self.detail.version_key(negative.RESUME, ids[0]),
+                    self.detail.entry_key(negative.RESUME, *ids)]
+
+        if entity == COMPANY and len(ids) == 1:
+            return [self.detail.version_key(negative.JOB, ids[0])]
+
+        if entity == TEACHER and len(ids) == 1:
+            return [self.detail.version_key(negative.RESUME, ids[0])]
+
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'events': self.events,
+            'evicted': self.evicted,
+        }
@@ -0,0 +1,12 @@
+from ..pub.event_bus import event_bus
+from ...resources.adapters import gw_cache
+from ....domains.event_bus import IEventBus, CACHE_INVALIDATION
+from .cache_invalidation import CacheInvalidationSubscriber
+
+
+cache_invalidation_subscriber = CacheInvalidationSubscriber(gw_cache)
+
+
+# call it before "event_bus.start()"
+def subscribe_all(bus: IEventBus = event_bus):
+    bus.subscribe(CACHE_INVALIDATION, cache_invalidation_subscriber.handle)
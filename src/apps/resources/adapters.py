@@ -1,13 +1,34 @@
 from .manager import io_resource_manager
 from .handlers.http_resource import HttpResourceHandler
-from .handlers.cache_resource import DynamodbCacheResourceHandler
+from .handlers.cache_resource import DynamodbCacheResourceHandler, RedisCacheResourceHandler
+from ...domains.cache import ICache
 from ...infra.client.service_api_dapter import ServiceApiAdapter
 from ...infra.cache.dynamodb_cache_adapter import DynamoDbCacheAdapter
+from ...infra.cache.redis_cache_adapter import RedisCacheAdapter
+from ...infra.cache.two_tier_cache_adapter import TwoTierCacheAdapter
+from ...configs.conf import (
+    CACHE_BACKEND,
+    LOCAL_CACHE_ENABLE,
+    LOCAL_CACHE_MAX_SIZE,
+    LOCAL_CACHE_TTL,
+    LOCAL_CACHE_POLICIES,
+)
 
 # service api(service client)
 http_resource_handler: HttpResourceHandler = io_resource_manager.get('http')
 service_client = ServiceApiAdapter(http_resource_handler)
 
 # cache
-cache_resource_handler: DynamodbCacheResourceHandler = io_resource_manager.get('ddb_cache')
-gw_cache = DynamoDbCacheAdapter(cache_resource_handler)
+if CACHE_BACKEND == 'redis':
+    cache_resource_handler: RedisCacheResourceHandler = io_resource_manager.get('redis_cache')
+    gw_cache: ICache = RedisCacheAdapter(cache_resource_handler)
+else:
+    cache_resource_handler: DynamodbCacheResourceHandler = io_resource_manager.get('ddb_cache')
+    gw_cache: ICache = DynamoDbCacheAdapter(cache_resource_handler)
+if LOCAL_CACHE_ENABLE:
+    gw_cache = TwoTierCacheAdapter(
+        gw_cache,
+        max_size=LOCAL_CACHE_MAX_SIZE,
+        ttl=LOCAL_CACHE_TTL,
+        policies=LOCAL_CACHE_POLICIES,
+    )
@@ -1,12 +1,25 @@
 import asyncio
 import aioboto3
+from contextlib import AsyncExitStack
 from botocore.config import Config
+from redis.asyncio import Redis, ConnectionPool
+from redis.asyncio.connection import SSLConnection
 from ._resource import ResourceHandler
 from ....configs.conf import (
     TABLE_CACHE,
     DDB_CONNECT_TIMEOUT,
     DDB_READ_TIMEOUT,
     DDB_MAX_ATTEMPTS,
+    REDIS_HOST,
+    REDIS_PORT,
+    REDIS_USER,
+    REDIS_PASS,
+    REDIS_DB,
+    REDIS_SSL,
+    REDIS_MAX_CONNECTS,
+    REDIS_CONNECT_TIMEOUT,
+    REDIS_SOCKET_TIMEOUT,
+    REDIS_HEALTH_CHECK_INTERVAL,
 )
 import logging
 
@@ -22,6 +35,11 @@ ddb_config = Config(
 
 
 class DynamodbCacheResourceHandler(ResourceHandler):
+    '''
+    the DynamoDB resource, the cache Table and a low-level client are created once
+    (double-checked lock) and reused by all cache operations,
+    the hot path (accessing) takes no lock
+    '''
 
     def __init__(self):
         super().__init__()
@@ -29,52 +47,166 @@ class DynamodbCacheResourceHandler(ResourceHandler):
         self.max_timeout = DDB_CONNECT_TIMEOUT
 
         self.lock = asyncio.Lock()
+        # the entered resource/client contexts
+        self.__contexts: AsyncExitStack = None
         self.dynamodb = None
+        self.client = None
+        self.table = None
 
 
     async def initial(self):
+        if self.table is not None:
+            return
+
+        async with self.lock:
+            if self.table is not None:
+                return
+
+            # keep the resource/client open (no "async with"), they're closed in "close",
+            # or right away if any of them fails to open
+            session = aioboto3.Session()
+            contexts = AsyncExitStack()
+            try:
+                dynamodb = await contexts.enter_async_context(session.resource('dynamodb', config=ddb_config))
+                # the resource's "meta.client" (de)serializes the attributes, this one doesn't
+                client = await contexts.enter_async_context(session.client('dynamodb', config=ddb_config))
+                table = await dynamodb.Table(TABLE_CACHE)
+            except BaseException:
+                await contexts.aclose()
+                raise
+
+            self.__contexts, self.dynamodb, self.client = contexts, dynamodb, client
+            try:
+                meta = await dynamodb.meta.client.describe_table(TableName=TABLE_CACHE)
+                log.info('Initial Cache[ddb] ResponseMetadata: %s', meta['ResponseMetadata'])
+            except Exception as e:
+                log.error(e.__str__())
+
+            # publish the table last, it's the flag of the hot path
+            self.table = table
+
+
+    # target: "resource", "table" (the pre-bound cache Table) or "client" (low-level)
+    async def accessing(self, target: str = 'resource'):
+        if self.table is None:
+            await self.initial()
+
+        if target == 'table':
+            return self.table
+        if target == 'client':
+            return self.client
+
+        return self.dynamodb
+
+
+    # 定期激活，維持連線和連線池
+    # Regular activation to maintain connections and connection pools
+    async def probe(self):
+        try:
+            if self.dynamodb is None:
+                await self.initial()
+                return
+
+            # meta = await self.dynamodb.Table(TABLE_CACHE).load()  # 替換 'YourTableName' 為你的表名
+            meta = await self.dynamodb.meta.client.describe_table(TableName=TABLE_CACHE)
+            log.info('Cache[ddb] HTTPStatusCode: %s', meta['ResponseMetadata']['HTTPStatusCode'])
+        except Exception as e:
+            log.error(f'Cache[ddb] Client Error: %s', e.__str__())
+            await self.close()
+            await self.initial()
+
+
+    async def close(self):
         try:
             async with self.lock:
-                if self.dynamodb is None:
-                    async with aioboto3.Session().resource('dynamodb', config=ddb_config) as db:
-                        self.dynamodb = db
-                        meta = await self.dynamodb.meta.client.describe_table(TableName=TABLE_CACHE)
-                        log.info('Initial Cache[ddb] ResponseMetadata: %s', meta['ResponseMetadata'])
+                if self.__contexts is None:
+                    return
+                contexts = self.__contexts
+                self.table, self.dynamodb, self.client, self.__contexts = None, None, None, None
+                await contexts.aclose()
+                # log.info('Cache[ddb] client is closed')
 
         except Exception as e:
             log.error(e.__str__())
+
+
+
+class RedisCacheResourceHandler(ResourceHandler):
+
+    def __init__(self):
+        super().__init__()
+        self.lock = asyncio.Lock()
+        self.pool: ConnectionPool = None
+        self.redis: Redis = None
+
+
+    def __connection_pool(self) -> ConnectionPool:
+        connection_class = {}
+        if REDIS_SSL:
+            connection_class = {'connection_class': SSLConnection}
+
+        return ConnectionPool(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            username=REDIS_USER,
+            password=REDIS_PASS,
+            db=REDIS_DB,
+            max_connections=REDIS_MAX_CONNECTS,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+            decode_responses=True,
+            **connection_class,
+        )
+
+
+    async def initial(self):
+        try:
             async with self.lock:
-                async with aioboto3.Session().resource('dynamodb', config=ddb_config) as db:
-                    self.dynamodb = db
+                if self.redis is None:
+                    self.pool = self.__connection_pool()
+                    self.redis = Redis(connection_pool=self.pool)
+                    await self.redis.ping()
+                    log.info('Initial Cache[redis] %s:%s', REDIS_HOST, REDIS_PORT)
+
+        except Exception as e:
+            # the connections are re-established by the pool on next access
+            log.error('Initial Cache[redis] Error: %s', e.__str__())
 
 
     async def accessing(self, **kwargs):
-        async with self.lock:
-            if self.dynamodb is None:
-                await self.initial()
+        if self.redis is None:
+            await self.initial()
 
-            return self.dynamodb
+        return self.redis
 
 
     # 定期激活，維持連線和連線池
     # Regular activation to maintain connections and connection pools
     async def probe(self):
         try:
-            # meta = await self.dynamodb.Table(TABLE_CACHE).load()  # 替換 'YourTableName' 為你的表名
-            meta = await self.dynamodb.meta.client.describe_table(TableName=TABLE_CACHE)
-            log.info('Cache[ddb] HTTPStatusCode: %s', meta['ResponseMetadata']['HTTPStatusCode'])
+            if self.redis is None:
+                await self.initial()
+                return
+
+            await self.redis.ping()
+            log.info('Cache[redis] PING ok')
         except Exception as e:
-            log.error(f'Cache[ddb] Client Error: %s', e.__str__())
+            log.error(f'Cache[redis] Client Error: %s', e.__str__())
+            await self.close()
             await self.initial()
 
 
     async def close(self):
         try:
             async with self.lock:
-                if self.dynamodb is None:
+                if self.redis is None:
                     return
-                await self.dynamodb.meta.client.close()
-                # log.info('Cache[ddb] client is closed')
+                redis, pool = self.redis, self.pool
+                self.redis, self.pool = None, None
+                await redis.aclose()
+                await pool.disconnect()
+                log.info('Cache[redis] connection pool is closed')
 
         except Exception as e:
             log.error(e.__str__())
@@ -1,14 +1,26 @@
+import time
 import asyncio
 import httpx
 import json
-from typing import List, Dict
+from typing import Any, List, Dict, Optional
 from urllib.parse import urlparse
 from ._resource import ResourceHandler
+from ....infra.client.http2_transport import Http2Transport
+from ....infra.client.bulkhead import Bulkhead, BulkheadRegistry
 from ....configs.conf import (
     HTTP_TIMEOUT,
     HTTP_MAX_CONNECTS,
     HTTP_MAX_KEEPALIVE_CONNECTS,
     HTTP_KEEPALIVE_EXPIRY,
+    HTTP2_ENABLE,
+    HTTP2_DOMAINS,
+    HTTP2_MAX_CONNECTS,
+    HTTP2_MAX_STREAMS,
+    HTTP2_FALLBACK_ERRORS,
+    HTTP_WARMUP_ENABLE,
+    HTTP_WARMUP_BUDGET_SECS,
+    HTTP_WARMUP_CONNECTS,
+    BULKHEAD_ENABLE,
 )
 import logging
 
@@ -22,26 +34,80 @@ limits=httpx.Limits(
     max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTS, 
     keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
 )
+# multiplexed: a few connections, many streams on each
+http2_limits=httpx.Limits(
+    max_connections=HTTP2_MAX_CONNECTS,
+    max_keepalive_connections=HTTP2_MAX_CONNECTS,
+    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+)
 
 
 class HttpResourceHandler(ResourceHandler):
 
-    def __init__(self, domains: List[str] = [
-        # TODO: 從 region_hosts 取得所有微服務的 domains
-    ]):
+    # domains: the urls of all microservices, see region_hosts.all_region_hosts
+    # upstreams: host -> upstream (for the bulkheads), see region_hosts.upstream_hosts
+    def __init__(self, domains: List[str] = [], upstreams: Dict[str, str] = {}):
         super().__init__()
         # update max_timeout
         self.max_timeout = HTTP_TIMEOUT
 
         self.resource_lock = asyncio.Lock()
-        domains = [self.parse_domain(domain) for domain in domains]
+        # domain: scheme://domain
+        self.origins: Dict[str, str] = {self.parse_domain(url): self.parse_origin(url) for url in domains}
+        domains = list(self.origins.keys())
         self.locks: Dict = {domain: asyncio.Lock() for domain in domains}  # 为每个域名创建锁
         self.domain_clients: Dict = {domain: None for domain in domains}
+        self.warmup_report: Dict[str, Dict[str, Any]] = {}
+        # the domains in HTTP/2 mode, empty means all
+        self.http2_domains: List[str] = [d.strip() for d in HTTP2_DOMAINS.split(';') if d.strip() != '']
+        self.http2_transports: Dict[str, Http2Transport] = {}
+        self.bulkheads = BulkheadRegistry(upstreams) if BULKHEAD_ENABLE else None
 
 
     async def initial(self):
         for domain in self.domain_clients.keys():
-            self.domain_clients[domain] = httpx.AsyncClient(timeout=timeout, limits=limits)
+            self.domain_clients[domain] = self.__new_client(domain)
+
+        if HTTP_WARMUP_ENABLE:
+            await self.warm_up()
+
+
+    """
+    open keep-alive connections (TLS handshake included) of all domains concurrently,
+    the domains not warmed up within the time budget are left to the 1st request
+    """
+    async def warm_up(self, budget_secs: float = HTTP_WARMUP_BUDGET_SECS) -> Dict[str, Dict[str, Any]]:
+        tasks = {domain: asyncio.create_task(self.__warm_up(domain)) for domain in self.domain_clients.keys()}
+        if len(tasks) == 0:
+            return {}
+
+        _, pending = await asyncio.wait(tasks.values(), timeout=budget_secs)
+        for task in pending:
+            task.cancel()
+
+        report: Dict[str, Dict[str, Any]] = {}
+        for domain, task in tasks.items():
+            if task in pending:
+                report[domain] = {'ok': False, 'err': f'timeout({budget_secs}s)'}
+            elif task.exception() is not None:
+                report[domain] = {'ok': False, 'err': task.exception().__str__()}
+            else:
+                report[domain] = task.result()
+
+        self.warmup_report = report
+        log.info('HttpX warm-up report: %s', report)
+        return report
+
+    async def __warm_up(self, domain: str) -> Dict[str, Any]:
+        client = await self.__init_client(domain)
+        origin = self.origins.get(domain, f'https://{domain}')
+        start = time.monotonic()
+        # concurrent requests open concurrent connections,
+        # any response means the connection is established
+        await asyncio.gather(*[
+            client.head(f'{origin}/') for _ in range(HTTP_WARMUP_CONNECTS)
+        ])
+        return {'ok': True, 'latency': round(time.monotonic() - start, 3)}
 
 
     async def accessing(self, url: str):
@@ -50,6 +116,7 @@ class HttpResourceHandler(ResourceHandler):
 
         domain = self.parse_domain(url)
         if not domain in self.domain_clients:
+            self.origins.setdefault(domain, self.parse_origin(url))
             await self.__init_lock(domain)
             client = await self.__init_client(domain)
         else:
@@ -67,7 +134,8 @@ class HttpResourceHandler(ResourceHandler):
     async def probe(self):
         for domain, client in self.domain_clients.items():
             try:
-                response = await client.head(f'http://{domain}/')  # 发送 HEAD 请求，使用 HEAD 请求检查域名是否可达
+                origin = self.origins.get(domain, f'http://{domain}')
+                response = await client.head(f'{origin}/')  # 发送 HEAD 请求，使用 HEAD 请求检查域名是否可达
                 if response.status_code >= 400:
                     raise Exception(json.dumps(response.json()))
 
@@ -100,14 +168,45 @@ class HttpResourceHandler(ResourceHandler):
         async with self.locks[domain]:  # 使用锁来防止竞争
             client = self.domain_clients.get(domain, None)
             if not client or client.is_closed:
-                client = self.domain_clients[domain] = httpx.AsyncClient(timeout=timeout, limits=limits)
+                client = self.domain_clients[domain] = self.__new_client(domain)
 
         return client
 
+    def is_http2(self, domain: str) -> bool:
+        return HTTP2_ENABLE and (len(self.http2_domains) == 0 or domain in self.http2_domains)
+
+    def __new_client(self, domain: str) -> httpx.AsyncClient:
+        if not self.is_http2(domain):
+            return httpx.AsyncClient(timeout=timeout, limits=limits)
+
+        try:
+            transport = Http2Transport(http2_limits, limits, HTTP2_MAX_STREAMS, HTTP2_FALLBACK_ERRORS)
+        except ImportError as e:
+            log.warning('HttpX HTTP/2 is not available, domain:%s, err:%s', domain, e.__str__())
+            return httpx.AsyncClient(timeout=timeout, limits=limits)
+
+        self.http2_transports[domain] = transport
+        return httpx.AsyncClient(timeout=timeout, transport=transport)
+
+    # the bulkhead of the upstream of the url, None if not any
+    def bulkhead(self, url: str) -> Optional[Bulkhead]:
+        return self.bulkheads.get(url) if self.bulkheads is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {domain: transport.stats() for domain, transport in self.http2_transports.items()}
+
+    def bulkhead_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.bulkheads.snapshot() if self.bulkheads is not None else {}
+
 
     # 從 url 解析 domain
     def parse_domain(self, url):
         return urlparse(url).netloc  # 返回解析出的 domain
+
+    # 從 url 解析 scheme://domain
+    def parse_origin(self, url):
+        parsed = urlparse(url)
+        return f'{parsed.scheme}://{parsed.netloc}'
     
     @classmethod
     def Response(cls):
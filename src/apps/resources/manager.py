@@ -2,8 +2,9 @@ import asyncio
 from typing import Dict
 from .handlers._resource import ResourceHandler
 from .handlers.http_resource import HttpResourceHandler
-from .handlers.cache_resource import DynamodbCacheResourceHandler
-from ...configs.conf import PROBE_CYCLE_SECS
+from .handlers.cache_resource import DynamodbCacheResourceHandler, RedisCacheResourceHandler
+from ...configs.conf import PROBE_CYCLE_SECS, CACHE_BACKEND, EVENT_BUS_BACKEND
+from ...configs.region_hosts import all_region_hosts, upstream_hosts
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -14,9 +15,16 @@ log = logging.getLogger(__name__)
 class GlobalIOResourceManager:
     def __init__(self):
         self.resources: Dict[str, ResourceHandler] = {
-            'http': HttpResourceHandler(),
-            'ddb_cache': DynamodbCacheResourceHandler(),
+            'http': HttpResourceHandler(all_region_hosts(), upstream_hosts()),
         }
+        # only the selected cache backend is initialized and probed
+        if CACHE_BACKEND == 'redis':
+            self.resources.update({'redis_cache': RedisCacheResourceHandler()})
+        else:
+            self.resources.update({'ddb_cache': DynamodbCacheResourceHandler()})
+        # the event bus (pub/sub) on redis
+        if EVENT_BUS_BACKEND == 'redis' and not 'redis_cache' in self.resources:
+            self.resources.update({'redis_cache': RedisCacheResourceHandler()})
 
     def get(self, resource: str) -> ResourceHandler:
         if resource not in self.resources:
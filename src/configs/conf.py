@@ -1,12 +1,14 @@
 import os
 from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import Set
+from typing import Dict, Set
 from .constants import Apply
 
 # stage
 TESTING = os.getenv("TESTING", "dev")
 STAGE = os.getenv("STAGE", "dev")
+# on AWS Lambda (Mangum) the background tasks are frozen between the invocations
+ON_LAMBDA = "AWS_LAMBDA_FUNCTION_NAME" in os.environ
 
 # microservice region hosts
 REGION_HOST_AUTH = os.getenv("REGION_HOST_AUTH", "https://xxt0dba048.execute-api.ap-northeast-1.amazonaws.com/dev/auth/api/v1/auth-nosql")
@@ -24,6 +26,60 @@ HTTP_TIMEOUT = float(os.getenv("TIMEOUT", 10.0))
 HTTP_MAX_CONNECTS = int(os.getenv("MAX_CONNECTS", 20))
 HTTP_MAX_KEEPALIVE_CONNECTS = int(os.getenv("MAX_KEEPALIVE_CONNECTS", 10))
 HTTP_KEEPALIVE_EXPIRY = float(os.getenv("KEEPALIVE_EXPIRY", 30.0))
+# HTTP/2 (multiplexed) upstreams, needs the h2 package (httpx[http2]), HTTP/1.1 otherwise
+HTTP2_ENABLE = os.getenv("HTTP2_ENABLE", "false").lower() == "true"
+# "{domain};{domain}..." the upstreams in HTTP/2 mode, empty means all
+HTTP2_DOMAINS = os.getenv("HTTP2_DOMAINS", "")
+HTTP2_MAX_CONNECTS = int(os.getenv("HTTP2_MAX_CONNECTS", "4"))
+# max requests in flight (streams) per upstream
+HTTP2_MAX_STREAMS = int(os.getenv("HTTP2_MAX_STREAMS", "100"))
+# protocol errors in a row before falling back to HTTP/1.1
+HTTP2_FALLBACK_ERRORS = int(os.getenv("HTTP2_FALLBACK_ERRORS", "3"))
+# pre-warming the connection pools at startup, it blocks the startup for up to
+# HTTP_WARMUP_BUDGET_SECS, so it's off by default on Lambda (it would delay every cold start)
+HTTP_WARMUP_ENABLE = os.getenv("HTTP_WARMUP_ENABLE", "false" if ON_LAMBDA else "true").lower() == "true"
+HTTP_WARMUP_BUDGET_SECS = float(os.getenv("HTTP_WARMUP_BUDGET_SECS", "2.0"))
+# keep-alive connections opened per domain
+HTTP_WARMUP_CONNECTS = int(os.getenv("HTTP_WARMUP_CONNECTS", "2"))
+# bulkhead (per upstream: auth, match, search, media, payment)
+BULKHEAD_ENABLE = os.getenv("BULKHEAD_ENABLE", "true").lower() == "true"
+# max requests in flight, the others wait in the queue (or are rejected if it's full)
+BULKHEAD_MAX_IN_FLIGHT = int(os.getenv("BULKHEAD_MAX_IN_FLIGHT", "50"))
+BULKHEAD_MAX_QUEUE = int(os.getenv("BULKHEAD_MAX_QUEUE", "50"))
+BULKHEAD_QUEUE_TIMEOUT = float(os.getenv("BULKHEAD_QUEUE_TIMEOUT", "1.0"))
+# "{upstream}:{max_in_flight}:{max_queue}:{queue_timeout};..." overrides per upstream
+BULKHEAD_LIMITS = os.getenv("BULKHEAD_LIMITS", "media:20:20:0.5;payment:10:10:0.5")
+# circuit breaker (per upstream domain)
+CB_ENABLE = os.getenv("CB_ENABLE", "true").lower() == "true"
+CB_WINDOW_SIZE = int(os.getenv("CB_WINDOW_SIZE", "50"))
+CB_MIN_CALLS = int(os.getenv("CB_MIN_CALLS", "10"))
+CB_ERROR_RATE = float(os.getenv("CB_ERROR_RATE", "0.5"))
+CB_SLOW_CALL_SECS = float(os.getenv("CB_SLOW_CALL_SECS", "5.0"))
+CB_SLOW_RATE = float(os.getenv("CB_SLOW_RATE", "0.8"))
+CB_OPEN_SECS = float(os.getenv("CB_OPEN_SECS", "10.0"))
+CB_HALF_OPEN_CALLS = int(os.getenv("CB_HALF_OPEN_CALLS", "2"))
+# adaptive timeout = clamp(p{PERCENTILE} latency * MULTIPLIER, MIN, HTTP_TIMEOUT)
+ADAPTIVE_TIMEOUT_ENABLE = os.getenv("ADAPTIVE_TIMEOUT_ENABLE", "true").lower() == "true"
+ADAPTIVE_TIMEOUT_MIN = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "2.0"))
+ADAPTIVE_TIMEOUT_PERCENTILE = float(os.getenv("ADAPTIVE_TIMEOUT_PERCENTILE", "99"))
+ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "3.0"))
+ADAPTIVE_TIMEOUT_MIN_SAMPLES = int(os.getenv("ADAPTIVE_TIMEOUT_MIN_SAMPLES", "20"))
+# retry & hedging policy for idempotent GETs (opt-in per call)
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.05"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "1.0"))
+# max extra attempts (retries + hedged requests) per request
+RETRY_BUDGET = int(os.getenv("RETRY_BUDGET", "2"))
+HEDGE_ENABLE = os.getenv("HEDGE_ENABLE", "true").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "1.0"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.05"))
+# identical GETs in flight share one upstream call
+GET_DEDUP_ENABLE = os.getenv("GET_DEDUP_ENABLE", "false").lower() == "true"
+# "{header};{header}..." the per-request headers not part of the dedup key
+GET_DEDUP_IGNORE_HEADERS = os.getenv("GET_DEDUP_IGNORE_HEADERS", "x-request-id;x-amzn-trace-id;traceparent")
+# the endpoints tracked in the metrics, the others are counted as "other"
+GET_DEDUP_MAX_ENDPOINTS = int(os.getenv("GET_DEDUP_MAX_ENDPOINTS", "256"))
 
 # cache
 # dynamodb
@@ -32,11 +88,56 @@ TABLE_CACHE = DDB_PREFIX + os.getenv("TABLE_CACHE", "cache")
 DDB_CONNECT_TIMEOUT=int(os.getenv("DDB_CONNECT_TIMEOUT", 10))
 DDB_READ_TIMEOUT=int(os.getenv("DDB_READ_TIMEOUT", 30))
 DDB_MAX_ATTEMPTS=int(os.getenv("DDB_MAX_ATTEMPTS", 5))
+# the cache values are stored as binary: "json" or "msgpack" (falls back to json if not installed)
+# msgpack/zstd are opt-in, all the instances sharing the cache must have them installed,
+# an instance without them can't read the values written by the others
+CACHE_CODEC_FORMAT = os.getenv("CACHE_CODEC_FORMAT", "json").lower()
+# "zlib", "zstd" or "none" (zstd falls back to zlib if not installed)
+CACHE_CODEC_COMPRESSION = os.getenv("CACHE_CODEC_COMPRESSION", "zlib").lower()
+# values smaller than this (bytes) are not compressed
+CACHE_CODEC_COMPRESS_THRESHOLD = int(os.getenv("CACHE_CODEC_COMPRESS_THRESHOLD", "1024"))
+# max keys in the (in-process) expiry index of the keys written by this instance
+CACHE_EXPIRY_INDEX_MAX_SIZE = int(os.getenv("CACHE_EXPIRY_INDEX_MAX_SIZE", "10000"))
 # redis
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_USER = os.getenv("REDIS_USERNAME", None)
 REDIS_PASS = os.getenv("REDIS_PASSWORD", None)
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+REDIS_SSL = os.getenv("REDIS_SSL", "false").lower() == "true"
+REDIS_MAX_CONNECTS = int(os.getenv("REDIS_MAX_CONNECTS", "50"))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "3.0"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "3.0"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+# the backend of gw_cache: "dynamodb" or "redis"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "dynamodb").lower()
+# local (in-process) cache in front of gw_cache
+LOCAL_CACHE_ENABLE = os.getenv("LOCAL_CACHE_ENABLE", "true").lower() == "true"
+LOCAL_CACHE_MAX_SIZE = int(os.getenv("LOCAL_CACHE_MAX_SIZE", "2048"))
+# the local TTL of the keys not in LOCAL_CACHE_POLICIES, 0: never cached locally,
+# e.g. the auth records ({role_id}), the email/reset-password tokens and the star-tracker sets:
+# the other instances would keep serving a logout/revoked token/removed star until it expires
+LOCAL_CACHE_TTL = float(os.getenv("LOCAL_CACHE_TTL", "0"))
+# "{key_prefix}={local_ttl_secs};..." local_ttl_secs=0 means never cached locally
+LOCAL_CACHE_POLICIES = os.getenv("LOCAL_CACHE_POLICIES",
+    "freq:=0;pay:=0;pay_handling:=0;pubkey_=600;continent=60;resume-tags=60;pay_plans=60;detail:=5;detail-ver:=5")
+
+# the cache-invalidation events: "local" (in process) or "redis" (pub/sub, all instances)
+EVENT_BUS_BACKEND = os.getenv("EVENT_BUS_BACKEND", "local").lower()
+# 0: sent on publish (no batching), the default on lambda: a delayed flush would be frozen
+EVENT_BUS_BATCH_WINDOW_SECS = float(os.getenv("EVENT_BUS_BATCH_WINDOW_SECS", "0" if ON_LAMBDA else "0.05"))
+EVENT_BUS_MAX_BATCH = int(os.getenv("EVENT_BUS_MAX_BATCH", "100"))
+
+# response compression: "br" (if brotli is installed) or "gzip", by Accept-Encoding
+COMPRESSION_ENABLE = os.getenv("COMPRESSION_ENABLE", "true").lower() == "true"
+# responses smaller than this (bytes) are not compressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+# compress on lambda (Mangum), the compressed body is returned base64 encoded,
+# only if API Gateway (REST API) has the binary media types "*/*" to decode it,
+# otherwise the clients get the base64 text with "Content-Encoding: gzip/br"
+COMPRESSION_ON_LAMBDA = os.getenv("COMPRESSION_ON_LAMBDA", "false").lower() == "true"
 
 # probe cycle secs
 PROBE_CYCLE_SECS = int(os.getenv("PROBE_CYCLE_SECS", "3"))
@@ -52,8 +153,32 @@ REQUEST_INTERVAL_TTL = int(os.getenv("REQUEST_INTERVAL_TTL", "20"))
 SHORT_TERM_TTL = int(os.getenv("SHORT_TERM_TTL", "300"))
 # default = 14 days (14 * 86400 secs)
 LONG_TERM_TTL = int(os.getenv("LONG_TERM_TTL", "1209600"))
+# default = 1 hour (3600 secs), how long an expired read-through value can still be served
+# while it's refreshed in background (stale-while-revalidate)
+READ_THROUGH_STALE_TTL = int(os.getenv("READ_THROUGH_STALE_TTL", "3600"))
+# XFetch beta, > 1.0 favors earlier refresh
+READ_THROUGH_BETA = float(os.getenv("READ_THROUGH_BETA", "1.0"))
 # default = 5 mins (300 secs)
 STAR_TRACKER_TTL = int(os.getenv("STAR_TRACKER_TTL", "300"))
+# the closed/not found jobs & resumes (public detail pages), in process
+NEGATIVE_CACHE_TTL = float(os.getenv("NEGATIVE_CACHE_TTL", "30"))
+NEGATIVE_CACHE_MAX_SIZE = int(os.getenv("NEGATIVE_CACHE_MAX_SIZE", "4096"))
+# the open jobs & resumes (public detail pages), in gw_cache
+DETAIL_CACHE_TTL = int(os.getenv("DETAIL_CACHE_TTL", "300"))
+# speculative prefetch of the next search page (opt-in), in process
+SEARCH_PREFETCH_ENABLE = os.getenv("SEARCH_PREFETCH_ENABLE", "false").lower() == "true"
+SEARCH_PREFETCH_TTL = float(os.getenv("SEARCH_PREFETCH_TTL", "30"))
+SEARCH_PREFETCH_MAX_PAGES = int(os.getenv("SEARCH_PREFETCH_MAX_PAGES", "256"))
+# the bytes of all prefetched pages (the raw bodies)
+SEARCH_PREFETCH_MAX_BYTES = int(os.getenv("SEARCH_PREFETCH_MAX_BYTES", str(8 * 1024 * 1024)))
+SEARCH_PREFETCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_PREFETCH_MAX_CONCURRENCY", "4"))
+# the popular search pages, in process
+SEARCH_RESULT_CACHE_ENABLE = os.getenv("SEARCH_RESULT_CACHE_ENABLE", "true").lower() == "true"
+SEARCH_RESULT_CACHE_TTL = float(os.getenv("SEARCH_RESULT_CACHE_TTL", "10"))
+SEARCH_RESULT_CACHE_MAX_SIZE = int(os.getenv("SEARCH_RESULT_CACHE_MAX_SIZE", "512"))
+# a page is cached only if its query is seen at least MIN_HITS times within ADMISSION_WINDOW secs
+SEARCH_RESULT_CACHE_MIN_HITS = int(os.getenv("SEARCH_RESULT_CACHE_MIN_HITS", "3"))
+SEARCH_RESULT_CACHE_ADMISSION_WINDOW = float(os.getenv("SEARCH_RESULT_CACHE_ADMISSION_WINDOW", "60"))
 
 MAX_TAGS = int(os.getenv("MAX_TAGS", "7"))
 
@@ -90,6 +215,20 @@ def parse_list(statuses: str):
     apply_enums: Set[Apply] = set([Apply(s.lower().strip()) for s in statuses.split(";") if s.strip() != ""])
     return list({ a.value for a in apply_enums })
     
+def parse_ttl_policies(policies: str) -> Dict[str, float]:
+    if policies is None or policies.strip() == "":
+        return {}
+
+    ttl_policies: Dict[str, float] = {}
+    for policy in policies.split(";"):
+        if policy.strip() == "":
+            continue
+        prefix, ttl = policy.rsplit("=", 1)
+        ttl_policies[prefix.strip()] = float(ttl)
+    return ttl_policies
+
+LOCAL_CACHE_POLICIES = parse_ttl_policies(LOCAL_CACHE_POLICIES)
+
 MY_STATUS_OF_COMPANY_APPLY = parse_list(MY_STATUS_OF_COMPANY_APPLY)
 STATUS_OF_COMPANY_APPLY = parse_list(STATUS_OF_COMPANY_APPLY)
 MY_STATUS_OF_COMPANY_REACTION = parse_list(MY_STATUS_OF_COMPANY_REACTION)
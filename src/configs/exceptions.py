@@ -95,6 +95,16 @@ class ServerException(HTTPException, ErrorLogger):
     def __str__(self) -> str:
         return self.msg
 
+class ServiceUnavailableException(HTTPException, ErrorLogger):
+    def __init__(self, msg: str, code: str = '50300', data: Any = None):
+        self.msg = msg
+        self.code = code
+        self.data = data
+        self.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        
+    def __str__(self) -> str:
+        return self.msg
+
 
 def __client_exception_handler(request: Request, exc: ClientException):
     return JSONResponse(status_code=exc.status_code, content=res_err(msg=exc.msg, code=exc.code, data=exc.data))
@@ -120,6 +130,9 @@ def __too_many_requests_exception_handler(request: Request, exc: TooManyRequests
 def __server_exception_handler(request: Request, exc: ServerException):
     return JSONResponse(status_code=exc.status_code, content=res_err(msg=exc.msg, code=exc.code, data=exc.data))
 
+def __service_unavailable_exception_handler(request: Request, exc: ServiceUnavailableException):
+    return JSONResponse(status_code=exc.status_code, content=res_err(msg=exc.msg, code=exc.code, data=exc.data))
+
 
 
 
@@ -132,6 +145,7 @@ def include_app(app: FastAPI):
     app.add_exception_handler(DuplicateUserException, __duplicate_user_exception_handler)
     app.add_exception_handler(TooManyRequestsException, __too_many_requests_exception_handler)
     app.add_exception_handler(ServerException, __server_exception_handler)
+    app.add_exception_handler(ServiceUnavailableException, __service_unavailable_exception_handler)
 
 def raise_http_exception(e: Exception, msg: str = None):
     if isinstance(e, ClientException):
@@ -158,4 +172,7 @@ def raise_http_exception(e: Exception, msg: str = None):
     if isinstance(e, ServerException):
         raise ServerException(msg=msg or e.msg, data=e.data)
     
+    if isinstance(e, ServiceUnavailableException):
+        raise ServiceUnavailableException(msg=msg or e.msg, data=e.data)
+    
     raise ServerException(msg=msg)
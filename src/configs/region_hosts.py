@@ -1,4 +1,5 @@
 import os
+from typing import Dict, List
 from fastapi import HTTPException, status
 import logging
 
@@ -50,6 +51,38 @@ payment_region_hosts = {
 }
 
 
+# all microservice hosts (unique, in order) for pre-warming the connection pools
+def all_region_hosts() -> List[str]:
+    hosts = {}
+    for region_hosts in [
+        auth_region_hosts,
+        auth_region_v2_hosts,
+        match_region_hosts,
+        search_region_hosts,
+        media_region_hosts,
+        payment_region_hosts,
+    ]:
+        hosts.update({host: None for host in region_hosts.values() if host})
+
+    return list(hosts.keys())
+
+
+# host: the upstream (microservice) of the host, for the bulkheads
+def upstream_hosts() -> Dict[str, str]:
+    hosts = {}
+    for upstream, region_hosts in [
+        ('auth', auth_region_hosts),
+        ('auth', auth_region_v2_hosts),
+        ('match', match_region_hosts),
+        ('search', search_region_hosts),
+        ('media', media_region_hosts),
+        ('payment', payment_region_hosts),
+    ]:
+        hosts.update({host: upstream for host in region_hosts.values() if host})
+
+    return hosts
+
+
 class RegionException(HTTPException):
     def __init__(self, region: str):
         self.msg = f"invalid region: {region}"
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Set, Optional
+from typing import Any, Dict, List, Set, Optional, Tuple
 
 
 class ICache(ABC):
@@ -16,10 +16,29 @@ class ICache(ABC):
     async def delete(self, key: str):
         pass
 
+    # items: [(key, val, ex)], ex=None means no expiry
+    @abstractmethod
+    async def mset(self, items: List[Tuple[str, Any, Optional[int]]]) -> bool:
+        pass
+
+    @abstractmethod
+    async def mdelete(self, keys: List[str]):
+        pass
+
+    # return {key: value}, the missed keys are mapped to None
+    @abstractmethod
+    async def mget(self, keys: List[str]) -> Dict[str, Any]:
+        pass
+
     @abstractmethod
     async def smembers(self, key: str) -> Optional[Set[Any]]:
         pass
 
+    # return {key: members}, the missed keys are mapped to None
+    @abstractmethod
+    async def msmembers(self, keys: List[str]) -> Dict[str, Optional[Set[Any]]]:
+        pass
+
     @abstractmethod
     async def sismember(self, key: str, value: Any) -> bool:
         pass
@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+# channels
+CACHE_INVALIDATION = 'cache-invalidation'
+
+# entities of the invalidation events
+COMPANY = 'company'
+JOB = 'job'
+TEACHER = 'teacher'
+RESUME = 'resume'
+PAYMENT = 'payment'
+
+
+# {"entity": "job", "ids": [company_id, job_id], "keys": [<cache keys to evict>]}
+def invalidation_event(entity: str, *ids: Any, keys: List[str] = []) -> Dict[str, Any]:
+    event = {
+        'entity': entity,
+        'ids': list(ids),
+    }
+    if len(keys) > 0:
+        event.update({'keys': list(keys)})
+    return event
+
+
+# the handler receives a batch of events
+EventHandler = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+class IEventBus(ABC):
+
+    @abstractmethod
+    async def publish(self, channel: str, events: List[Dict[str, Any]]):
+        pass
+
+    @abstractmethod
+    def subscribe(self, channel: str, handler: EventHandler):
+        pass
+
+    @abstractmethod
+    async def start(self):
+        pass
+
+    @abstractmethod
+    async def close(self):
+        pass
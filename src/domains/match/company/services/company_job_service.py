@@ -1,7 +1,11 @@
 from typing import Any, List, Dict, Optional
 from ....service_api import IServiceApi
+from ....cache import ICache
+from ....event_bus import IEventBus, COMPANY, CACHE_INVALIDATION, invalidation_event
 from .....domains.match.company.value_objects import c_value_objects as com_vo
 from .....configs.constants import BRIEF_JOB_SIZE
+from .....infra.cache.detail_cache import DetailCache
+from .....infra.cache.negative_cache import NegativeCache, negative_cache, JOB
 from .....configs.exceptions import \
     ClientException, ServerException
 import logging
@@ -12,8 +16,11 @@ log = logging.getLogger(__name__)
 
 
 class CompanyJobService:
-    def __init__(self, req: IServiceApi):
+    def __init__(self, req: IServiceApi, cache: ICache, bus: IEventBus, negative: NegativeCache = negative_cache):
         self.req = req
+        self.bus = bus
+        self.detail = DetailCache(cache)
+        self.negative = negative
 
     async def create_job(self, host: str, register_region: str, company_id: int, job: com_vo.JobVO, profile: Optional[com_vo.UpdateCompanyProfileVO] = None):
         job.region = register_region
@@ -24,6 +31,8 @@ class CompanyJobService:
                 "job": job.model_dump(),
             })
 
+        await self.detail.invalidate(JOB, company_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(COMPANY, company_id)])
         return data
 
     async def get_brief_jobs(self, host: str, company_id: int, size: int, job_id: int = None):
@@ -55,16 +64,25 @@ class CompanyJobService:
                 "job": job.model_dump(),
             })
 
+        self.negative.invalidate(JOB, company_id, job_id)
+        await self.detail.invalidate(JOB, company_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(JOB, company_id, job_id)])
         return data
 
     async def enable_job(self, host: str, company_id: int, job_id: int, enable: bool):
         data = await self.req.simple_put(
             url=f"{host}/companies/{company_id}/jobs/{job_id}/enable/{enable}")
 
+        self.negative.invalidate(JOB, company_id, job_id)
+        await self.detail.invalidate(JOB, company_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(JOB, company_id, job_id)])
         return data
 
     async def delete_job(self, host: str, company_id: int, job_id: int):
         url = f"{host}/companies/{company_id}/jobs/{job_id}"
         data = await self.req.simple_delete(url=url)
 
+        self.negative.invalidate(JOB, company_id, job_id)
+        await self.detail.invalidate(JOB, company_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(JOB, company_id, job_id)])
         return data
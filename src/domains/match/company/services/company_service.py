@@ -3,8 +3,12 @@ from ....service_api import IServiceApi
 from ..value_objects import c_value_objects as com_vo
 from ...star_tracker_service import StarTrackerService
 from ....cache import ICache
+from ....event_bus import IEventBus, COMPANY, CACHE_INVALIDATION, invalidation_event
 from .....configs.conf import \
     MY_STATUS_OF_COMPANY_APPLY, STATUS_OF_COMPANY_APPLY
+from .....infra.client.retry_policy import IDEMPOTENT_GET
+from .....infra.cache.detail_cache import DetailCache
+from .....infra.cache.negative_cache import JOB
 from .....configs.exceptions import \
     ClientException, ServerException
 import logging
@@ -15,18 +19,23 @@ log = logging.getLogger(__name__)
 
 
 class CompanyProfileService:
-    def __init__(self, req: IServiceApi):
+    def __init__(self, req: IServiceApi, cache: ICache, bus: IEventBus):
         self.req = req
+        self.bus = bus
+        # the public job/resume details include the profile
+        self.detail = DetailCache(cache)
 
     async def create_profile(self, host: str, company_id: int, profile: com_vo.CompanyProfileVO):
         url = f"{host}/companies/{company_id}"
         data = await self.req.simple_post(url=url, json=profile.model_dump())
         
+        await self.detail.invalidate(JOB, company_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(COMPANY, company_id)])
         return data
 
     async def get_profile(self, host: str, company_id: int):
         url = f"{host}/companies/{company_id}"
-        data = await self.req.simple_get(url)
+        data = await self.req.simple_get(url, policy=IDEMPOTENT_GET)
 
         return data
 
@@ -34,6 +43,8 @@ class CompanyProfileService:
         url = f"{host}/companies/{company_id}"
         data = await self.req.simple_put(url=url, json=profile.model_dump())
 
+        await self.detail.invalidate(JOB, company_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(COMPANY, company_id)])
         return data
 
 
@@ -43,8 +54,9 @@ class CompanyAggregateService(StarTrackerService):
 
     async def get_resume_follows_and_contacts(self, host: str, company_id: int, size: int):
         url = f"{host}/companies/{company_id}/resumes/follow-and-apply"
-        data = await self.req.simple_get(
+        data = await self.req.get_as(
             url=url, 
+            model=com_vo.CompanyFollowAndContactVO,
             params={
                 "size": size,
                 "my_statuses": MY_STATUS_OF_COMPANY_APPLY,
@@ -52,15 +64,16 @@ class CompanyAggregateService(StarTrackerService):
             }
         )
         
-        data = com_vo.CompanyFollowAndContactVO.model_validate(data).init()
-        data.followed = await self.contact_marks(host, 'company', company_id, data.followed)
-        data.contact = await self.followed_marks(host, 'company', company_id, data.contact)
+        data = data.init()
+        data.followed, data.contact = await self.cross_marks(
+            host, 'company', company_id, data.followed, data.contact)
         return data
 
     async def get_matchdata(self, host: str, company_id: int, size: int):
         url = f"{host}/companies/{company_id}/matchdata"
-        data = await self.req.simple_get(
+        data = await self.req.get_as(
             url=url, 
+            model=com_vo.CompanyMatchDataVO,
             params={
                 "size": size,
                 "my_statuses": MY_STATUS_OF_COMPANY_APPLY,
@@ -68,7 +81,7 @@ class CompanyAggregateService(StarTrackerService):
             }
         )
         
-        data = com_vo.CompanyMatchDataVO.model_validate(data).init()
-        data.followed = await self.contact_marks(host, 'company', company_id, data.followed)
-        data.contact = await self.followed_marks(host, 'company', company_id, data.contact)
+        data = data.init()
+        data.followed, data.contact = await self.cross_marks(
+            host, 'company', company_id, data.followed, data.contact)
         return data
@@ -30,14 +30,13 @@ class FollowResumeService(StarTrackerService):
         return follow_resume.init() # data
 
     async def get_followed_resume_list(self, host: str, company_id: int, size: int, next_ts: int = None):
-        data = await self.req.simple_get(
+        followed_resume_list = await self.req.get_as(
             url=f"{host}/companies/{company_id}/follow/resumes",
+            model=com_vo.FollowResumeListVO,
             params={
                 "size": size,
                 "next_ts": next_ts,
             })
-
-        followed_resume_list = com_vo.FollowResumeListVO.model_validate(data)
         await self.contact_marks(host, self.role, company_id, followed_resume_list.list)
         return followed_resume_list.init() # data
 
@@ -130,16 +129,15 @@ class ContactResumeService(StarTrackerService):
         return contact_resume.init() # data
 
     async def get_any_contacted_resume_list(self, host: str, company_id: int, my_statuses: List[str], statuses: List[str], size: int, next_ts: int = None):
-        data = await self.req.simple_get(
+        contact_resume_list = await self.req.get_as(
             url=f"{host}/companies/{company_id}/contact/resumes",
+            model=com_vo.ContactResumeListVO,
             params={
                 "my_statuses": my_statuses,
                 "statuses": statuses,
                 "size": size,
                 "next_ts": next_ts
             })
-
-        contact_resume_list = com_vo.ContactResumeListVO.model_validate(data)
         await self.followed_marks(host, self.role, company_id, contact_resume_list.list)
         return contact_resume_list.init() # data
 
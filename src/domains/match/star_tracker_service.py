@@ -1,3 +1,4 @@
+import asyncio
 from typing import Tuple, Any, Set, List, Dict
 from ..cache import ICache
 from ..service_api import IServiceApi
@@ -5,6 +6,7 @@ from .public_value_objects import MarkVO
 from ...configs.conf import STAR_TRACKER_TTL
 from ...configs.constants import COM, TEACH
 from ...configs.exceptions import *
+from ...infra.client.retry_policy import IDEMPOTENT_GET
 from ..user.value_objects.auth_vo import BaseAuthDTO
 import logging
 
@@ -63,20 +65,12 @@ class StarTrackerService:
         follow_set_key = self.__follow_key(role, role_id, target_ids)
         followed_set = await self.cache.smembers(follow_set_key)
 
-        # len(followed_set) could be always 0,
-        # user doesn't follows anyone
-        if isinstance(followed_set, set):
-            return followed_set
-
-        data = await self.req.simple_get(
-            url=f'{match_host}/{role}/{role_id}/follow/{target_ids}',
+        return await self.__id_set(
+            followed_set,
+            f'{match_host}/{role}/{role_id}/follow/{target_ids}',
+            follow_set_key,
         )
 
-        # TODO: confirm data is a list
-        await self.cache.sadd(follow_set_key, data, STAR_TRACKER_TTL)
-
-        return data
-
     async def followed_marks(self, match_host: str, role: str, role_id: int, target_list: List[MarkVO]):
         followed_id_set = await self.followed_id_set(match_host, role, role_id)
         if len(followed_id_set) > 0:
@@ -109,20 +103,12 @@ class StarTrackerService:
         contact_set_key = self.__contact_key(role, role_id, target_ids)
         contact_set = await self.cache.smembers(contact_set_key)
 
-        # len(contact_set) could be always 0,
-        # user doesn't contacts anyone
-        if isinstance(contact_set, set):
-            return contact_set
-
-        data = await self.req.simple_get(
-            url=f'{match_host}/{role}/{role_id}/contact/{target_ids}',
+        return await self.__id_set(
+            contact_set,
+            f'{match_host}/{role}/{role_id}/contact/{target_ids}',
+            contact_set_key,
         )
 
-        # TODO: confirm data is a list
-        await self.cache.sadd(contact_set_key, data, STAR_TRACKER_TTL)
-
-        return data
-
     async def contact_marks(self, match_host: str, role: str, role_id: int, target_list: List[MarkVO]):
         contact_id_set = await self.contact_id_set(match_host, role, role_id)
         if len(contact_id_set) > 0:
@@ -131,13 +117,52 @@ class StarTrackerService:
 
         return target_list
 
+    '''follow & contact'''
+
+    async def __id_set(self, cached_set: Set[int], url: str, set_key: str) -> Set[int]:
+        # len(cached_set) could be always 0,
+        # user doesn't follows/contacts anyone
+        if isinstance(cached_set, set):
+            return cached_set
+
+        data = await self.req.simple_get(url=url, policy=IDEMPOTENT_GET)
+
+        # TODO: confirm data is a list
+        await self.cache.sadd(set_key, data, STAR_TRACKER_TTL)
+
+        return data
+
+    '''
+    both sets are read from cache in one round trip,
+    the missed ones are requested from match service concurrently
+    '''
+    async def all_id_sets(self, match_host: str, role: str, role_id: int) -> Tuple[Set[int], Set[int]]:
+        role, target_ids = self.__role_target_ids(role)
+
+        follow_set_key = self.__follow_key(role, role_id, target_ids)
+        contact_set_key = self.__contact_key(role, role_id, target_ids)
+        id_sets = await self.cache.msmembers([follow_set_key, contact_set_key])
+
+        followed_id_set, contact_id_set = await asyncio.gather(
+            self.__id_set(
+                id_sets.get(follow_set_key, None),
+                f'{match_host}/{role}/{role_id}/follow/{target_ids}',
+                follow_set_key,
+            ),
+            self.__id_set(
+                id_sets.get(contact_set_key, None),
+                f'{match_host}/{role}/{role_id}/contact/{target_ids}',
+                contact_set_key,
+            ),
+        )
+        return followed_id_set, contact_id_set
+
     async def all_marks(self, match_host: str, visitor: BaseAuthDTO, target_list: List[MarkVO]):
         if visitor is None:
             return target_list
         role = visitor.role
         role_id = visitor.role_id
-        followed_id_set = await self.followed_id_set(match_host, role, role_id)
-        contact_id_set = await self.contact_id_set(match_host, role, role_id)
+        followed_id_set, contact_id_set = await self.all_id_sets(match_host, role, role_id)
         # 如果能看到 followed, contact 的星號，但自己沒有 follow, contact 的話，
         # 就表示有些 job, resume 的 id 是一樣的
         if len(followed_id_set) > 0 or len(contact_id_set) > 0:
@@ -146,3 +171,19 @@ class StarTrackerService:
                 target.contacted = target.id() in contact_id_set
 
         return target_list
+
+    '''
+    the followed list is marked by "contacted",
+    the contact list is marked by "followed"
+    '''
+    async def cross_marks(self, match_host: str, role: str, role_id: int, followed_list: List[MarkVO], contact_list: List[MarkVO]):
+        followed_id_set, contact_id_set = await self.all_id_sets(match_host, role, role_id)
+        if len(contact_id_set) > 0:
+            for target in followed_list or []:
+                target.contacted = target.id() in contact_id_set
+
+        if len(followed_id_set) > 0:
+            for target in contact_list or []:
+                target.followed = target.id() in followed_id_set
+
+        return followed_list, contact_list
@@ -29,14 +29,13 @@ class FollowJobService(StarTrackerService):
         return follow_job.init() # data
 
     async def get_followed_job_list(self, host: str, teacher_id: int, size: int, next_ts: int = None):
-        data = await self.req.simple_get(
+        followed_job_list = await self.req.get_as(
             url=f"{host}/teachers/{teacher_id}/follow/jobs",
+            model=teach_vo.FollowJobListVO,
             params={
                 "size": size,
                 "next_ts": next_ts,
             })
-
-        followed_job_list = teach_vo.FollowJobListVO.model_validate(data)
         await self.contact_marks(host, self.role, teacher_id, followed_job_list.list)
         return followed_job_list.init() # data
 
@@ -64,16 +63,15 @@ class ContactJobService(StarTrackerService):
         return contact_job.init() # data
 
     async def get_any_contacted_job_list(self, host: str, teacher_id: int, my_statuses: List[str], statuses: List[str], size: int, next_ts: int = None):
-        data = await self.req.simple_get(
+        contact_job_list = await self.req.get_as(
             url=f"{host}/teachers/{teacher_id}/contact/jobs",
+            model=teach_vo.ContactJobListVO,
             params={
                 "my_statuses": my_statuses,
                 "statuses": statuses,
                 "size": size,
                 "next_ts": next_ts
             })
-
-        contact_job_list = teach_vo.ContactJobListVO.model_validate(data)
         await self.followed_marks(host, self.role, teacher_id, contact_job_list.list)
         return contact_job_list.init() # data
 
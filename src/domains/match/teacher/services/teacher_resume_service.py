@@ -1,6 +1,10 @@
 from typing import Any, List, Dict, Optional
 from ....service_api import IServiceApi
+from ....cache import ICache
+from ....event_bus import IEventBus, TEACHER, CACHE_INVALIDATION, invalidation_event
 from .....domains.match.teacher.value_objects import t_value_objects as teach_vo
+from .....infra.cache.detail_cache import DetailCache
+from .....infra.cache.negative_cache import NegativeCache, negative_cache, RESUME
 from .....configs.exceptions import \
     ClientException, ServerException
 import logging
@@ -11,8 +15,11 @@ log = logging.getLogger(__name__)
 
 
 class TeacherResumeService:
-    def __init__(self, req: IServiceApi):
+    def __init__(self, req: IServiceApi, cache: ICache, bus: IEventBus, negative: NegativeCache = negative_cache):
         self.req = req
+        self.bus = bus
+        self.detail = DetailCache(cache)
+        self.negative = negative
 
     async def create_resume(self, host: str, register_region: str, teacher_id: int, resume: teach_vo.ResumeVO, profile: Optional[teach_vo.UpdateTeacherProfileVO] = None):
         resume.region = register_region
@@ -23,6 +30,8 @@ class TeacherResumeService:
                 "resume": resume.model_dump(),
             })
 
+        await self.detail.invalidate(RESUME, teacher_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(TEACHER, teacher_id)])
         return data
 
     async def get_brief_resumes(self, host: str, teacher_id: int):
@@ -50,18 +59,27 @@ class TeacherResumeService:
                 "resume": resume.model_dump(),
             })
 
+        self.negative.invalidate(RESUME, teacher_id, resume_id)
+        await self.detail.invalidate(RESUME, teacher_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(RESUME, teacher_id, resume_id)])
         return data
 
     async def enable_resume(self, host: str, teacher_id: int, resume_id: int, enable: bool):
         data = await self.req.simple_put(
             url=f"{host}/teachers/{teacher_id}/resumes/{resume_id}/enable/{enable}")
 
+        self.negative.invalidate(RESUME, teacher_id, resume_id)
+        await self.detail.invalidate(RESUME, teacher_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(RESUME, teacher_id, resume_id)])
         return data
 
     async def delete_resume(self, host: str, teacher_id: int, resume_id: int):
         url = f"{host}/teachers/{teacher_id}/resumes/{resume_id}"
         data = await self.req.simple_delete(url=url)
 
+        self.negative.invalidate(RESUME, teacher_id, resume_id)
+        await self.detail.invalidate(RESUME, teacher_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(RESUME, teacher_id, resume_id)])
         return data
 
     async def upsert_resume_section(self, host: str, resume_section: teach_vo.ResumeSectionVO):
@@ -71,10 +89,14 @@ class TeacherResumeService:
             url=f"{host}/teachers/{teacher_id}/resumes/{resume_id}/sections",
             json=resume_section.model_dump())
 
+        await self.detail.invalidate(RESUME, teacher_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(RESUME, teacher_id, resume_id)])
         return data
     
     async def delete_resume_section(self, host: str, teacher_id: int, resume_id: int, section_id: int):
         data = await self.req.simple_delete(
             url=f"{host}/teachers/{teacher_id}/resumes/{resume_id}/sections/{section_id}")
 
+        await self.detail.invalidate(RESUME, teacher_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(RESUME, teacher_id, resume_id)])
         return data
@@ -3,8 +3,12 @@ from ....service_api import IServiceApi
 from ..value_objects import t_value_objects as teach_vo
 from ...star_tracker_service import StarTrackerService
 from ....cache import ICache
+from ....event_bus import IEventBus, TEACHER, CACHE_INVALIDATION, invalidation_event
 from .....configs.conf import \
     MY_STATUS_OF_TEACHER_APPLY, STATUS_OF_TEACHER_APPLY
+from .....infra.client.retry_policy import IDEMPOTENT_GET
+from .....infra.cache.detail_cache import DetailCache
+from .....infra.cache.negative_cache import RESUME
 from .....configs.exceptions import \
     ClientException, ServerException
 import logging
@@ -15,13 +19,18 @@ log = logging.getLogger(__name__)
 
 
 class TeacherProfileService:
-    def __init__(self, req: IServiceApi):
+    def __init__(self, req: IServiceApi, cache: ICache, bus: IEventBus):
         self.req = req
+        self.bus = bus
+        # the public job/resume details include the profile
+        self.detail = DetailCache(cache)
 
     async def create_profile(self, host: str, teacher_id: int, profile: teach_vo.TeacherProfileVO):
         url = f"{host}/teachers/{teacher_id}"
         data = await self.req.simple_post(url=url, json=profile.model_dump())
 
+        await self.detail.invalidate(RESUME, teacher_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(TEACHER, teacher_id)])
         return data
 
     async def get_profile(self, host: str, teacher_id: int):
@@ -31,7 +40,7 @@ class TeacherProfileService:
     @staticmethod
     async def get(req: IServiceApi, match_host: str, teacher_id: int):
         url = f"{match_host}/teachers/{teacher_id}"
-        data = await req.simple_get(url)
+        data = await req.simple_get(url, policy=IDEMPOTENT_GET)
         if data is None:
             return None
 
@@ -41,6 +50,8 @@ class TeacherProfileService:
         url = f"{host}/teachers/{teacher_id}"
         data = await self.req.simple_put(url=url, json=profile.model_dump())
 
+        await self.detail.invalidate(RESUME, teacher_id)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(TEACHER, teacher_id)])
         return data
 
 
@@ -50,8 +61,9 @@ class TeacherAggregateService(StarTrackerService):
 
     async def get_job_follows_and_contacts(self, host: str, teacher_id: int, size: int):
         url = f"{host}/teachers/{teacher_id}/jobs/follow-and-apply"
-        data = await self.req.simple_get(
+        data = await self.req.get_as(
             url=url, 
+            model=teach_vo.TeacherFollowAndContactVO,
             params={
                 "size": size,
                 "my_statuses": MY_STATUS_OF_TEACHER_APPLY,
@@ -59,15 +71,16 @@ class TeacherAggregateService(StarTrackerService):
             }
         )
 
-        data = teach_vo.TeacherFollowAndContactVO.model_validate(data).init()
-        data.followed = await self.contact_marks(host, 'teacher', teacher_id, data.followed)
-        data.contact = await self.followed_marks(host, 'teacher', teacher_id, data.contact)
+        data = data.init()
+        data.followed, data.contact = await self.cross_marks(
+            host, 'teacher', teacher_id, data.followed, data.contact)
         return data
 
     async def get_matchdata(self, host: str, teacher_id: int, size: int):
         url = f"{host}/teachers/{teacher_id}/matchdata"
-        data = await self.req.simple_get(
+        data = await self.req.get_as(
             url=url, 
+            model=teach_vo.TeacherMatchDataVO,
             params={
                 "size": size,
                 "my_statuses": MY_STATUS_OF_TEACHER_APPLY,
@@ -75,7 +88,7 @@ class TeacherAggregateService(StarTrackerService):
             }
         )
 
-        data = teach_vo.TeacherMatchDataVO.model_validate(data).init()
-        data.followed = await self.contact_marks(host, 'teacher', teacher_id, data.followed)
-        data.contact = await self.followed_marks(host, 'teacher', teacher_id, data.contact)
+        data = data.init()
+        data.followed, data.contact = await self.cross_marks(
+            host, 'teacher', teacher_id, data.followed, data.contact)
         return data
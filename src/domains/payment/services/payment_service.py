@@ -4,11 +4,13 @@ from typing import List, Dict, Optional
 import json
 from ..configs.constants import *
 from ...cache import ICache
+from ...event_bus import IEventBus, PAYMENT, CACHE_INVALIDATION, invalidation_event
 from ...service_api import IServiceApi
 from ..models import dtos, value_objects as vos
 from ..models.stripe import stripe_dtos
 from ....configs.exceptions import *
 from ....configs.conf import SHORT_TERM_TTL, LONG_TERM_TTL
+from ....infra.cache.read_through_cache import ReadThroughCache
 from ....routers.res.response import res_success
 import logging as log
 
@@ -17,29 +19,30 @@ log.basicConfig(filemode='w', level=log.INFO)
 
 
 class PaymentService:
-    def __init__(self, req: IServiceApi, cache: ICache):
+    def __init__(self, req: IServiceApi, cache: ICache, bus: IEventBus):
         self.req = req
         self.cache = cache
+        self.bus = bus
         self.sign_header = 'Stripe-Signature'
 
-    async def __get_cache(self, role_id: int) -> Optional[Dict]:
-        return await self.cache.get(key=f'pay:{role_id}')
+    def __cache_key(self, role_id: int) -> str:
+        return f'pay:{role_id}'
 
-    async def __set_cache(self, role_id: int, payment_status: Dict) -> bool:
-        return await self.cache.set(key=f'pay:{role_id}', val=payment_status, ex=SHORT_TERM_TTL)
+    def __cus_id_key(self, customer_id: str) -> str:
+        return f'pay_handling:{customer_id}'
+
+    async def __get_cache(self, role_id: int) -> Optional[Dict]:
+        return await self.cache.get(key=self.__cache_key(role_id))
 
     async def __delete_cache(self, role_id: int) -> bool:
-        return await self.cache.delete(key=f'pay:{role_id}')
+        key = self.__cache_key(role_id)
+        result = await self.cache.delete(key=key)
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(PAYMENT, role_id, keys=[key])])
+        return result
 
     async def __get_role_id_by_cus_id(self, customer_id: str) -> Optional[int]:
-        role_id_str = await self.cache.get(key=f'pay_handling:{customer_id}')
+        role_id_str = await self.cache.get(key=self.__cus_id_key(customer_id))
         return int(role_id_str)
-
-    async def __set_role_id_by_cus_id(self, customer_id: str, role_id: int) -> bool:
-        return await self.cache.set(key=f'pay_handling:{customer_id}', val=str(role_id), ex=SHORT_TERM_TTL)
-
-    async def __delete_role_id_by_cus_id(self, customer_id: str) -> bool:
-        return await self.cache.delete(key=f'pay_handling:{customer_id}')
     
     async def __bind_registration_email(self, json: Dict, role_id: int) -> Dict:
         role_id_key = str(role_id)
@@ -74,7 +77,7 @@ class PaymentService:
         # create customer
         url = f'{host}/{STRIPE}/payment-method'
         payment_status = await self.req.simple_put(url=url, json=json_data)
-        await self.__cache_payment_status(payment_status, role_id)
+        payment_status = await self.__cache_payment_status(payment_status, role_id)
 
         return vos.PaymentStatusVO.model_validate(payment_status)
 
@@ -83,18 +86,24 @@ class PaymentService:
         payment_status = await self.req.simple_get(url=url, params={
             'role_id': role_id,
         })
-        await self.__cache_payment_status(payment_status, role_id)
-        return payment_status
+        return await self.__cache_payment_status(payment_status, role_id)
     
     '''
-    remove 'customer_id' from payment_status
+    return a copy of payment_status without 'customer_id'
+    (the GET result may be shared by the identical requests in flight)
     cache customer_id: role_id
     cache role_id: payment_status
     '''
-    async def __cache_payment_status(self, payment_status: Dict, role_id: int):
+    async def __cache_payment_status(self, payment_status: Dict, role_id: int) -> Dict:
+        payment_status = dict(payment_status)
         customer_id = payment_status.pop('customer_id')
-        await self.__set_role_id_by_cus_id(customer_id, role_id)
-        await self.__set_cache(role_id, payment_status)
+        keys = [self.__cus_id_key(customer_id), self.__cache_key(role_id)]
+        await self.cache.mset([
+            (keys[0], str(role_id), SHORT_TERM_TTL),
+            (keys[1], payment_status, SHORT_TERM_TTL),
+        ])
+        await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(PAYMENT, role_id, keys=keys)])
+        return payment_status
 
     '''
     2. Get payment status:
@@ -181,8 +190,9 @@ class PaymentService:
                 headers=headers,
             )
 
-            await self.__delete_role_id_by_cus_id(customer_id)
-            await self.__delete_cache(role_id)
+            keys = [self.__cus_id_key(customer_id), self.__cache_key(role_id)]
+            await self.cache.mdelete(keys)
+            await self.bus.publish(CACHE_INVALIDATION, [invalidation_event(PAYMENT, role_id, keys=keys)])
             return JSONResponse(content=event_data, status_code=201)
 
         except Exception as e:
@@ -200,22 +210,17 @@ class PaymentPlanService:
     def __init__(self, req: IServiceApi, cache: ICache):
         self.req = req
         self.cache = cache
-
-    async def __get_cache(self) -> Optional[Dict]:
-        return await self.cache.get(key='pay_plans')
-
-    async def __set_cache(self, payment_plans: List[Dict], exipre: int) -> bool:
-        return await self.cache.set(key='pay_plans', val=payment_plans, ex=exipre)
+        self.read_through = ReadThroughCache(cache)
 
     '''
-    long term cache: 14 days as default
+    long term cache: 14 days as default,
+    the stale plans are served while refreshing in background
     '''
 
     async def list_plans(self, host: str) -> List[Dict]:
-        plans =  await self.__get_cache()
-        if plans is None:
-            url = f'{host}/{STRIPE}/plans'
-            plans = await self.req.simple_get(url=url)
-            await self.__set_cache(plans, exipre=LONG_TERM_TTL)
+        return await self.read_through.get(
+            'pay_plans', self.__fetch_plans, host, ttl=LONG_TERM_TTL)
 
-        return plans
\ No newline at end of file
+    async def __fetch_plans(self, host: str) -> List[Dict]:
+        url = f'{host}/{STRIPE}/plans'
+        return await self.req.simple_get(url=url)
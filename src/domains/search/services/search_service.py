@@ -1,8 +1,17 @@
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional, Type, TypeVar
 from ...service_api import IServiceApi
 from ...cache import ICache
 from ....configs.exceptions import *
 from ....configs.conf import SHORT_TERM_TTL
+from ....infra.cache.read_through_cache import ReadThroughCache
+from ....infra.cache.detail_cache import DetailCache
+from ....infra.cache.page_prefetcher import PagePrefetcher
+from ....infra.cache.search_result_cache import SearchResultCache
+from ....infra.cache.negative_cache import \
+    NegativeCache, negative_cache, JOB, RESUME, CLOSED, NOT_FOUND
+from ....infra.client.retry_policy import IDEMPOTENT_GET
+from ....infra.client.data_envelope import decode_data
+from ....infra.utils.query_key import query_key
 from ...match.company.value_objects import c_value_objects as match_c
 from ...match.teacher.value_objects import t_value_objects as match_t
 from ..value_objects import \
@@ -21,21 +30,27 @@ CONTINENT_ALL = 'continent-all'
 CONTINENT_ = 'continent-'
 RESUME_TAGS = 'resume-tags'
 
+T = TypeVar('T')
+
 
 class SearchService:
-    def __init__(self, req: IServiceApi, cache: ICache):
+    def __init__(self, req: IServiceApi, cache: ICache, negative: NegativeCache = negative_cache,
+                 prefetcher: Optional[PagePrefetcher] = None,
+                 results: Optional[SearchResultCache] = None):
         self.req = req
         self.cache = cache
+        self.read_through = ReadThroughCache(cache)
+        self.detail = DetailCache(cache)
+        self.negative = negative
+        # the next page is prefetched if given
+        self.prefetcher = prefetcher
+        # the popular pages are cached if given
+        self.results = results
 
     async def get_resumes(self, search_host: str, query: search_t.SearchResumeListQueryDTO):
         url = f"{search_host}/resumes"
-        data = await self.req.simple_get(
-            url=url,
-            params=query.fine_dict(),
-        )
-
         # 使用 Pydantic 模型验证和序列化数据
-        resume_list_vo = search_t.SearchResumeListVO.model_validate(data)
+        resume_list_vo = await self.__search(url, query.fine_dict(), search_t.SearchResumeListVO)
         initialized_vo = resume_list_vo.init()
         return initialized_vo  # 返回 JSON 序列化的数据
 
@@ -47,20 +62,38 @@ class SearchService:
     '''
 
     async def get_resume_by_id(self, match_host: str, teacher_id: int, resume_id: int):
+        marker = self.negative.get(RESUME, teacher_id, resume_id)
+        if marker == CLOSED:
+            return (None, 'resume closed', None)
+        if marker == NOT_FOUND:
+            raise ClientException(msg='teacher or resume not found')
+
         url = None
         data = None
+        token = self.negative.token()
         try:
             url = f"{match_host}/teachers/{teacher_id}/resumes/{resume_id}"
-            data = await self.__public_resume_vo(url)
-            if await self.__resume_closed(data):
-                return (None, 'resume closed')
-            return (data.model_dump(), 'ok')  # JSON 序列化返回
+            (data, rev) = await self.detail.get(
+                RESUME, teacher_id, resume_id, self.__open_resume_dump, url)
+            if data is None:
+                self.negative.set(token, CLOSED, RESUME, teacher_id, resume_id)
+                return (None, 'resume closed', None)
+            return (data, 'ok', rev)  # JSON 序列化返回
 
         except Exception as e:
             log.error(f"get_resume_by_id >> \
                 url:{url}, response_data:{data}, error:{e}")
+            if isinstance(e, NotFoundException):
+                self.negative.set(token, NOT_FOUND, RESUME, teacher_id, resume_id)
             raise ClientException(msg='teacher or resume not found')
 
+    # None if the resume is closed
+    async def __open_resume_dump(self, url: str) -> Optional[Dict]:
+        data = await self.__public_resume_vo(url)
+        if await self.__resume_closed(data):
+            return None
+        return data.model_dump()
+
     async def __public_resume_vo(self, url: str) -> match_t.TeacherProfileAndResumeVO:
         resp = await self.req.simple_get(url)
         data = match_t.TeacherProfileAndResumeVO.model_validate(resp)
@@ -70,26 +103,20 @@ class SearchService:
         return not data.resume or not data.resume.enable
 
     async def get_resume_tags(self, search_host: str):
-        data = await self.cache.get(RESUME_TAGS)
-        if data is None:
-            url = f'{search_host}/resumes-info/tags'
-            raw_data = await self.req.simple_get(url)
-            # 验证并序列化数据
-            tags_vo = search_public.ResumeTagsVO.model_validate(raw_data)
-            data = tags_vo.model_dump()
-            await self.cache.set(RESUME_TAGS, data, SHORT_TERM_TTL)
+        return await self.read_through.get(
+            RESUME_TAGS, self.__fetch_resume_tags, search_host, ttl=SHORT_TERM_TTL)
 
-        return data
+    async def __fetch_resume_tags(self, search_host: str):
+        url = f'{search_host}/resumes-info/tags'
+        raw_data = await self.req.simple_get(url)
+        # 验证并序列化数据
+        tags_vo = search_public.ResumeTagsVO.model_validate(raw_data)
+        return tags_vo.model_dump()
 
     async def get_jobs(self, search_host: str, query: search_c.SearchJobListQueryDTO):
         url = f"{search_host}/jobs"
-        data = await self.req.simple_get(
-            url=url,
-            params=query.fine_dict(),
-        )
-
         # 使用 Pydantic 模型验证和序列化数据
-        job_list_vo = search_c.SearchJobListVO.model_validate(data)
+        job_list_vo = await self.__search(url, query.fine_dict(), search_c.SearchJobListVO)
         initialized_vo = job_list_vo.init()
         return initialized_vo 
 
@@ -101,20 +128,38 @@ class SearchService:
     '''
 
     async def get_job_by_id(self, match_host: str, company_id: int, job_id: int):
+        marker = self.negative.get(JOB, company_id, job_id)
+        if marker == CLOSED:
+            return (None, 'job closed', None)
+        if marker == NOT_FOUND:
+            raise ClientException(msg='company or job not found')
+
         url = None
         data = None
+        token = self.negative.token()
         try:
             url = f"{match_host}/companies/{company_id}/jobs/{job_id}"
-            data = await self.__public_job_vo(url)
-            if await self.__job_closed(data):
-                return (None, 'job closed')
-            return (data.model_dump(), 'ok')  # JSON 序列化返回
+            (data, rev) = await self.detail.get(
+                JOB, company_id, job_id, self.__open_job_dump, url)
+            if data is None:
+                self.negative.set(token, CLOSED, JOB, company_id, job_id)
+                return (None, 'job closed', None)
+            return (data, 'ok', rev)  # JSON 序列化返回
 
         except Exception as e:
             log.error(f"get_job_by_id >> \
                 url:{url}, response_data:{data}, error:{e}")
+            if isinstance(e, NotFoundException):
+                self.negative.set(token, NOT_FOUND, JOB, company_id, job_id)
             raise ClientException(msg='company or job not found')
 
+    # None if the job is closed
+    async def __open_job_dump(self, url: str) -> Optional[Dict]:
+        data = await self.__public_job_vo(url)
+        if await self.__job_closed(data):
+            return None
+        return data.model_dump()
+
     async def __public_job_vo(self, url: str) -> match_c.CompanyProfileAndJobVO:
         resp = await self.req.simple_get(url)
         data = match_c.CompanyProfileAndJobVO.model_validate(resp)
@@ -123,42 +168,74 @@ class SearchService:
     async def __job_closed(self, data: match_c.CompanyProfileAndJobVO) -> bool:
         return not data.job or not data.job.enable
 
+    '''
+    the query is sent upstream as is, its canonical form (see "canonical_params")
+    is only the key of the cached/prefetched pages;
+    - with the result cache, the page of a popular query may be cached already
+    - with the prefetcher, the page of the cursor may be prefetched already,
+      and the next page (if any) is prefetched after this one
+    the pages are held as the raw bodies (without star marks),
+    each request decodes its own copy (the marks are overlaid on it)
+    '''
+    async def __search(self, url: str, params: Dict[str, Any], model: Type[T]) -> T:
+        key = query_key(url, params)
+        page = self.results.get(key) if self.results is not None else None
+        if page is None:
+            if self.prefetcher is not None and params.get('search_after', None):
+                page = await self.prefetcher.get(key)
+            if page is None:
+                page = await self.__fetch_page(url, params)
+            if self.results is not None:
+                self.results.admit(key, page)
+
+        data = decode_data(page, model)
+        self.__prefetch_next(url, params, data.next)
+        return data
+
+    def __prefetch_next(self, url: str, params: Dict[str, Any], next: Optional[str]):
+        if self.prefetcher is None or not next:
+            return
+
+        next_params = dict(params, search_after=next)
+        next_key = query_key(url, next_params)
+        if self.results is not None and next_key in self.results:
+            return
+        self.prefetcher.prefetch(next_key, self.__fetch_page, url, next_params)
+
+    async def __fetch_page(self, url: str, params: Dict[str, Any]) -> bytes:
+        return await self.req.get_bytes(
+            url=url,
+            params=params,
+            policy=IDEMPOTENT_GET,
+        )
+
     async def get_continents(self, search_host: str):
-        data = await self.cache.get(CONTINENTS)
-        if data is None:
-            url = f'{search_host}/jobs-info/continents'
-            raw_data = await self.req.simple_get(url)
-            # 验证并序列化数据
-            continents_vo = search_public.ContinentListVO.model_validate(raw_data)
-            data = continents_vo.model_dump()
-            await self.cache.set(CONTINENTS, data, SHORT_TERM_TTL)
+        return await self.read_through.get(
+            CONTINENTS, self.__fetch_continents, search_host, ttl=SHORT_TERM_TTL)
 
-        return data
+    async def __fetch_continents(self, search_host: str):
+        url = f'{search_host}/jobs-info/continents'
+        raw_data = await self.req.simple_get(url)
+        # 验证并序列化数据
+        continents_vo = search_public.ContinentListVO.model_validate(raw_data)
+        return continents_vo.model_dump()
 
     async def get_all_continents_and_countries(self, search_host: str):
-        data = await self.cache.get(CONTINENT_ALL)
-        if data is None:
-            url = f'{search_host}/jobs-info/continents/all/countries'
-            raw_data = await self.req.simple_get(url)
-            # 验证并序列化数据列表
-            country_list = [search_public.CountryListVO.model_validate(item).model_dump() for item in raw_data]
-            data = country_list
-            await self.cache.set(CONTINENT_ALL, data, SHORT_TERM_TTL)
+        return await self.read_through.get(
+            CONTINENT_ALL, self.__fetch_all_continents_and_countries, search_host, ttl=SHORT_TERM_TTL)
 
-        return data
+    async def __fetch_all_continents_and_countries(self, search_host: str):
+        url = f'{search_host}/jobs-info/continents/all/countries'
+        raw_data = await self.req.simple_get(url)
+        # 验证并序列化数据列表
+        return [search_public.CountryListVO.model_validate(item).model_dump() for item in raw_data]
 
     async def get_countries(self, search_host: str, continent_code: str):
-        data = await self.cache.get(f'{CONTINENT_}{continent_code}')
-        if data is None:
-            url = f'{search_host}/jobs-info/continents/{continent_code}/countries'
-            raw_data = await self.req.simple_get(url)
-            # 验证并序列化数据列表
-            country_list = [search_public.CountryListVO.model_validate(item).model_dump() for item in raw_data]
-            data = country_list
-            await self.cache.set(
-                f'{CONTINENT_}{continent_code}',
-                data,
-                SHORT_TERM_TTL
-            )
-
-        return data
+        return await self.read_through.get(
+            f'{CONTINENT_}{continent_code}', self.__fetch_countries, search_host, continent_code, ttl=SHORT_TERM_TTL)
+
+    async def __fetch_countries(self, search_host: str, continent_code: str):
+        url = f'{search_host}/jobs-info/continents/{continent_code}/countries'
+        raw_data = await self.req.simple_get(url)
+        # 验证并序列化数据列表
+        return [search_public.CountryListVO.model_validate(item).model_dump() for item in raw_data]
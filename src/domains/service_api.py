@@ -1,11 +1,26 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Union, Any, Optional, Tuple
+from typing import Dict, Union, Any, Optional, Tuple, Type, TypeVar
 from fastapi import Request
+from ..infra.client.retry_policy import RetryPolicy
+
+
+T = TypeVar('T')
 
 
 class IServiceApi(ABC):
     @abstractmethod
-    async def simple_get(self, url: str, params: Dict = None, headers: Dict = None) -> Optional[Dict[str, str]]:
+    # policy: retry/hedge policy, only for idempotent requests
+    async def simple_get(self, url: str, params: Dict = None, headers: Dict = None, policy: RetryPolicy = None) -> Optional[Dict[str, str]]:
+        pass
+
+    @abstractmethod
+    # the body bytes, decode it by "decode_data"
+    async def get_bytes(self, url: str, params: Dict = None, headers: Dict = None, policy: RetryPolicy = None) -> bytes:
+        pass
+
+    @abstractmethod
+    # the "data" decoded into "model" (typed), the body is parsed once
+    async def get_as(self, url: str, model: Type[T], params: Dict = None, headers: Dict = None, policy: RetryPolicy = None) -> T:
         pass
     
     @abstractmethod
@@ -5,6 +5,7 @@ from ...cache import ICache
 from ...service_api import IServiceApi
 from ....infra.utils.util import gen_confirm_code
 from ....infra.utils.time_util import gen_timestamp
+from ....infra.utils.single_flight import single_flight
 from ....configs.conf import *
 from ....configs.constants import PATHS, PREFETCH, COM, TEACH
 from ....configs.exceptions import *
@@ -29,11 +30,15 @@ class AuthService:
         slot = timestamp % 100
         pubkey = await self.cache.get(f"pubkey_{slot}")
         if not pubkey:
-            pubkey = await self.req.simple_get(f"{host}/security/pubkey", params={"ts": timestamp})
-            await self.cache.set(f"pubkey_{slot}", pubkey, ex=LONG_TERM_TTL)
+            pubkey = await single_flight.do(f"pubkey_{slot}", self.__fetch_public_key, host, slot, timestamp)
 
         return {"pubkey": pubkey}
 
+    async def __fetch_public_key(self, host: str, slot: int, timestamp: int):
+        pubkey = await self.req.simple_get(f"{host}/security/pubkey", params={"ts": timestamp})
+        await self.cache.set(f"pubkey_{slot}", pubkey, ex=LONG_TERM_TTL)
+        return pubkey
+
     """
     signup
     """
@@ -313,12 +318,13 @@ class AuthService:
             raise TooManyRequestsException(msg="frequent_requests")
     
     async def __cache_token_by_reset_password(self, verify_token: str, email: EmailStr):
-        await self.cache.set(f'{email}:reset_pw', '1', REQUEST_INTERVAL_TTL)
-        await self.cache.set(verify_token, email, SHORT_TERM_TTL)
+        await self.cache.mset([
+            (f'{email}:reset_pw', '1', REQUEST_INTERVAL_TTL),
+            (verify_token, email, SHORT_TERM_TTL),
+        ])
         
     async def __cache_remove_by_reset_password(self, verify_token: str, email: EmailStr):
-        await self.cache.delete(f'{email}:reset_pw')
-        await self.cache.delete(verify_token)
+        await self.cache.mdelete([f'{email}:reset_pw', verify_token])
         
 
     async def update_password(self, auth_host: str, role_id: int, body: UpdatePasswordVO):
@@ -0,0 +1,102 @@
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from ...domains.cache import ICache
+from ..utils.single_flight import SingleFlight, single_flight
+from ...configs.conf import DETAIL_CACHE_TTL
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+DETAIL_ = 'detail:'
+DETAIL_VER_ = 'detail-ver:'
+
+
+class DetailCache:
+    '''
+    the public job/resume details (the validated "public_info()" dump) in ICache,
+    each entry is stamped with the version of its owner (company/teacher):
+    {
+        "ver": <owner version when the load started>,
+        "rev": <revision of the dump, a new one per load (ETag)>,
+        "data": <the dump>,
+    }
+    an entry is valid only if its stamp is the current owner version.
+
+    the writers replace the owner version (invalidate), so an entry stamped
+    before a write, incl. an in-flight read finished after the write,
+    never matches again.
+
+    the owner version lives 2 * ttl: an entry stamped "no version"
+    is older than the 1st write, so it expires before the version does.
+    '''
+
+    def __init__(self, cache: ICache, ttl: int = DETAIL_CACHE_TTL, flight: SingleFlight = single_flight):
+        self.cache = cache
+        self.ttl = ttl
+        self.flight = flight
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def entry_key(self, kind: str, owner_id: int, item_id: int) -> str:
+        return f'{DETAIL_}{kind}:{owner_id}:{item_id}'
+
+    def version_key(self, kind: str, owner_id: int) -> str:
+        return f'{DETAIL_VER_}{kind}:{owner_id}'
+
+    '''
+    fn: the loader, returns the dump, or None if it should not be cached (closed)
+    return: (the dump, its revision); the revision is None if the dump is not cached
+    '''
+    async def get(self, kind: str, owner_id: int, item_id: int,
+                  fn: Callable[..., Awaitable[Optional[Dict]]], *args, **kwargs) -> Tuple[Optional[Dict], Optional[str]]:
+        entry_key = self.entry_key(kind, owner_id, item_id)
+        version_key = self.version_key(kind, owner_id)
+        try:
+            items = await self.cache.mget([entry_key, version_key])
+        except Exception as e:
+            log.error('DetailCache.get fail, key:%s, err:%s', entry_key, e.__str__())
+            return (await fn(*args, **kwargs), None)
+
+        entry, version = items.get(entry_key, None), items.get(version_key, None)
+        if isinstance(entry, dict) and entry.get('ver', None) == version:
+            self.hits += 1
+            return (entry['data'], entry.get('rev', None))
+
+        self.misses += 1
+        return await self.flight.do((entry_key, version),
+            self.__load, entry_key, version, fn, *args, **kwargs)
+
+    async def __load(self, entry_key: str, version: Optional[str],
+                     fn: Callable[..., Awaitable[Optional[Dict]]], *args, **kwargs) -> Tuple[Optional[Dict], Optional[str]]:
+        data = await fn(*args, **kwargs)
+        if data is None:
+            return (data, None)
+
+        rev = uuid.uuid4().hex
+        try:
+            await self.cache.set(entry_key, {'ver': version, 'rev': rev, 'data': data}, ex=self.ttl)
+        except Exception as e:
+            log.error('DetailCache.__load fail, key:%s, err:%s', entry_key, e.__str__())
+            rev = None
+
+        return (data, rev)
+
+    # all details of the owner are invalidated
+    async def invalidate(self, kind: str, owner_id: int):
+        self.invalidations += 1
+        version_key = self.version_key(kind, owner_id)
+        try:
+            await self.cache.set(version_key, uuid.uuid4().hex, ex=self.ttl * 2)
+        except Exception as e:
+            log.error('DetailCache.invalidate fail, key:%s, err:%s', version_key, e.__str__())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
@@ -1,10 +1,17 @@
 import json
+import time
+import asyncio
+from decimal import Decimal
 from datetime import datetime, timedelta
-from typing import Any, List, Set, Optional
+from typing import Any, Dict, List, Set, Optional, Tuple
+from botocore.exceptions import ClientError
+from boto3.dynamodb.types import Binary, TypeDeserializer
 from ...domains.cache import ICache
 from ...apps.resources.handlers.cache_resource import DynamodbCacheResourceHandler
-from ...configs.conf import TABLE_CACHE
+from ...configs.conf import TABLE_CACHE, CACHE_EXPIRY_INDEX_MAX_SIZE
 from ...configs.exceptions import ServerException
+from .value_codec import ValueCodec, value_codec
+from ..utils.lru_cache import LRUCache
 import logging
 
 
@@ -12,26 +19,143 @@ logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
 
+# attribute of the star-tracker sets (DynamoDB Number Set)
+SET_MEMBERS = "members"
+# max keys per "batch_get_item"
+BATCH_GET_SIZE = 100
+# max requests per "batch_write_item"
+BATCH_WRITE_SIZE = 25
+BATCH_MAX_RETRIES = 5
+BATCH_RETRY_BACKOFF_SECS = 0.05
+# the attributes read by get/mget
+VALUE_PROJECTION = {
+    "ProjectionExpression": "#key, #value, #ttl",
+    "ExpressionAttributeNames": {
+        "#key": "cache_key",
+        "#value": "value",
+        "#ttl": "ttl",
+    },
+}
+# the attributes read by smembers/msmembers/sismember
+SET_PROJECTION = {
+    "ProjectionExpression": "#key, #members, #value, #ttl",
+    "ExpressionAttributeNames": {
+        "#key": "cache_key",
+        "#members": SET_MEMBERS,
+        "#value": "value",
+        "#ttl": "ttl",
+    },
+}
+
+
 class DynamoDbCacheAdapter(ICache):
-    def __init__(self, async_db_resource: DynamodbCacheResourceHandler):
+    '''
+    the values are written by the low-level client as a binary envelope (ValueCodec),
+    the legacy string/number values (written before the envelope) are still readable
+
+    DynamoDB deletes the expired items lazily, so the "ttl" attribute is checked on read:
+    an expired item is a miss. The expiry of the keys written by this instance
+    is also kept in process (expiry index), the first read of a key known
+    to be expired is a miss without a network call.
+    '''
+
+    def __init__(self, async_db_resource: DynamodbCacheResourceHandler, codec: ValueCodec = value_codec):
         self.aio_db = async_db_resource
+        self.codec = codec
+        self.__deserializer = TypeDeserializer()
+        # key: expire_at (epoch secs)
+        self.expiry_index = LRUCache(max_size=CACHE_EXPIRY_INDEX_MAX_SIZE)
+        self.expired_reads = 0
+        self.short_circuits = 0
+
+
+    def __index(self, key: str, ex: int = None):
+        if ex:
+            self.expiry_index.set(key, self.__ttl(ex))
+        else:
+            self.expiry_index.delete(key)
+
+    # the key is written by this instance and it's expired,
+    # it short-circuits one read only: another instance may rewrite the key
+    # with a fresh TTL, the next reads go to DynamoDB
+    def __known_expired(self, key: str, now: float) -> bool:
+        expire_at = self.expiry_index.get(key, None)
+        if expire_at is None or expire_at > now:
+            return False
+
+        self.expiry_index.delete(key)
+        self.short_circuits += 1
+        return True
+
+    # "ttl" of the low-level item ({"N": ...}) or the resource item (Decimal)
+    def __is_expired(self, item: Dict, now: float) -> bool:
+        ttl = item.get("ttl", None)
+        if ttl is None:
+            return False
+
+        ttl = float(ttl["N"]) if isinstance(ttl, dict) else float(ttl)
+        if ttl > now:
+            return False
+
+        self.expired_reads += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'expired_reads': self.expired_reads,
+            'short_circuits': self.short_circuits,
+            'expiry_index': self.expiry_index.stats(),
+        }
 
 
     def is_json_obj(self, val: Any) -> bool:
-        return (val[0] == "{" and val[-1] == "}") or \
-            (val[0] == "[" and val[-1] == "]")
+        return len(val) > 0 and \
+            ((val[0] == "{" and val[-1] == "}") or \
+            (val[0] == "[" and val[-1] == "]"))
+
+    # legacy: the dict/list values were written as JSON strings
+    def __legacy_value(self, val: str) -> Any:
+        return json.loads(val) if self.is_json_obj(val) else val
+
+    # value of the resource layer (or a deserialized attribute)
+    def __value(self, val: Any) -> Any:
+        if isinstance(val, Binary):
+            return self.codec.decode(val.value)
+        if isinstance(val, str):
+            return self.__legacy_value(val)
+
+        return self.__number(val)
+
+    # value of the low-level client: {"B": ...}, legacy {"S": ...} or {"N": ...}
+    def __item_value(self, item: Optional[Dict]) -> Any:
+        if item is None or not "value" in item:
+            return None
+
+        attr = item["value"]
+        if "B" in attr:
+            return self.codec.decode(attr["B"])
+
+        return self.__value(self.__deserializer.deserialize(attr))
 
     async def get(self, key: str):
         res = None
         result = None
         try:
-            db = await self.aio_db.access()
-            table = await db.Table(TABLE_CACHE)
-            res = await table.get_item(Key={"cache_key": key})
-            if "Item" in res and "value" in res["Item"]:
-                val = res["Item"]["value"]
-                result = json.loads(val) if self.is_json_obj(val) else val
+            now = time.time()
+            if self.__known_expired(key, now):
+                return None
+
+            client = await self.aio_db.access(target='client')
+            res = await client.get_item(
+                TableName=TABLE_CACHE,
+                Key={"cache_key": {"S": key}},
+                **VALUE_PROJECTION,
+            )
+            item = res.get("Item", None)
+            if item is None or self.__is_expired(item, now):
+                return None
 
+            result = self.__item_value(item)
             return result
 
         except Exception as e:
@@ -40,27 +164,74 @@ class DynamoDbCacheAdapter(ICache):
                       key, res, result, e.__str__())
             raise ServerException(msg="d2_server_error")
 
+    '''
+    "batch_get_item" (low-level client) in chunks of 100 keys,
+    the unprocessed keys are retried with exponential backoff
+    '''
+    async def __batch_get_items(self, keys: List[str], projection: Dict[str, Any] = {}) -> Dict[str, Dict]:
+        items: Dict[str, Dict] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        if len(unique_keys) == 0:
+            return items
+
+        client = await self.aio_db.access(target='client')
+        for i in range(0, len(unique_keys), BATCH_GET_SIZE):
+            request = {
+                "Keys": [{"cache_key": {"S": key}} for key in unique_keys[i:i + BATCH_GET_SIZE]],
+            }
+            request.update(projection)
+            request_items = {TABLE_CACHE: request}
+            retries = 0
+            while request_items:
+                res = await client.batch_get_item(RequestItems=request_items)
+                for item in res.get("Responses", {}).get(TABLE_CACHE, []):
+                    items[item["cache_key"]["S"]] = item
+
+                request_items = res.get("UnprocessedKeys", None)
+                if not request_items:
+                    break
+                if retries >= BATCH_MAX_RETRIES:
+                    raise ServerException(msg="d2_batch_get_unprocessed")
+                await asyncio.sleep(BATCH_RETRY_BACKOFF_SECS * (2 ** retries))
+                retries += 1
+
+        return items
+
+    async def mget(self, keys: List[str]) -> Dict[str, Any]:
+        try:
+            now = time.time()
+            items = await self.__batch_get_items(
+                [key for key in keys if not self.__known_expired(key, now)], VALUE_PROJECTION)
+            return {
+                key: None if not key in items or self.__is_expired(items[key], now) \
+                    else self.__item_value(items[key]) for key in keys
+            }
+
+        except Exception as e:
+            log.error(f"cache.mget fail \
+                keys:%s, err:%s",
+                      keys, e.__str__())
+            raise ServerException(msg="d2_server_error")
+
+    # item of the low-level client
+    def __item(self, key: str, val: Any, ex: int = None) -> Dict:
+        item = {
+            "cache_key": {"S": key},
+            "value": {"B": self.codec.encode(val)},
+        }
+        if ex:
+            item.update({"ttl": {"N": str(self.__ttl(ex))}})
+
+        return item
 
     async def set(self, key: str, val: Any, ex: int = None):
         res = None
         result = False
         try:
-            val_type = type(val)
-            if val_type == dict or val_type == list:
-                val = json.dumps(val)
-
-            db = await self.aio_db.access()
-            table = await db.Table(TABLE_CACHE)
-            item = {
-                "cache_key": key,
-                "value": val,
-            }
-            if ex:
-                ttl = datetime.now() + timedelta(seconds=ex)
-                ttl = int(ttl.timestamp())
-                item.update({"ttl": ttl})
-
-            res = await table.put_item(Item=item)
+            item = self.__item(key, val, ex)
+            client = await self.aio_db.access(target='client')
+            res = await client.put_item(TableName=TABLE_CACHE, Item=item)
+            self.__index(key, ex)
             result = True
             return result
 
@@ -72,62 +243,281 @@ class DynamoDbCacheAdapter(ICache):
 
     async def delete(self, key: str):
         try:
-            db = await self.aio_db.access()
-            table = await db.Table(TABLE_CACHE)
-            await table.delete_item(Key={'cache_key': key})
+            client = await self.aio_db.access(target='client')
+            await client.delete_item(
+                TableName=TABLE_CACHE,
+                Key={"cache_key": {"S": key}},
+            )
+            self.expiry_index.delete(key)
 
         except Exception as e:
-            log.error(f"cache.set fail \
+            log.error(f"cache.delete fail \
                     key:%s, err:%s",
                       key, e.__str__())
             raise ServerException(msg="d2_server_error")
 
+    def __ttl(self, ex: int) -> int:
+        ttl = datetime.now() + timedelta(seconds=ex)
+        return int(ttl.timestamp())
+
+    def __number(self, val: Any) -> Any:
+        # boto3 returns the members of a Number Set as Decimal
+        if isinstance(val, Decimal):
+            return int(val) if val == int(val) else float(val)
+        return val
+
+    def __deserialize(self, item: Dict) -> Dict:
+        return {k: self.__deserializer.deserialize(v) for k, v in item.items()}
+
+    def __is_condition_failed(self, e: Exception) -> bool:
+        return isinstance(e, ClientError) and \
+            e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+    def __item_members(self, item: Dict) -> Set[Any]:
+        # star-tracker sets are stored as a DynamoDB Number Set
+        if SET_MEMBERS in item:
+            return {self.__number(v) for v in item[SET_MEMBERS]}
+
+        # legacy: the set was written by "set" as a list
+        if "value" in item:
+            values = self.__value(item["value"])
+            if not isinstance(values, list):
+                raise ServerException(msg="invalid set-members type")
+            return set(values)
+
+        # the set is cached, but all members have been removed
+        return set()
+
+    async def __get_set_item(self, key: str) -> Optional[Dict]:
+        res = None
+        try:
+            now = time.time()
+            if self.__known_expired(key, now):
+                return None
+
+            table = await self.aio_db.access(target='table')
+            res = await table.get_item(
+                Key={"cache_key": key},
+                **SET_PROJECTION,
+            )
+            item = res.get("Item", None)
+            if item is None or self.__is_expired(item, now):
+                return None
+
+            return item
+
+        except Exception as e:
+            log.error(f"cache.__get_set_item fail \
+                key:%s, res:%s, err:%s",
+                      key, res, e.__str__())
+            raise ServerException(msg="d2_server_error")
+
+    '''
+    "batch_write_item" (low-level client) in chunks of 25 requests,
+    the unprocessed items are retried with exponential backoff
+    '''
+    async def __batch_write(self, requests: List[Dict]):
+        client = await self.aio_db.access(target='client')
+        for i in range(0, len(requests), BATCH_WRITE_SIZE):
+            request_items = {TABLE_CACHE: requests[i:i + BATCH_WRITE_SIZE]}
+            retries = 0
+            while request_items:
+                res = await client.batch_write_item(RequestItems=request_items)
+                request_items = res.get("UnprocessedItems", None)
+                if not request_items:
+                    break
+                if retries >= BATCH_MAX_RETRIES:
+                    raise ServerException(msg="d2_batch_write_unprocessed")
+                await asyncio.sleep(BATCH_RETRY_BACKOFF_SECS * (2 ** retries))
+                retries += 1
+
+    async def mset(self, items: List[Tuple[str, Any, Optional[int]]]) -> bool:
+        try:
+            # a key can only appear once in a batch, the last one wins
+            put_items = {key: self.__item(key, val, ex) for key, val, ex in items}
+            await self.__batch_write([
+                {"PutRequest": {"Item": item}} for item in put_items.values()
+            ])
+            for key, _, ex in items:
+                self.__index(key, ex)
+            return True
+
+        except Exception as e:
+            log.error(f"cache.mset fail \
+                    items:%s, err:%s",
+                      items, e.__str__())
+            raise ServerException(msg="d2_server_error")
+
+    async def mdelete(self, keys: List[str]):
+        try:
+            await self.__batch_write([
+                {"DeleteRequest": {"Key": {"cache_key": {"S": key}}}} for key in dict.fromkeys(keys)
+            ])
+            for key in keys:
+                self.expiry_index.delete(key)
+
+        except Exception as e:
+            log.error(f"cache.mdelete fail \
+                    keys:%s, err:%s",
+                      keys, e.__str__())
+            raise ServerException(msg="d2_server_error")
+
     async def smembers(self, key: str) -> Optional[Set[Any]]:
-        values = await self.get(key)
-        if values is None:
+        item = await self.__get_set_item(key)
+        if item is None:
             return None
-        
-        if not isinstance(values, list):
-            raise ServerException(msg="invalid set-members type")
-        
-        return set(values)
+
+        return self.__item_members(item)
+
+    async def msmembers(self, keys: List[str]) -> Dict[str, Optional[Set[Any]]]:
+        try:
+            now = time.time()
+            items = await self.__batch_get_items(
+                [key for key in keys if not self.__known_expired(key, now)], SET_PROJECTION)
+            items = {key: item for key, item in items.items() if not self.__is_expired(item, now)}
+
+        except Exception as e:
+            log.error(f"cache.msmembers fail \
+                keys:%s, err:%s",
+                      keys, e.__str__())
+            raise ServerException(msg="d2_server_error")
+
+        return {key: self.__item_members(self.__deserialize(items[key])) if key in items else None for key in keys}
 
     async def sismember(self, key: str, value: Any) -> bool:
-        set_members = await self.smembers(key)
-        if set_members is None:
+        item = await self.__get_set_item(key)
+        if item is None:
             return False
-        
-        return value in set_members
+
+        return value in self.__item_members(item)
+
+    '''
+    "sadd" and "srem" are single "update_item" calls (ADD/DELETE on a Number Set),
+    so concurrent follows/contacts are merged by DynamoDB instead of
+    being overwritten by a read-modify-write in the gateway.
+
+    The legacy JSON-list items cannot be updated in place; the condition
+    "attribute_not_exists(value)" detects them, the key is dropped and
+    the members are added once more, as for a missing key.
+    The expired (not yet deleted) items are dropped the same way,
+    instead of merging the new members into the expired ones.
+    '''
 
     async def sadd(self, key: str, values: List[Any], ex: int = None) -> int:
         if not isinstance(values, list):
             raise ServerException(msg="invalid input type, values should be list")
 
         set_values = set(values)
+        try:
+            return await self.__add_members(key, set_values, ex)
 
-        update_count = 0
-        set_members = await self.smembers(key)
-        if set_members is None:
-            await self.set(key, list(set_values), ex)
+        except Exception as e:
+            if not self.__is_condition_failed(e):
+                log.error(f"cache.sadd fail \
+                        key:%s, values:%s, ex:%s, err:%s",
+                          key, values, ex, e.__str__())
+                raise ServerException(msg="d2_server_error")
 
-        else:
-            new_set_members = set_members | set_values
-            await self.set(key, list(new_set_members), ex)
-            
-        update_count = len(values)
-        return update_count
+            log.warning(f"cache.sadd legacy/expired set found, drop it. key:%s", key)
+
+        # once more, on the dropped key
+        await self.delete(key)
+        try:
+            return await self.__add_members(key, set_values, ex)
+
+        except Exception as e:
+            log.error(f"cache.sadd fail after drop \
+                    key:%s, values:%s, ex:%s, err:%s",
+                      key, values, ex, e.__str__())
+            raise ServerException(msg="d2_server_error")
+
+    # the number of members added
+    async def __add_members(self, key: str, set_values: Set[Any], ex: int = None) -> int:
+        names = {"#value": "value", "#ttl": "ttl"}
+        attrs = {":now": int(time.time())}
+        expressions = []
+        if len(set_values) > 0:
+            names.update({"#members": SET_MEMBERS})
+            attrs.update({":members": set_values})
+            expressions.append("ADD #members :members")
+        if ex:
+            attrs.update({":ttl": self.__ttl(ex)})
+            expressions.append("SET #ttl = :ttl")
+        if len(expressions) == 0:
+            # an empty set without TTL: only create the item
+            expressions.append("REMOVE #value")
+
+        table = await self.aio_db.access(target='table')
+        res = await table.update_item(
+            Key={"cache_key": key},
+            UpdateExpression=" ".join(expressions),
+            ConditionExpression="attribute_not_exists(#value) AND " +
+                "(attribute_not_exists(#ttl) OR #ttl > :now)",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=attrs,
+            ReturnValues="UPDATED_OLD",
+        )
+        if ex:
+            self.__index(key, ex)
+
+        old_members = res.get("Attributes", {}).get(SET_MEMBERS, set())
+        old_members = {self.__number(v) for v in old_members}
+        return len(set_values - old_members)
 
     async def srem(self, key: str, value: Any, ex: int = None) -> int:
-        update_count = 0
-        set_members = await self.smembers(key)
-        if set_members is None:
-            return update_count
-
-        if value in set_members:
-            set_members.remove(value)
-            await self.set(key, list(set_members), ex)
-            update_count = 1
-        else:
-            update_count = 0
+        names = {
+            "#key": "cache_key",
+            "#members": SET_MEMBERS,
+            "#value": "value",
+            "#ttl": "ttl",
+        }
+        now = int(time.time())
+        attrs = {":member": {value}, ":now": now}
+        expressions = ["DELETE #members :member"]
+        if ex:
+            attrs.update({":ttl": self.__ttl(ex)})
+            expressions.append("SET #ttl = :ttl")
+
+        res = None
+        try:
+            table = await self.aio_db.access(target='table')
+            res = await table.update_item(
+                Key={"cache_key": key},
+                UpdateExpression=" ".join(expressions),
+                # do not create an empty (cached) set for a missing/expired key
+                ConditionExpression="attribute_exists(#key) AND attribute_not_exists(#value) AND " +
+                    "(attribute_not_exists(#ttl) OR #ttl > :now)",
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=attrs,
+                ReturnValues="UPDATED_OLD",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+
+            if ex:
+                self.__index(key, ex)
 
-        return update_count
+            old_members = res.get("Attributes", {}).get(SET_MEMBERS, set())
+            old_members = {self.__number(v) for v in old_members}
+            return 1 if value in old_members else 0
+
+        except Exception as e:
+            if self.__is_condition_failed(e):
+                item = e.response.get("Item", None)
+                # the key is missing: nothing to remove
+                if item is None:
+                    return 0
+
+                # the key is expired (nothing to remove) or a legacy set, drop it
+                removed = 0
+                if not self.__is_expired(item, now) and "value" in item:
+                    log.warning(f"cache.srem legacy set found, drop it. key:%s", key)
+                    members = self.__item_value(item)
+                    removed = 1 if isinstance(members, list) and value in members else 0
+
+                await self.delete(key)
+                return removed
+
+            log.error(f"cache.srem fail \
+                    key:%s, value:%s, ex:%s, res:%s, err:%s",
+                      key, value, ex, res, e.__str__())
+            raise ServerException(msg="d2_server_error")
@@ -0,0 +1,53 @@
+from typing import Any, Dict, Optional
+from ..utils.lru_cache import LRUCache
+from ...domains.event_bus import JOB, RESUME
+from ...configs.conf import NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_MAX_SIZE
+
+
+# markers
+CLOSED = 'closed'
+NOT_FOUND = 'not_found'
+
+
+class NegativeCache:
+    '''
+    in-process cache of the negative results (closed / not found)
+    of the public job & resume pages, with a short TTL and a size bound (LRU).
+
+    the writers (enable/update/delete) invalidate the markers; a marker is
+    not cached if any invalidation happened while it was loaded (see "token")
+    '''
+
+    def __init__(self, max_size: int = NEGATIVE_CACHE_MAX_SIZE, ttl: float = NEGATIVE_CACHE_TTL):
+        self.markers = LRUCache(max_size, ttl)
+        self.__invalidations = 0
+
+    def key(self, kind: str, *ids: Any) -> str:
+        return ':'.join([kind] + [str(id) for id in ids])
+
+    # take it before loading, pass it to "set"
+    def token(self) -> int:
+        return self.__invalidations
+
+    def get(self, kind: str, *ids: Any) -> Optional[str]:
+        return self.markers.get(self.key(kind, *ids), None)
+
+    def set(self, token: int, marker: str, kind: str, *ids: Any) -> bool:
+        if token != self.__invalidations:
+            return False
+
+        self.markers.set(self.key(kind, *ids), marker)
+        return True
+
+    def invalidate(self, kind: str, *ids: Any):
+        self.__invalidations += 1
+        self.markers.delete(self.key(kind, *ids))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.markers.stats()
+        stats.update({'invalidations': self.__invalidations})
+        return stats
+
+
+# shared by the readers (SearchService) and the writers (CompanyJobService, TeacherResumeService)
+negative_cache = NegativeCache()
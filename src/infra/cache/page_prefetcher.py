@@ -0,0 +1,158 @@
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from ...configs.conf import (
+    SEARCH_PREFETCH_TTL,
+    SEARCH_PREFETCH_MAX_PAGES,
+    SEARCH_PREFETCH_MAX_BYTES,
+    SEARCH_PREFETCH_MAX_CONCURRENCY,
+)
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+# the weight of a page: the size of its raw body
+def page_size(page: Any) -> int:
+    if isinstance(page, (bytes, bytearray)):
+        return len(page)
+    return 1
+
+
+class PagePrefetcher:
+    '''
+    speculative prefetch of the next page (in process):
+    after serving page N, "prefetch" loads page N+1 in background and
+    holds it for "ttl" secs, a request of page N+1 takes it by "get",
+    or awaits it if it's still in flight.
+
+    budgets:
+    - concurrency: at most "max_concurrency" prefetches in flight,
+      the others are dropped (not queued)
+    - memory: at most "max_pages" pages and "max_bytes" bytes (see "weigh"),
+      the oldest pages are dropped first (all pages have the same TTL)
+    '''
+
+    def __init__(self,
+                 ttl: float = SEARCH_PREFETCH_TTL,
+                 max_pages: int = SEARCH_PREFETCH_MAX_PAGES,
+                 max_bytes: int = SEARCH_PREFETCH_MAX_BYTES,
+                 max_concurrency: int = SEARCH_PREFETCH_MAX_CONCURRENCY,
+                 weigh: Callable[[Any], int] = page_size):
+        self.ttl = ttl
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.max_concurrency = max_concurrency
+        self.weigh = weigh
+        # key: (expire_at, page, weight, used)
+        self.__pages: OrderedDict[str, Tuple[float, Any, int, bool]] = OrderedDict()
+        self.__fetching: Dict[str, asyncio.Task] = {}
+        self.__bytes = 0
+        self.prefetched = 0
+        self.dropped = 0
+        self.failed = 0
+        self.hits = 0
+        self.inflight_hits = 0
+        self.misses = 0
+        self.used = 0
+        self.wasted = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        self.__purge()
+        entry = self.__pages.get(key, None)
+        if entry is not None:
+            self.hits += 1
+            return self.__use(key, entry)
+
+        task = self.__fetching.get(key, None)
+        if task is not None:
+            try:
+                page = await asyncio.shield(task)
+            except Exception:
+                page = None
+            if page is not None:
+                self.inflight_hits += 1
+                entry = self.__pages.get(key, None)
+                return self.__use(key, entry) if entry is not None else page
+
+        self.misses += 1
+        return None
+
+    # return False if it's dropped (already prefetched/in flight, or over budget)
+    def prefetch(self, key: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> bool:
+        if key in self.__pages or key in self.__fetching:
+            return False
+
+        if len(self.__fetching) >= self.max_concurrency:
+            self.dropped += 1
+            return False
+
+        task = asyncio.create_task(self.__fetch(key, fn, *args, **kwargs))
+        self.__fetching[key] = task
+        task.add_done_callback(lambda t: self.__fetching.pop(key, None))
+        return True
+
+    async def __fetch(self, key: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Optional[Any]:
+        try:
+            page = await fn(*args, **kwargs)
+        except Exception as e:
+            self.failed += 1
+            log.warning('PagePrefetcher.__fetch fail, key:%s, err:%s', key, e.__str__())
+            return None
+
+        if page is None:
+            return None
+
+        weight = self.weigh(page)
+        if weight > self.max_bytes:
+            self.dropped += 1
+            return page
+
+        self.prefetched += 1
+        self.__pages[key] = (time.monotonic() + self.ttl, page, weight, False)
+        self.__bytes += weight
+        self.__purge()
+        return page
+
+    def __use(self, key: str, entry: Tuple[float, Any, int, bool]) -> Any:
+        expire_at, page, weight, used = entry
+        if not used:
+            self.used += 1
+            self.__pages[key] = (expire_at, page, weight, True)
+        return page
+
+    # drop the expired pages, then the oldest ones over budget
+    def __purge(self):
+        now = time.monotonic()
+        while len(self.__pages) > 0:
+            key, (expire_at, _, weight, used) = next(iter(self.__pages.items()))
+            if expire_at > now and \
+                len(self.__pages) <= self.max_pages and \
+                self.__bytes <= self.max_bytes:
+                break
+
+            del self.__pages[key]
+            self.__bytes -= weight
+            if not used:
+                self.wasted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.hits + self.inflight_hits + self.misses
+        return {
+            'pages': len(self.__pages),
+            'bytes': self.__bytes,
+            'in_flight': len(self.__fetching),
+            'prefetched': self.prefetched,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'hits': self.hits,
+            'inflight_hits': self.inflight_hits,
+            'misses': self.misses,
+            'hit_ratio': round((self.hits + self.inflight_hits) / requests, 4) if requests else 0.0,
+            # prefetched pages served at least once
+            'used': self.used,
+            'wasted': self.wasted,
+        }
@@ -0,0 +1,136 @@
+import time
+import math
+import random
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Set
+from ...domains.cache import ICache
+from ..utils.single_flight import SingleFlight, single_flight
+from ...configs.conf import READ_THROUGH_STALE_TTL, READ_THROUGH_BETA, ON_LAMBDA
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+# marks a cached value written by ReadThroughCache
+ENVELOPE = '__rt__'
+
+
+class ReadThroughCache:
+    '''
+    read-through on top of ICache, the cached item is an envelope:
+    {
+        "__rt__": 1,
+        "value": <the value>,
+        "soft": <soft expiry, epoch secs>,
+        "delta": <secs spent on loading the value>,
+    }
+    and the item itself expires at soft expiry + "stale_ttl" (hard TTL).
+
+    - fresh: return the value
+    - soft expired (stale): return the value, refresh it in background
+    - probabilistic early refresh (XFetch): a fresh value is refreshed in background
+      with a probability that grows as the soft expiry gets closer,
+      so the refreshes are spread instead of all happening at expiry
+    - hard expired/missed: load it, concurrent loads are coalesced (single-flight)
+
+    refresh_inline (the default on lambda, a background task is frozen after the response):
+    the stale/early-expired value is refreshed before returning,
+    the cached value is returned only if the refresh fails
+    '''
+
+    def __init__(self, cache: ICache, flight: SingleFlight = single_flight, beta: float = READ_THROUGH_BETA,
+                 refresh_inline: bool = ON_LAMBDA):
+        self.cache = cache
+        self.flight = flight
+        self.beta = beta
+        self.refresh_inline = refresh_inline
+        self.__refreshing: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale = 0
+        self.early = 0
+        self.misses = 0
+
+    async def get(self, key: str, fn: Callable[..., Awaitable[Any]], *args,
+                  ttl: int, stale_ttl: int = READ_THROUGH_STALE_TTL, **kwargs) -> Any:
+        item = await self.cache.get(key)
+        if not self.__is_envelope(item):
+            # the value is cached by "cache.set" directly (before ReadThroughCache)
+            if item is not None:
+                self.hits += 1
+                return item
+
+            self.misses += 1
+            return await self.flight.do(key, self.__load, key, ttl, stale_ttl, fn, *args, **kwargs)
+
+        now = time.time()
+        if now >= item['soft']:
+            self.stale += 1
+        elif self.__early_expired(item, now):
+            self.early += 1
+        else:
+            self.hits += 1
+            return item['value']
+
+        if self.refresh_inline:
+            return await self.__refresh_inline(item['value'], key, ttl, stale_ttl, fn, *args, **kwargs)
+
+        self.__refresh(key, ttl, stale_ttl, fn, *args, **kwargs)
+        return item['value']
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'stale': self.stale,
+            'early': self.early,
+            'misses': self.misses,
+            'refreshing': len(self.__refreshing),
+        }
+
+    def __is_envelope(self, item: Any) -> bool:
+        return isinstance(item, dict) and ENVELOPE in item
+
+    # XFetch: now - delta * beta * log(rand()) >= soft expiry
+    def __early_expired(self, item: Dict, now: float) -> bool:
+        delta = float(item.get('delta', 0))
+        if delta <= 0 or self.beta <= 0:
+            return False
+
+        # 1.0 - random() is in (0, 1]
+        return now - delta * self.beta * math.log(1.0 - random.random()) >= item['soft']
+
+    def __refresh(self, key: str, ttl: int, stale_ttl: int, fn: Callable[..., Awaitable[Any]], *args, **kwargs):
+        if self.flight.in_flight(key):
+            return
+
+        task = asyncio.create_task(
+            self.flight.do(key, self.__load, key, ttl, stale_ttl, fn, *args, **kwargs))
+        # keep a reference until it's done
+        self.__refreshing.add(task)
+        task.add_done_callback(self.__refreshed)
+
+    async def __refresh_inline(self, value: Any, key: str, ttl: int, stale_ttl: int,
+                               fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        try:
+            return await self.flight.do(key, self.__load, key, ttl, stale_ttl, fn, *args, **kwargs)
+        except Exception as e:
+            log.error('ReadThroughCache refresh fail, serve the cached value, key:%s, err:%s', key, e.__str__())
+            return value
+
+    def __refreshed(self, task: asyncio.Task):
+        self.__refreshing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error('ReadThroughCache background refresh fail, err:%s', task.exception())
+
+    async def __load(self, key: str, ttl: int, stale_ttl: int, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        start = time.time()
+        value = await fn(*args, **kwargs)
+        now = time.time()
+        await self.cache.set(key, {
+            ENVELOPE: 1,
+            'value': value,
+            'soft': now + ttl,
+            'delta': round(now - start, 3),
+        }, ex=ttl + stale_ttl)
+        return value
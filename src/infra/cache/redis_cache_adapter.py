@@ -1,10 +1,7 @@
-import os
-import time
 import json
-import re
-from typing import Any, Dict, List, Set, Optional
-from redis import Redis
+from typing import Any, Dict, List, Set, Optional, Tuple
 from ...domains.cache import ICache
+from ...apps.resources.handlers.cache_resource import RedisCacheResourceHandler
 from ...configs.exceptions import ServerException
 import logging
 
@@ -13,21 +10,46 @@ logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
 
+# every cached set has this member, so an empty (cached) set still exists as a key
+SET_SENTINEL = "__set__"
+
+
 class RedisCacheAdapter(ICache):
-    def __init__(self, redis: Redis):
-        self.redis = redis
+    def __init__(self, async_redis_resource: RedisCacheResourceHandler):
+        self.aio_redis = async_redis_resource
+
+
+    # every value is stored as JSON, so its type round-trips as in the DynamoDB backend
+    def __encode(self, val: Any) -> str:
+        return json.dumps(val, separators=(',', ':'))
+
+    def __decode(self, val: Optional[str]) -> Any:
+        if val is None:
+            return None
+
+        try:
+            return json.loads(val)
+        except ValueError:
+            # legacy: a plain string
+            return val
+
+    def __member(self, member: str) -> Any:
+        # the star-tracker ids are numbers
+        return int(member) if member.lstrip("-").isdigit() else member
+
+    def __members(self, members: Set[str]) -> Optional[Set[Any]]:
+        if not members:
+            return None
+
+        return {self.__member(m) for m in members if m != SET_SENTINEL}
 
     async def get(self, key: str):
         val = None
         result = None
         try:
-            val = await self.redis.get(key)
-            if val == None:
-                return result
-
-            # log.info(val, "\n", val[0] == "{" and val[-1] =="}")
-            result = json.loads(
-                val) if val[0] == "{" and val[-1] == "}" else val
+            redis = await self.aio_redis.access()
+            val = await redis.get(key)
+            result = self.__decode(val)
             return result
 
         except Exception as e:
@@ -36,18 +58,26 @@ class RedisCacheAdapter(ICache):
                       key, val, result, e.__str__())
             raise ServerException(msg="r_server_error")
 
-    async def set(self, key: str, val: Any, ex: int = None):
-
+    async def mget(self, keys: List[str]) -> Dict[str, Any]:
+        vals = None
         try:
-            if isinstance(val, Dict):
-                log.debug(f'type:%s, val:%s' % (type(val), str(val)))
-                val = json.dumps(val)
-                log.debug(f'type:%s, val:%s' % (type(val), str(val)))
+            if len(keys) == 0:
+                return {}
+
+            redis = await self.aio_redis.access()
+            vals = await redis.mget(keys)
+            return {key: self.__decode(val) for key, val in zip(keys, vals)}
 
-            if not ex:
-                return await self.redis.set(key, val)
-            else:
-                return await self.redis.set(key, val, ex)
+        except Exception as e:
+            log.error(f"cache.mget fail \
+                    keys:%s, vals:%s, err:%s",
+                      keys, vals, e.__str__())
+            raise ServerException(msg="r_server_error")
+
+    async def set(self, key: str, val: Any, ex: int = None):
+        try:
+            redis = await self.aio_redis.access()
+            return await redis.set(key, self.__encode(val), ex=ex or None)
 
         except Exception as e:
             log.error(f"cache.set fail \
@@ -57,25 +87,119 @@ class RedisCacheAdapter(ICache):
 
     async def delete(self, key: str):
         try:
-            await self.redis.delete(key)
+            redis = await self.aio_redis.access()
+            await redis.delete(key)
         except Exception as e:
             log.error(f"cache.delete fail \
                     key:%s, err:%s",
                       key, e.__str__())
-            raise ServerException(msg="r_server_error") 
+            raise ServerException(msg="r_server_error")
+
+    async def mset(self, items: List[Tuple[str, Any, Optional[int]]]) -> bool:
+        try:
+            redis = await self.aio_redis.access()
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, val, ex in items:
+                    pipe.set(key, self.__encode(val), ex=ex or None)
+                await pipe.execute()
+            return True
+
+        except Exception as e:
+            log.error(f"cache.mset fail \
+                    items:%s, err:%s",
+                      items, e.__str__())
+            raise ServerException(msg="r_server_error")
+
+    async def mdelete(self, keys: List[str]):
+        try:
+            if len(keys) == 0:
+                return
+
+            redis = await self.aio_redis.access()
+            await redis.delete(*keys)
+        except Exception as e:
+            log.error(f"cache.mdelete fail \
+                    keys:%s, err:%s",
+                      keys, e.__str__())
+            raise ServerException(msg="r_server_error")
 
     async def smembers(self, key: str) -> Optional[Set[Any]]:
-        # TODO: implement
-        return set()
+        members = None
+        try:
+            redis = await self.aio_redis.access()
+            members = await redis.smembers(key)
+            return self.__members(members)
+
+        except Exception as e:
+            log.error(f"cache.smembers fail \
+                    key:%s, members:%s, err:%s",
+                      key, members, e.__str__())
+            raise ServerException(msg="r_server_error")
+
+    async def msmembers(self, keys: List[str]) -> Dict[str, Optional[Set[Any]]]:
+        members_list = None
+        try:
+            redis = await self.aio_redis.access()
+            async with redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.smembers(key)
+                members_list = await pipe.execute()
+
+            return {key: self.__members(members) for key, members in zip(keys, members_list)}
+
+        except Exception as e:
+            log.error(f"cache.msmembers fail \
+                    keys:%s, members_list:%s, err:%s",
+                      keys, members_list, e.__str__())
+            raise ServerException(msg="r_server_error")
 
     async def sismember(self, key: str, value: Any) -> bool:
-        # TODO: implement
-        return False
+        try:
+            redis = await self.aio_redis.access()
+            return bool(await redis.sismember(key, value))
+
+        except Exception as e:
+            log.error(f"cache.sismember fail \
+                    key:%s, value:%s, err:%s",
+                      key, value, e.__str__())
+            raise ServerException(msg="r_server_error")
 
     async def sadd(self, key: str, values: List[Any], ex: int = None) -> int:
-        # TODO: implement
-        return 0
+        if not isinstance(values, list):
+            raise ServerException(msg="invalid input type, values should be list")
+
+        try:
+            redis = await self.aio_redis.access()
+            async with redis.pipeline(transaction=True) as pipe:
+                if len(values) > 0:
+                    pipe.sadd(key, *values)
+                pipe.sadd(key, SET_SENTINEL)
+                if ex:
+                    pipe.expire(key, ex)
+                results = await pipe.execute()
+
+            return results[0] if len(values) > 0 else 0
+
+        except Exception as e:
+            log.error(f"cache.sadd fail \
+                    key:%s, values:%s, ex:%s, err:%s",
+                      key, values, ex, e.__str__())
+            raise ServerException(msg="r_server_error")
 
     async def srem(self, key: str, value: Any, ex: int = None) -> int:
-        # TODO: implement
-        return 0
+        try:
+            redis = await self.aio_redis.access()
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.srem(key, value)
+                if ex:
+                    # no-op if the key does not exist
+                    pipe.expire(key, ex)
+                results = await pipe.execute()
+
+            return results[0]
+
+        except Exception as e:
+            log.error(f"cache.srem fail \
+                    key:%s, value:%s, ex:%s, err:%s",
+                      key, value, ex, e.__str__())
+            raise ServerException(msg="r_server_error")
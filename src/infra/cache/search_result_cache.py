@@ -0,0 +1,62 @@
+from typing import Any, Dict, Optional
+from ..utils.lru_cache import LRUCache
+from ...configs.conf import (
+    SEARCH_RESULT_CACHE_TTL,
+    SEARCH_RESULT_CACHE_MAX_SIZE,
+    SEARCH_RESULT_CACHE_MIN_HITS,
+    SEARCH_RESULT_CACHE_ADMISSION_WINDOW,
+)
+
+
+class SearchResultCache:
+    '''
+    in-process cache of the search pages (the raw upstream bodies, without
+    the star marks), keyed by the canonical query (see "query_key").
+
+    - admission: a page is cached only if its query is seen at least
+      "min_hits" times within "admission_window" secs, so the long tail
+      of the queries does not evict the popular ones
+    - short TTL, at most "max_size" pages (LRU)
+
+    the star marks are per visitor, they are overlaid on a decoded copy
+    '''
+
+    def __init__(self,
+                 ttl: float = SEARCH_RESULT_CACHE_TTL,
+                 max_size: int = SEARCH_RESULT_CACHE_MAX_SIZE,
+                 min_hits: int = SEARCH_RESULT_CACHE_MIN_HITS,
+                 admission_window: float = SEARCH_RESULT_CACHE_ADMISSION_WINDOW):
+        self.results = LRUCache(max_size, ttl)
+        # query key: times seen
+        self.seen = LRUCache(max_size * 4, admission_window)
+        self.min_hits = min_hits
+        self.admitted = 0
+        self.rejected = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.results
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.results.get(key, None)
+
+    # return True if the page is cached
+    def admit(self, key: str, page: bytes) -> bool:
+        seen = self.seen.get(key, 0) + 1
+        if seen < self.min_hits:
+            self.seen.set(key, seen)
+            self.rejected += 1
+            return False
+
+        self.seen.delete(key)
+        self.results.set(key, page)
+        self.admitted += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.results.stats()
+        stats.update({
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'tracked_queries': len(self.seen),
+        })
+        return stats
@@ -0,0 +1,167 @@
+import copy
+from typing import Any, Dict, List, Set, Optional, Tuple
+from ...domains.cache import ICache
+from ..utils.lru_cache import LRUCache
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+class TwoTierCacheAdapter(ICache):
+    '''
+    L1: in-process LRU (per-key TTL, bounded size)
+    L2: any ICache backend (DynamoDbCacheAdapter/RedisCacheAdapter)
+
+    - "policies" maps a key prefix to the local TTL (secs),
+      the longest matched prefix wins; TTL=0 means the key is never cached locally
+    - writes go to the backend first, then refresh/evict the local entry
+    - values are copied in and out, callers are free to mutate the result
+    '''
+
+    def __init__(self, backend: ICache, max_size: int, ttl: float, policies: Dict[str, float] = {}):
+        self.backend = backend
+        self.ttl = ttl
+        self.local = LRUCache(max_size=max_size, ttl=ttl)
+        # longest prefix first
+        self.policies = sorted(policies.items(), key=lambda p: len(p[0]), reverse=True)
+        self.bypass = 0
+
+    def local_ttl(self, key: str) -> float:
+        for prefix, ttl in self.policies:
+            if key.startswith(prefix):
+                return ttl
+        return self.ttl
+
+    # evict the local entries only, e.g. on the invalidation events of other instances
+    def evict_local(self, keys: List[str]) -> int:
+        return sum(1 for key in keys if self.local.delete(key))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.local.stats()
+        stats.update({'bypass': self.bypass})
+        return stats
+
+    async def get(self, key: str):
+        ttl = self.local_ttl(key)
+        if ttl <= 0:
+            self.bypass += 1
+            return await self.backend.get(key)
+
+        val = self.local.get(key)
+        if val is not None:
+            return copy.deepcopy(val)
+
+        val = await self.backend.get(key)
+        # cache-missed(None) is not cached locally
+        if val is not None:
+            self.local.set(key, copy.deepcopy(val), ttl)
+        return val
+
+    async def mget(self, keys: List[str]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        missed_keys: List[str] = []
+        for key in keys:
+            val = self.local.get(key) if self.local_ttl(key) > 0 else None
+            if val is None:
+                missed_keys.append(key)
+            else:
+                result[key] = copy.deepcopy(val)
+
+        if len(missed_keys) > 0:
+            vals = await self.backend.mget(missed_keys)
+            for key in missed_keys:
+                val = vals.get(key, None)
+                ttl = self.local_ttl(key)
+                if val is not None and ttl > 0:
+                    self.local.set(key, copy.deepcopy(val), ttl)
+                result[key] = val
+
+        return result
+
+    async def set(self, key: str, val: Any, ex: int = None):
+        result = await self.backend.set(key, val, ex)
+        ttl = self.local_ttl(key)
+        if ttl <= 0:
+            self.local.delete(key)
+        else:
+            # the local entry never outlives the backend one
+            ttl = min(ttl, ex) if ex else ttl
+            self.local.set(key, copy.deepcopy(val), ttl)
+        return result
+
+    async def delete(self, key: str):
+        result = await self.backend.delete(key)
+        self.local.delete(key)
+        return result
+
+    async def mset(self, items: List[Tuple[str, Any, Optional[int]]]) -> bool:
+        result = await self.backend.mset(items)
+        for key, val, ex in items:
+            ttl = self.local_ttl(key)
+            if ttl <= 0:
+                self.local.delete(key)
+            else:
+                ttl = min(ttl, ex) if ex else ttl
+                self.local.set(key, copy.deepcopy(val), ttl)
+        return result
+
+    async def mdelete(self, keys: List[str]):
+        result = await self.backend.mdelete(keys)
+        for key in keys:
+            self.local.delete(key)
+        return result
+
+    async def smembers(self, key: str) -> Optional[Set[Any]]:
+        ttl = self.local_ttl(key)
+        if ttl <= 0:
+            self.bypass += 1
+            return await self.backend.smembers(key)
+
+        members = self.local.get(key)
+        if isinstance(members, set):
+            return set(members)
+
+        members = await self.backend.smembers(key)
+        if members is not None:
+            self.local.set(key, set(members), ttl)
+        return members
+
+    async def msmembers(self, keys: List[str]) -> Dict[str, Optional[Set[Any]]]:
+        result: Dict[str, Optional[Set[Any]]] = {}
+        missed_keys: List[str] = []
+        for key in keys:
+            members = self.local.get(key) if self.local_ttl(key) > 0 else None
+            if isinstance(members, set):
+                result[key] = set(members)
+            else:
+                missed_keys.append(key)
+
+        if len(missed_keys) > 0:
+            members_dict = await self.backend.msmembers(missed_keys)
+            for key in missed_keys:
+                members = members_dict.get(key, None)
+                ttl = self.local_ttl(key)
+                if members is not None and ttl > 0:
+                    self.local.set(key, set(members), ttl)
+                result[key] = members
+
+        return result
+
+    async def sismember(self, key: str, value: Any) -> bool:
+        members = self.local.get(key) if self.local_ttl(key) > 0 else None
+        if isinstance(members, set):
+            return value in members
+
+        return await self.backend.sismember(key, value)
+
+    async def sadd(self, key: str, values: List[Any], ex: int = None) -> int:
+        result = await self.backend.sadd(key, values, ex)
+        self.local.delete(key)
+        return result
+
+    async def srem(self, key: str, value: Any, ex: int = None) -> int:
+        result = await self.backend.srem(key, value, ex)
+        self.local.delete(key)
+        return result
@@ -0,0 +1,119 @@
+import json
+import zlib
+from typing import Any
+from ...configs.conf import (
+    CACHE_CODEC_FORMAT,
+    CACHE_CODEC_COMPRESSION,
+    CACHE_CODEC_COMPRESS_THRESHOLD,
+)
+from ...configs.exceptions import ServerException
+import logging
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+VERSION = 1
+
+# formats
+FORMAT_JSON = 1
+FORMAT_MSGPACK = 2
+
+# compressions
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+
+class ValueCodec:
+    '''
+    binary envelope of a cached value:
+        [version: 1 byte][format: 1 byte][compression: 1 byte][payload]
+
+    the header records how the payload was written,
+    so the format/compression can be changed without breaking the cached values
+    '''
+
+    def __init__(self,
+                 format: str = CACHE_CODEC_FORMAT,
+                 compression: str = CACHE_CODEC_COMPRESSION,
+                 compress_threshold: int = CACHE_CODEC_COMPRESS_THRESHOLD):
+        self.format = FORMAT_MSGPACK \
+            if format == 'msgpack' and msgpack is not None else FORMAT_JSON
+        self.compression = self.__compression(compression)
+        self.compress_threshold = compress_threshold
+        self.__zstd_compressor = zstandard.ZstdCompressor() if zstandard is not None else None
+        self.__zstd_decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def __compression(self, compression: str) -> int:
+        if compression == 'none':
+            return COMPRESSION_NONE
+        if compression == 'zstd' and zstandard is not None:
+            return COMPRESSION_ZSTD
+
+        return COMPRESSION_ZLIB
+
+    def encode(self, val: Any) -> bytes:
+        if self.format == FORMAT_MSGPACK:
+            payload = msgpack.packb(val, use_bin_type=True)
+        else:
+            payload = json.dumps(val, separators=(',', ':')).encode('utf-8')
+
+        compression = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and len(payload) >= self.compress_threshold:
+            compressed = self.__compress(self.compression, payload)
+            # keep it uncompressed if it doesn't help
+            if len(compressed) < len(payload):
+                payload, compression = compressed, self.compression
+
+        return bytes((VERSION, self.format, compression)) + payload
+
+    def decode(self, data: bytes) -> Any:
+        if len(data) < 3 or data[0] != VERSION:
+            raise ServerException(msg='unknown cache value version')
+
+        format, compression = data[1], data[2]
+        payload = data[3:]
+        if compression != COMPRESSION_NONE:
+            payload = self.__decompress(compression, payload)
+
+        if format == FORMAT_MSGPACK:
+            if msgpack is None:
+                raise ServerException(msg='msgpack is not installed')
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+        if format == FORMAT_JSON:
+            return json.loads(payload)
+
+        raise ServerException(msg='unknown cache value format')
+
+    def __compress(self, compression: int, payload: bytes) -> bytes:
+        if compression == COMPRESSION_ZSTD:
+            return self.__zstd_compressor.compress(payload)
+
+        return zlib.compress(payload)
+
+    def __decompress(self, compression: int, payload: bytes) -> bytes:
+        if compression == COMPRESSION_ZLIB:
+            return zlib.decompress(payload)
+
+        if compression == COMPRESSION_ZSTD:
+            if self.__zstd_decompressor is None:
+                raise ServerException(msg='zstandard is not installed')
+            return self.__zstd_decompressor.decompress(payload)
+
+        raise ServerException(msg='unknown cache value compression')
+
+
+value_codec = ValueCodec()
@@ -0,0 +1,158 @@
+import time
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from ..utils.latency_tracker import LatencyTracker
+from ...configs.conf import (
+    BULKHEAD_MAX_IN_FLIGHT,
+    BULKHEAD_MAX_QUEUE,
+    BULKHEAD_QUEUE_TIMEOUT,
+    BULKHEAD_LIMITS,
+)
+from ...configs.exceptions import ServiceUnavailableException
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+class Bulkhead:
+    '''
+    isolates an upstream (e.g. payment), a slow one can not take all
+    the tasks/sockets of the gateway:
+    - at most "max_in_flight" requests in flight
+    - the others wait in a FIFO queue of at most "max_queue" requests,
+      for at most "queue_timeout" secs
+    - rejected immediately if the queue is full (ServiceUnavailableException)
+
+    usage: "async with bulkhead: ..."
+    '''
+
+    def __init__(self, name: str,
+                 max_in_flight: int = BULKHEAD_MAX_IN_FLIGHT,
+                 max_queue: int = BULKHEAD_MAX_QUEUE,
+                 queue_timeout: float = BULKHEAD_QUEUE_TIMEOUT):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.__waiters: Deque[asyncio.Future] = deque()
+        self.wait = LatencyTracker()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self.__waiters)
+
+    async def acquire(self):
+        if self.in_flight < self.max_in_flight and len(self.__waiters) == 0:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if len(self.__waiters) >= self.max_queue:
+            self.rejected += 1
+            raise ServiceUnavailableException(msg='upstream_busy', data=self.name)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.__waiters.append(waiter)
+        self.queued += 1
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over anyway, pass it on
+                self.release()
+            elif waiter in self.__waiters:
+                self.__waiters.remove(waiter)
+
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+                log.warning('Bulkhead queue timeout, upstream:%s, timeout:%s', self.name, self.queue_timeout)
+                raise ServiceUnavailableException(msg='upstream_busy', data=self.name)
+            raise
+
+        finally:
+            self.wait.add(time.monotonic() - start)
+
+        self.admitted += 1
+
+    # the slot goes to the 1st waiter (if any), in_flight is unchanged then
+    def release(self):
+        while len(self.__waiters) > 0:
+            waiter = self.__waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self.in_flight -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'queue_depth': len(self.__waiters),
+            'max_queue': self.max_queue,
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+            # the wait time (secs) of the queued requests
+            'wait': self.wait.snapshot(),
+        }
+
+
+# upstream: (max_in_flight, max_queue, queue_timeout), see BULKHEAD_LIMITS
+def parse_limits(limits: str = BULKHEAD_LIMITS) -> Dict[str, Tuple[int, int, float]]:
+    result = {}
+    for spec in limits.split(';'):
+        if spec.strip() == '':
+            continue
+        try:
+            name, max_in_flight, max_queue, queue_timeout = spec.strip().split(':')
+            result[name] = (int(max_in_flight), int(max_queue), float(queue_timeout))
+        except ValueError as e:
+            log.error('Bulkhead invalid limits:%s, err:%s', spec, e.__str__())
+
+    return result
+
+
+class BulkheadRegistry:
+    '''
+    one bulkhead per upstream, the upstream of an url is
+    the longest host (prefix) of it, see region_hosts.upstream_hosts
+    '''
+
+    def __init__(self, upstream_hosts: Dict[str, str], limits: str = BULKHEAD_LIMITS):
+        overrides = parse_limits(limits)
+        self.bulkheads: Dict[str, Bulkhead] = {
+            name: Bulkhead(name, *overrides.get(name, ()))
+            for name in dict.fromkeys(upstream_hosts.values())
+        }
+        # longest host first
+        self.hosts = sorted(upstream_hosts.items(), key=lambda h: len(h[0]), reverse=True)
+
+    # None if the url is not of any upstream
+    def get(self, url: str) -> Optional[Bulkhead]:
+        for host, name in self.hosts:
+            if url.startswith(host):
+                return self.bulkheads[name]
+
+        return None
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: bulkhead.stats() for name, bulkhead in self.bulkheads.items()}
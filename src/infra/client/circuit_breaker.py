@@ -0,0 +1,202 @@
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Tuple
+from ..utils.latency_tracker import LatencyTracker
+from .retry_policy import IDEMPOTENT_METHODS
+from ...configs.conf import (
+    HTTP_TIMEOUT,
+    CB_ENABLE,
+    CB_WINDOW_SIZE,
+    CB_MIN_CALLS,
+    CB_ERROR_RATE,
+    CB_SLOW_CALL_SECS,
+    CB_SLOW_RATE,
+    CB_OPEN_SECS,
+    CB_HALF_OPEN_CALLS,
+    ADAPTIVE_TIMEOUT_ENABLE,
+    ADAPTIVE_TIMEOUT_MIN,
+    ADAPTIVE_TIMEOUT_PERCENTILE,
+    ADAPTIVE_TIMEOUT_MULTIPLIER,
+    ADAPTIVE_TIMEOUT_MIN_SAMPLES,
+)
+from ...configs.exceptions import ServiceUnavailableException
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+class BreakerState(Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    '''
+    CLOSED: calls pass, the outcomes of the last "window_size" calls are recorded;
+        it opens when (at least "min_calls" recorded)
+        error rate >= "error_rate" or slow call rate >= "slow_rate"
+    OPEN: calls fail fast (ServiceUnavailableException) for "open_secs"
+    HALF_OPEN: up to "half_open_calls" trial calls pass,
+        all succeed -> CLOSED, any fails -> OPEN
+
+    the timeout of each call adapts to the recent latency:
+        clamp(p99 * multiplier, min_timeout, max_timeout)
+    a timed-out call counts as a sample at its timeout and re-adapts right away,
+    so the timeout grows back when the upstream slows down
+    '''
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.state = BreakerState.CLOSED
+        self.opened_at = 0.0
+        # (failed, slow)
+        self.__outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=CB_WINDOW_SIZE)
+        self.__half_open_calls = 0
+        self.__half_open_succeeded = 0
+        self.latency = LatencyTracker()
+        self.__timeout = HTTP_TIMEOUT
+        # the samples since the last adaptation
+        self.__new_samples = 0
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def before_call(self):
+        if not CB_ENABLE:
+            return
+
+        if self.state == BreakerState.OPEN:
+            if time.monotonic() - self.opened_at < CB_OPEN_SECS:
+                self.rejected += 1
+                raise ServiceUnavailableException(msg='service_unavailable', data=self.domain)
+
+            self.__to(BreakerState.HALF_OPEN)
+
+        if self.state == BreakerState.HALF_OPEN:
+            if self.__half_open_calls >= CB_HALF_OPEN_CALLS:
+                self.rejected += 1
+                raise ServiceUnavailableException(msg='service_unavailable', data=self.domain)
+
+            self.__half_open_calls += 1
+
+    def on_success(self, latency: float):
+        self.calls += 1
+        self.__add_latency(latency)
+        self.__record(False, latency >= CB_SLOW_CALL_SECS)
+        if self.state == BreakerState.HALF_OPEN:
+            self.__half_open_succeeded += 1
+            if self.__half_open_succeeded >= CB_HALF_OPEN_CALLS:
+                self.__to(BreakerState.CLOSED)
+
+    # timeout: the timeout of the call if it timed out
+    def on_failure(self, latency: float, timeout: float = None):
+        self.calls += 1
+        self.failures += 1
+        if timeout is not None:
+            self.__add_latency(max(latency, timeout), adapt=True)
+        else:
+            self.__add_latency(latency)
+        self.__record(True, latency >= CB_SLOW_CALL_SECS)
+        if self.state == BreakerState.HALF_OPEN:
+            self.__to(BreakerState.OPEN)
+
+    # the call is cancelled, no outcome
+    def on_cancel(self):
+        if self.state == BreakerState.HALF_OPEN and self.__half_open_calls > 0:
+            self.__half_open_calls -= 1
+
+    # the adaptive timeout is for the idempotent requests only, the writes
+    # (e.g. the media uploads) may be applied already when they time out
+    def timeout(self, method: str = 'GET') -> float:
+        if method.upper() not in IDEMPOTENT_METHODS:
+            return HTTP_TIMEOUT
+        return self.__timeout
+
+    def __record(self, failed: bool, slow: bool):
+        if not CB_ENABLE:
+            return
+
+        self.__outcomes.append((failed, slow))
+        if self.state != BreakerState.CLOSED:
+            return
+
+        total = len(self.__outcomes)
+        if total < CB_MIN_CALLS:
+            return
+
+        error_rate = sum(1 for o in self.__outcomes if o[0]) / total
+        slow_rate = sum(1 for o in self.__outcomes if o[1]) / total
+        if error_rate >= CB_ERROR_RATE or slow_rate >= CB_SLOW_RATE:
+            log.error('circuit breaker opened, domain:%s, error_rate:%s, slow_rate:%s',
+                      self.domain, error_rate, slow_rate)
+            self.__to(BreakerState.OPEN)
+
+    def __to(self, state: BreakerState):
+        if state == BreakerState.OPEN:
+            self.opened_at = time.monotonic()
+            self.opened += 1
+        if state == BreakerState.CLOSED:
+            self.__outcomes.clear()
+
+        self.__half_open_calls = 0
+        self.__half_open_succeeded = 0
+        if self.state != state:
+            log.info('circuit breaker, domain:%s, %s -> %s',
+                     self.domain, self.state.value, state.value)
+        self.state = state
+
+    def __add_latency(self, latency: float, adapt: bool = False):
+        self.latency.add(latency)
+        self.__new_samples += 1
+        if adapt or self.__new_samples >= ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+            self.__adapt_timeout()
+
+    def __adapt_timeout(self):
+        if not ADAPTIVE_TIMEOUT_ENABLE or len(self.latency) < ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+            return
+
+        self.__new_samples = 0
+
+        latency = self.latency.percentile(ADAPTIVE_TIMEOUT_PERCENTILE)
+        timeout = latency * ADAPTIVE_TIMEOUT_MULTIPLIER
+        self.__timeout = min(max(timeout, ADAPTIVE_TIMEOUT_MIN), HTTP_TIMEOUT)
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = len(self.__outcomes)
+        snapshot = {
+            'state': self.state.value,
+            'calls': self.calls,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'opened': self.opened,
+            'error_rate': round(sum(1 for o in self.__outcomes if o[0]) / total, 4) if total else 0.0,
+            'slow_rate': round(sum(1 for o in self.__outcomes if o[1]) / total, 4) if total else 0.0,
+            'timeout': self.__timeout,
+        }
+        snapshot.update({'latency': self.latency.snapshot()})
+        return snapshot
+
+
+class CircuitBreakerRegistry:
+    '''
+    one breaker per upstream domain (netloc),
+    keyed the same way as HttpResourceHandler.domain_clients
+    '''
+
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, domain: str) -> CircuitBreaker:
+        breaker = self.breakers.get(domain, None)
+        if breaker is None:
+            breaker = self.breakers[domain] = CircuitBreaker(domain)
+
+        return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {domain: breaker.snapshot() for domain, breaker in self.breakers.items()}
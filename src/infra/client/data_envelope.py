@@ -0,0 +1,38 @@
+from typing import Any, Dict, Generic, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+from ...configs.exceptions import ServerException
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+T = TypeVar('T')
+
+
+class DataEnvelope(BaseModel, Generic[T]):
+    '''
+    the response body of the microservices {"code", "msg", "data"},
+    only "data" is decoded (into T), the others are ignored
+    '''
+    data: T
+
+
+__envelopes: Dict[Any, Type[DataEnvelope]] = {}
+
+
+'''
+decode the body bytes once, straight into "model" (a pydantic model,
+or any type, e.g. List[Model]), without the intermediate dict
+'''
+def decode_data(content: bytes, model: Type[T]) -> T:
+    envelope = __envelopes.get(model, None)
+    if envelope is None:
+        envelope = __envelopes[model] = DataEnvelope[model]
+
+    try:
+        return envelope.model_validate_json(content).data
+    except ValidationError as e:
+        log.error('decode_data fail, model:%s, err:%s', model, e.__str__())
+        raise ServerException(msg='invalid_response_data')
@@ -0,0 +1,144 @@
+import asyncio
+import httpx
+from typing import Any, Callable, Dict, Optional
+from .retry_policy import IDEMPOTENT_METHODS
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+class StreamReleaser(httpx.AsyncByteStream):
+    '''
+    releases the stream slot when the response is closed
+    '''
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self.stream = stream
+        self.release = release
+        self.released = False
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            if not self.released:
+                self.released = True
+                self.release()
+
+
+class Http2Transport(httpx.AsyncBaseTransport):
+    '''
+    the transport of an upstream in HTTP/2 mode (multiplexed):
+    - ALPN: if the server does not offer h2, the upstream falls back to HTTP/1.1
+      (with the HTTP/1.1 limits, the HTTP/2 ones are for a few connections)
+    - at most "max_streams" requests in flight (streams), the others wait a slot
+    - a graceful GOAWAY (NO_ERROR, e.g. the max requests per connection):
+      an idempotent request (GET/HEAD/OPTIONS) is sent again once (on a new
+      connection), the others are raised, they may be processed already
+    - after "fallback_errors" protocol errors in a row, the upstream falls back
+      to HTTP/1.1 for good (e.g. a proxy in between breaks h2)
+
+    the h2 package is a must (httpx[http2]), ImportError otherwise
+    '''
+
+    def __init__(self, limits: httpx.Limits, http1_limits: httpx.Limits,
+                 max_streams: int, fallback_errors: int):
+        self.http2 = httpx.AsyncHTTPTransport(http1=True, http2=True, limits=limits)
+        self.http1_limits = http1_limits
+        self.http1: Optional[httpx.AsyncHTTPTransport] = None
+        self.streams = asyncio.Semaphore(max_streams)
+        self.max_streams = max_streams
+        self.fallback_errors = fallback_errors
+        self.in_flight = 0
+        self.goaways = 0
+        self.protocol_errors = 0
+        self.errors_in_row = 0
+        # http version: responses
+        self.versions: Dict[str, int] = {}
+
+    @property
+    def fallback(self) -> bool:
+        return self.http1 is not None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.http1 is not None:
+            return await self.__handle(self.http1, request)
+
+        await self.streams.acquire()
+        self.in_flight += 1
+        try:
+            try:
+                response = await self.__handle(self.http2, request)
+            except httpx.RemoteProtocolError as e:
+                if not self.__graceful_goaway(e):
+                    raise
+                self.goaways += 1
+                # a write may be processed already (its stream id vs. the last_stream_id is unknown here)
+                if request.method not in IDEMPOTENT_METHODS:
+                    raise
+                response = await self.__handle(self.http2, request)
+        except httpx.RemoteProtocolError as e:
+            self.__release()
+            # a graceful GOAWAY is not a broken h2 upstream
+            if self.__graceful_goaway(e):
+                raise
+            self.protocol_errors += 1
+            self.errors_in_row += 1
+            if self.errors_in_row >= self.fallback_errors:
+                self.__fall_back(request, e.__str__())
+            raise
+        except BaseException:
+            self.__release()
+            raise
+
+        self.errors_in_row = 0
+        response.stream = StreamReleaser(response.stream, self.__release)
+        if 'HTTP/2' not in self.versions:
+            self.__fall_back(request, 'ALPN, h2 is not offered')
+        return response
+
+    async def __handle(self, transport: httpx.AsyncHTTPTransport, request: httpx.Request) -> httpx.Response:
+        response = await transport.handle_async_request(request)
+        version = response.extensions.get('http_version', b'')
+        version = version.decode('ascii') if isinstance(version, bytes) else str(version)
+        self.versions[version] = self.versions.get(version, 0) + 1
+        return response
+
+    # h2 ConnectionTerminated(error_code=NO_ERROR), raised by httpcore
+    def __graceful_goaway(self, e: httpx.RemoteProtocolError) -> bool:
+        cause = e.__cause__
+        event = cause.args[0] if cause is not None and len(cause.args) > 0 else None
+        return type(event).__name__ == 'ConnectionTerminated' and \
+            getattr(event, 'error_code', None) == 0
+
+    def __release(self):
+        self.in_flight -= 1
+        self.streams.release()
+
+    def __fall_back(self, request: httpx.Request, reason: str):
+        if self.http1 is not None:
+            return
+
+        log.warning('Http2Transport falls back to HTTP/1.1, host:%s, reason:%s', request.url.host, reason)
+        self.http1 = httpx.AsyncHTTPTransport(limits=self.http1_limits)
+
+    async def aclose(self):
+        await self.http2.aclose()
+        if self.http1 is not None:
+            await self.http1.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'fallback': self.fallback,
+            'in_flight': self.in_flight,
+            'max_streams': self.max_streams,
+            'goaways': self.goaways,
+            'protocol_errors': self.protocol_errors,
+            'versions': dict(self.versions),
+        }
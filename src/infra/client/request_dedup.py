@@ -0,0 +1,81 @@
+import re
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from urllib.parse import urlparse
+from ..utils.single_flight import SingleFlight
+from ...configs.conf import (
+    GET_DEDUP_IGNORE_HEADERS,
+    GET_DEDUP_MAX_ENDPOINTS,
+)
+
+
+OTHER = 'other'
+
+# the path segments of the ids (numbers, uuid/hex), replaced by "{id}"
+__ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F-]{16,})$')
+
+
+def endpoint_of(url: str) -> str:
+    parsed = urlparse(url)
+    path = '/'.join('{id}' if __ID_SEGMENT.match(seg) else seg
+                    for seg in parsed.path.split('/'))
+    return f'{parsed.netloc}{path}'
+
+
+class RequestDedup:
+    '''
+    coalesce the identical GETs in flight (see "SingleFlight"):
+    the key is the method, the url, the sorted params and the headers
+    (except "ignore_headers") plus the "extra" parts (e.g. the decoder),
+    the waiters share the result of the call
+
+    dedup ratio per endpoint (the url path with the ids as "{id}"):
+    shared / (calls + shared)
+    '''
+
+    def __init__(self,
+                 ignore_headers: str = GET_DEDUP_IGNORE_HEADERS,
+                 max_endpoints: int = GET_DEDUP_MAX_ENDPOINTS):
+        self.flight = SingleFlight()
+        self.ignore_headers = set(h.strip().lower() for h in ignore_headers.split(';') if h.strip())
+        self.max_endpoints = max_endpoints
+        # endpoint: [calls, shared]
+        self.endpoints: Dict[str, list] = {}
+
+    def key(self, method: str, url: str, params: Dict = None, headers: Dict = None, *extra: Hashable) -> Tuple:
+        params = tuple(sorted((k, repr(v)) for k, v in (params or {}).items()))
+        headers = tuple(sorted((k.lower(), str(v)) for k, v in (headers or {}).items()
+                               if k.lower() not in self.ignore_headers))
+        return (method, url, params, headers) + extra
+
+    async def do(self, key: Tuple, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        counter = self.__counter(endpoint_of(key[1]))
+        if self.flight.in_flight(key):
+            counter[1] += 1
+        else:
+            counter[0] += 1
+        return await self.flight.do(key, fn, *args, **kwargs)
+
+    def __counter(self, endpoint: str) -> list:
+        counter = self.endpoints.get(endpoint, None)
+        if counter is None:
+            if len(self.endpoints) >= self.max_endpoints:
+                endpoint = OTHER
+            counter = self.endpoints.setdefault(endpoint, [0, 0])
+        return counter
+
+    def stats(self) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, (calls, shared) in self.endpoints.items():
+            endpoints[endpoint] = {
+                'calls': calls,
+                'shared': shared,
+                'dedup_ratio': round(shared / (calls + shared), 4) if calls + shared else 0.0,
+            }
+
+        stats = self.flight.stats()
+        requests = stats['calls'] + stats['shared']
+        stats.update({
+            'dedup_ratio': round(stats['shared'] / requests, 4) if requests else 0.0,
+            'endpoints': endpoints,
+        })
+        return stats
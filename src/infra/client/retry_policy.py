@@ -0,0 +1,62 @@
+import random
+from ...configs.conf import (
+    RETRY_MAX_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    RETRY_BUDGET,
+    HEDGE_ENABLE,
+    HEDGE_PERCENTILE,
+    HEDGE_DEFAULT_DELAY,
+    HEDGE_MIN_DELAY,
+)
+
+
+# the upstream responses worth retrying
+RETRY_STATUSES = {502, 503, 504}
+
+# the requests safe to be sent again (or cut short) without side effects
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class RetryPolicy:
+    '''
+    opt-in policy for the idempotent requests
+    - retry: up to "max_attempts", sleeps with decorrelated jitter between attempts
+    - hedge: if no response after the p{hedge_percentile} latency of the upstream,
+        send a 2nd request and take whichever response arrives first
+    - budget: max extra requests (retries + hedged requests) per request
+    '''
+
+    def __init__(self,
+                 max_attempts: int = RETRY_MAX_ATTEMPTS,
+                 base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY,
+                 budget: int = RETRY_BUDGET,
+                 hedge: bool = HEDGE_ENABLE,
+                 hedge_percentile: float = HEDGE_PERCENTILE,
+                 hedge_default_delay: float = HEDGE_DEFAULT_DELAY,
+                 hedge_min_delay: float = HEDGE_MIN_DELAY,
+                 ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_min_delay = hedge_min_delay
+
+    # decorrelated jitter: sleep = min(cap, random(base, prev_sleep * 3))
+    def backoff(self, prev_delay: float) -> float:
+        prev_delay = max(prev_delay, self.base_delay)
+        return min(self.max_delay, random.uniform(self.base_delay, prev_delay * 3))
+
+    def hedge_delay(self, latency: float = None) -> float:
+        if latency is None:
+            return self.hedge_default_delay
+
+        return max(latency, self.hedge_min_delay)
+
+
+# for idempotent GETs
+IDEMPOTENT_GET = RetryPolicy()
@@ -1,8 +1,16 @@
+import time
+import asyncio
+import httpx
 from fastapi import status
-from typing import Dict, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, Type, TypeVar
 from ...domains.service_api import IServiceApi
 from ...configs.exceptions import *
 from ...apps.resources.handlers.http_resource import HttpResourceHandler
+from .circuit_breaker import CircuitBreakerRegistry
+from .retry_policy import RetryPolicy, RETRY_STATUSES
+from .data_envelope import decode_data
+from .request_dedup import RequestDedup
+from ...configs.conf import GET_DEDUP_ENABLE
 import logging
 
 
@@ -12,21 +20,209 @@ log = logging.getLogger(__name__)
 
 SUCCESS_CODE = "0"
 
+T = TypeVar('T')
+
 
 class ServiceApiAdapter(IServiceApi):
     def __init__(self, connect: HttpResourceHandler):
         self.connect = connect
+        self.breakers = CircuitBreakerRegistry()
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.dedup = RequestDedup() if GET_DEDUP_ENABLE else None
+
+
+    """
+    all upstream requests go through here:
+    - wait a slot of the bulkhead of the upstream (rejected if it's saturated)
+    - fail fast while the circuit breaker of the domain is open
+    - the timeout of the idempotent requests adapts to the recent latency of the domain,
+      the writes keep HTTP_TIMEOUT
+    - transport errors and 5xx responses are recorded as failures,
+      a timeout is recorded at the timeout value
+    """
+    async def __send(self, method: str, url: str, **kwargs) -> HttpResourceHandler.Response:
+        bulkhead = self.connect.bulkhead(url)
+        if bulkhead is None:
+            return await self.__send_to(method, url, **kwargs)
+
+        async with bulkhead:
+            return await self.__send_to(method, url, **kwargs)
+
+    async def __send_to(self, method: str, url: str, **kwargs) -> HttpResourceHandler.Response:
+        breaker = self.breakers.get(self.connect.parse_domain(url))
+        breaker.before_call()
+        timeout = breaker.timeout(method)
+        start = time.monotonic()
+        try:
+            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
+            response = await client.request(method, url, timeout=timeout, **kwargs)
+
+        except httpx.TimeoutException:
+            breaker.on_failure(time.monotonic() - start, timeout=timeout)
+            raise
+
+        except Exception:
+            breaker.on_failure(time.monotonic() - start)
+            raise
+
+        except BaseException:
+            breaker.on_cancel()
+            raise
+
+        latency = time.monotonic() - start
+        if response.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            breaker.on_failure(latency)
+        else:
+            breaker.on_success(latency)
+
+        return response
+
+    """
+    retry/hedge the request by the policy (for idempotent requests only),
+    the fast-fail of the circuit breaker is never retried
+    """
+    async def __send_by_policy(self, policy: Optional[RetryPolicy], method: str, url: str, **kwargs) -> HttpResourceHandler.Response:
+        if policy is None:
+            return await self.__send(method, url, **kwargs)
+
+        budget = policy.budget
+        attempts = 0
+        delay = policy.base_delay
+        while True:
+            attempts += 1
+            try:
+                if policy.hedge and budget > 0:
+                    response, hedged = await self.__hedged_send(policy, method, url, **kwargs)
+                    budget -= hedged
+                else:
+                    response = await self.__send(method, url, **kwargs)
+
+                if not response.status_code in RETRY_STATUSES or \
+                        budget <= 0 or attempts >= policy.max_attempts:
+                    return response
+
+            except ServiceUnavailableException:
+                raise
+
+            except Exception as e:
+                if budget <= 0 or attempts >= policy.max_attempts:
+                    raise
+                log.warning(f"retry request, [%s]: %s, attempts:%s, err:%s",
+                            method, url, attempts, e.__str__())
+
+            budget -= 1
+            self.retries += 1
+            delay = policy.backoff(delay)
+            await asyncio.sleep(delay)
+
+    """
+    return response, the number of hedged requests (0 or 1)
+    """
+    async def __hedged_send(self, policy: RetryPolicy, method: str, url: str, **kwargs) -> Tuple[HttpResourceHandler.Response, int]:
+        breaker = self.breakers.get(self.connect.parse_domain(url))
+        hedge_delay = policy.hedge_delay(breaker.latency.percentile(policy.hedge_percentile))
+
+        primary = asyncio.create_task(self.__send(method, url, **kwargs))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if primary in done:
+                return primary.result(), 0
+
+            self.hedges += 1
+            hedge = asyncio.create_task(self.__send(method, url, **kwargs))
+            pending.add(hedge)
+            task = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and \
+                            task.result().status_code < status.HTTP_500_INTERNAL_SERVER_ERROR:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result(), 1
+
+            # both failed, return/raise the last one
+            return task.result(), 1
+
+        finally:
+            for task in pending:
+                task.cancel()
+
+    """
+    the identical GETs in flight share one call and its result (if dedup enabled),
+    "decoder" (e.g. the model) is part of the key, so the body is decoded once per flight:
+    the shared result is read-only for the callers.
+    a cancelled waiter does not cancel the shared call
+    """
+    async def __dedup_get(self, decoder: Hashable, fn: Callable[..., Awaitable[Any]],
+                          policy: Optional[RetryPolicy], url: str, params: Dict = None, headers: Dict = None, *args) -> Any:
+        if self.dedup is None:
+            return await fn(policy, url, params, headers, *args)
+
+        key = self.dedup.key('GET', url, params, headers, policy, decoder)
+        return await self.dedup.do(key, fn, policy, url, params, headers, *args)
+
+    # the response is shared, each caller decodes it (see "get", "get_with_statuscode")
+    async def __get(self, policy: Optional[RetryPolicy], url: str, params: Dict = None, headers: Dict = None) -> HttpResourceHandler.Response:
+        return await self.__dedup_get('response', self.__get_response, policy, url, params, headers)
+
+    async def __get_response(self, policy: Optional[RetryPolicy], url: str, params: Dict = None, headers: Dict = None) -> HttpResourceHandler.Response:
+        return await self.__send_by_policy(policy, 'GET', url, params=params, headers=headers)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'circuit_breakers': self.breakers.snapshot(),
+            'bulkheads': self.connect.bulkhead_stats(),
+            'retries': self.retries,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'dedup': self.dedup.stats() if self.dedup is not None else None,
+        }
 
 
     """
     return result
     """
-    async def simple_get(self, url: str, params: Dict = None, headers: Dict = None) -> Optional[Dict[str, str]]:
-        result = None
+    async def simple_get(self, url: str, params: Dict = None, headers: Dict = None, policy: RetryPolicy = None) -> Optional[Dict[str, str]]:
+        return await self.__dedup_get('data', self.__get_data, policy, url, params, headers)
+
+    async def __get_data(self, policy: Optional[RetryPolicy], url: str, params: Dict = None, headers: Dict = None) -> Optional[Dict[str, str]]:
+        response = await self.__simple_get(url, params, headers, policy)
+        result = response.json()
+        result = result["data"]
+
+        return result
+
+    """
+    return the body bytes (the "data" is not decoded), see "decode_data"
+    """
+    async def get_bytes(self, url: str, params: Dict = None, headers: Dict = None, policy: RetryPolicy = None) -> bytes:
+        return await self.__dedup_get(bytes, self.__get_bytes, policy, url, params, headers)
+
+    async def __get_bytes(self, policy: Optional[RetryPolicy], url: str, params: Dict = None, headers: Dict = None) -> bytes:
+        response = await self.__simple_get(url, params, headers, policy)
+        return response.content
+
+    """
+    return the "data" decoded into "model", the body is parsed once
+    """
+    async def get_as(self, url: str, model: Type[T], params: Dict = None, headers: Dict = None, policy: RetryPolicy = None) -> T:
+        return await self.__dedup_get(model, self.__get_as, policy, url, params, headers, model)
+
+    async def __get_as(self, policy: Optional[RetryPolicy], url: str, params: Dict, headers: Dict, model: Type[T]) -> T:
+        response = await self.__simple_get(url, params, headers, policy)
+        return decode_data(response.content, model)
+
+    async def __simple_get(self, url: str, params: Dict = None, headers: Dict = None, policy: RetryPolicy = None) -> HttpResourceHandler.Response:
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs) 
-            response = await client.get(url, params=params, headers=headers)
+            response = await self.__send_by_policy(policy, 'GET', url, params=params, headers=headers)
+
+        except ServiceUnavailableException:
+            raise
 
         except Exception as e:
             log.error(f"simple_get request error, url:%s, params:%s, headers:%s, resp:%s, err:%s",
@@ -42,10 +238,7 @@ class ServiceApiAdapter(IServiceApi):
             headers=headers,
         )
 
-        result = response.json()
-        result = result["data"]
-
-        return result
+        return response
 
     """
     return result, msg, err
@@ -56,8 +249,7 @@ class ServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
-            response = await client.get(url, params=params, headers=headers)
+            response = await self.__get(None, url, params=params, headers=headers)
             result = response.json()
             log.info(f"url:{url}, resp-data:{result}")
             if self.__err(result):
@@ -83,8 +275,7 @@ class ServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
-            response = await client.get(url, params=params, headers=headers)
+            response = await self.__get(None, url, params=params, headers=headers)
             result = response.json()
             status_code = response.status_code
             log.info(f"url:{url}, resp-data:{result}")
@@ -105,8 +296,10 @@ class ServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
-            response = await client.post(url, json=json, headers=headers)
+            response = await self.__send('POST', url, json=json, headers=headers)
+
+        except ServiceUnavailableException:
+            raise
 
         except Exception as e:
             log.error(f"simple_post request error, url:%s, json:%s, headers:%s, resp:%s, err:%s",
@@ -131,8 +324,10 @@ class ServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
-            response = await client.post(url, data=byte_data, headers=headers)
+            response = await self.__send('POST', url, data=byte_data, headers=headers)
+
+        except ServiceUnavailableException:
+            raise
 
         except Exception as e:
             log.error(f"simple_post request error, url:%s, data:%s, headers:%s, resp:%s, err:%s",
@@ -162,8 +357,7 @@ class ServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
-            response = await client.post(url, json=json, headers=headers)
+            response = await self.__send('POST', url, json=json, headers=headers)
             result = response.json()
             log.info(f"url:{url}, resp-data:{result}")
             if self.__err(result):
@@ -189,8 +383,7 @@ class ServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
-            response = await client.post(url, json=json, headers=headers)
+            response = await self.__send('POST', url, json=json, headers=headers)
             result = response.json()
             status_code = response.status_code
             log.info(f"url:{url}, resp-data:{result}")
@@ -211,8 +404,10 @@ class ServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
-            response = await client.put(url, json=json, headers=headers)
+            response = await self.__send('PUT', url, json=json, headers=headers)
+
+        except ServiceUnavailableException:
+            raise
 
         except Exception as e:
             log.error(f"simple_put request error, url:%s, json:%s, headers:%s, resp:%s, err:%s",
@@ -242,8 +437,7 @@ class ServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
-            response = await client.put(url, json=json, headers=headers)
+            response = await self.__send('PUT', url, json=json, headers=headers)
             result = response.json()
             log.info(f"url:{url}, resp-data:{result}")
             if self.__err(result):
@@ -269,8 +463,7 @@ class ServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
-            response = await client.put(url, json=json, headers=headers)
+            response = await self.__send('PUT', url, json=json, headers=headers)
             result = response.json()
             status_code = response.status_code
             log.info(f"url:{url}, resp-data:{result}")
@@ -291,8 +484,10 @@ class ServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
-            response = await client.delete(url, params=params, headers=headers)
+            response = await self.__send('DELETE', url, params=params, headers=headers)
+
+        except ServiceUnavailableException:
+            raise
 
         except Exception as e:
             log.error(f"simple_delete request error, url:%s, params:%s, headers:%s, resp:%s, err:%s",
@@ -322,9 +517,7 @@ class ServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
-            response = await client.delete(
-                url, params=params, headers=headers)
+            response = await self.__send('DELETE', url, params=params, headers=headers)
             result = response.json()
             log.info(f"url:{url}, resp-data:{result}")
             if self.__err(result):
@@ -350,9 +543,7 @@ class ServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            client = await self.connect.access(url=url) # self.connect.access(**kwargs)
-            response = await client.delete(
-                url, params=params, headers=headers)
+            response = await self.__send('DELETE', url, params=params, headers=headers)
             result = response.json()
             status_code = response.status_code
             log.info(f"url:{url}, resp-data:{result}")
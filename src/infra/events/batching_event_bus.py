@@ -0,0 +1,90 @@
+import json
+import asyncio
+from typing import Any, Dict, List, Optional
+from ...domains.event_bus import IEventBus, EventHandler
+from ...configs.conf import EVENT_BUS_BATCH_WINDOW_SECS, EVENT_BUS_MAX_BATCH
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+class BatchingEventBus(IEventBus):
+    '''
+    batching & coalescing in front of an IEventBus:
+    the events published within "window_secs" are sent as one batch per channel,
+    the same event published more than once in the window is sent once.
+    a batch is sent right away when it reaches "max_batch" events.
+
+    with "window_secs" = 0 the events are sent on publish (only the duplicates
+    of the same publish are coalesced), the default on lambda: the delayed flush
+    is a background task, frozen with the instance after the response is returned
+    '''
+
+    def __init__(self, bus: IEventBus,
+                 window_secs: float = EVENT_BUS_BATCH_WINDOW_SECS,
+                 max_batch: int = EVENT_BUS_MAX_BATCH):
+        self.bus = bus
+        self.window_secs = window_secs
+        self.max_batch = max_batch
+        # channel: {event identity: event}, in publish order
+        self.__pending: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.__flushing: Dict[str, asyncio.Task] = {}
+        self.events = 0
+        self.coalesced = 0
+        self.batches = 0
+
+    async def publish(self, channel: str, events: List[Dict[str, Any]]):
+        pending = self.__pending.setdefault(channel, {})
+        for event in events:
+            self.events += 1
+            identity = json.dumps(event, sort_keys=True, default=str)
+            if identity in pending:
+                self.coalesced += 1
+                continue
+            pending[identity] = event
+
+        if len(pending) >= self.max_batch or self.window_secs <= 0:
+            await self.__flush(channel)
+        elif len(pending) > 0 and channel not in self.__flushing:
+            self.__flushing[channel] = asyncio.create_task(self.__flush_later(channel))
+
+    def subscribe(self, channel: str, handler: EventHandler):
+        self.bus.subscribe(channel, handler)
+
+    async def start(self):
+        await self.bus.start()
+
+    async def close(self):
+        for task in list(self.__flushing.values()):
+            task.cancel()
+        self.__flushing.clear()
+        for channel in list(self.__pending.keys()):
+            await self.__flush(channel)
+        await self.bus.close()
+
+    async def __flush_later(self, channel: str):
+        await asyncio.sleep(self.window_secs)
+        self.__flushing.pop(channel, None)
+        await self.__flush(channel)
+
+    async def __flush(self, channel: str):
+        pending = self.__pending.pop(channel, None)
+        if not pending:
+            return
+
+        self.batches += 1
+        try:
+            await self.bus.publish(channel, list(pending.values()))
+        except Exception as e:
+            log.error('BatchingEventBus flush fail, channel:%s, events:%s, err:%s',
+                      channel, len(pending), e.__str__())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'events': self.events,
+            'coalesced': self.coalesced,
+            'batches': self.batches,
+            'pending': sum(len(p) for p in self.__pending.values()),
+        }
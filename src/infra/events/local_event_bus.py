@@ -0,0 +1,38 @@
+from typing import Any, Dict, List
+from ...domains.event_bus import IEventBus, EventHandler
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+class LocalEventBus(IEventBus):
+    '''
+    in-process: the events are delivered to the handlers of this instance only
+    '''
+
+    def __init__(self):
+        self.handlers: Dict[str, List[EventHandler]] = {}
+        self.published = 0
+
+    async def publish(self, channel: str, events: List[Dict[str, Any]]):
+        if len(events) == 0:
+            return
+
+        self.published += 1
+        for handler in self.handlers.get(channel, []):
+            try:
+                await handler(events)
+            except Exception as e:
+                log.error('LocalEventBus handler fail, channel:%s, events:%s, err:%s',
+                          channel, events, e.__str__())
+
+    def subscribe(self, channel: str, handler: EventHandler):
+        self.handlers.setdefault(channel, []).append(handler)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
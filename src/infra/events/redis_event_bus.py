@@ -0,0 +1,133 @@
+import json
+import uuid
+import asyncio
+from typing import Any, Dict, List, Optional
+from redis.asyncio.client import PubSub
+from ...domains.event_bus import IEventBus, EventHandler
+from ...apps.resources.handlers.cache_resource import RedisCacheResourceHandler
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+RECONNECT_SECS = 1.0
+# the listener polls the pub/sub connection, below the socket timeout
+# of the pool (REDIS_SOCKET_TIMEOUT): an idle channel is not an error
+LISTEN_POLL_SECS = 1.0
+
+
+class RedisEventBus(IEventBus):
+    '''
+    Redis pub/sub, the events are delivered to the handlers of all instances:
+    - the handlers of this instance are called on publish (no round trip),
+      the message of this instance ("origin") is skipped by its listener
+    - the listener re-subscribes after the connection is lost;
+      the messages published meanwhile are lost (pub/sub is at-most-once),
+      which is bounded by the TTL of the local caches
+
+    on lambda, the listener (a background task) is frozen between the invocations:
+    the messages of the other instances are handled on the next invocation at best,
+    or lost if the connection is dropped meanwhile. The local caches are then
+    only bounded by their TTL (LOCAL_CACHE_TTL/LOCAL_CACHE_POLICIES).
+    '''
+
+    def __init__(self, async_redis_resource: RedisCacheResourceHandler):
+        self.aio_redis = async_redis_resource
+        self.origin = uuid.uuid4().hex
+        self.handlers: Dict[str, List[EventHandler]] = {}
+        self.__pubsub: Optional[PubSub] = None
+        self.__listener: Optional[asyncio.Task] = None
+        self.published = 0
+        self.received = 0
+
+    async def publish(self, channel: str, events: List[Dict[str, Any]]):
+        if len(events) == 0:
+            return
+
+        await self.__dispatch(channel, events)
+        try:
+            redis = await self.aio_redis.access()
+            await redis.publish(channel, json.dumps({
+                'origin': self.origin,
+                'events': events,
+            }))
+            self.published += 1
+
+        except Exception as e:
+            log.error('RedisEventBus.publish fail, channel:%s, events:%s, err:%s',
+                      channel, events, e.__str__())
+
+    def subscribe(self, channel: str, handler: EventHandler):
+        self.handlers.setdefault(channel, []).append(handler)
+
+    async def start(self):
+        if self.__listener is None and len(self.handlers) > 0:
+            self.__listener = asyncio.create_task(self.__listen())
+
+    async def close(self):
+        if self.__listener is not None:
+            self.__listener.cancel()
+            self.__listener = None
+        await self.__unsubscribe()
+
+    async def __subscribe(self) -> PubSub:
+        redis = await self.aio_redis.access()
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(*self.handlers.keys())
+        self.__pubsub = pubsub
+        return pubsub
+
+    async def __unsubscribe(self):
+        pubsub, self.__pubsub = self.__pubsub, None
+        if pubsub is None:
+            return
+
+        try:
+            await pubsub.aclose()
+        except Exception as e:
+            log.error('RedisEventBus.__unsubscribe fail, err:%s', e.__str__())
+
+    async def __listen(self):
+        while True:
+            try:
+                pubsub = await self.__subscribe()
+                log.info('RedisEventBus subscribed, channels:%s', list(self.handlers.keys()))
+                while True:
+                    # None if no message within the poll interval
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=LISTEN_POLL_SECS)
+                    await self.__on_message(message)
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                log.error('RedisEventBus listener fail, reconnect in %ss, err:%s',
+                          RECONNECT_SECS, e.__str__())
+                await self.__unsubscribe()
+                await asyncio.sleep(RECONNECT_SECS)
+
+    async def __on_message(self, message: Dict[str, Any]):
+        if message is None or message.get('type', None) != 'message':
+            return
+
+        try:
+            body = json.loads(message['data'])
+        except Exception as e:
+            log.error('RedisEventBus invalid message:%s, err:%s', message, e.__str__())
+            return
+
+        if body.get('origin', None) == self.origin:
+            return
+
+        self.received += 1
+        await self.__dispatch(message['channel'], body.get('events', []))
+
+    async def __dispatch(self, channel: str, events: List[Dict[str, Any]]):
+        for handler in self.handlers.get(channel, []):
+            try:
+                await handler(events)
+            except Exception as e:
+                log.error('RedisEventBus handler fail, channel:%s, events:%s, err:%s',
+                          channel, events, e.__str__())
@@ -0,0 +1,40 @@
+import math
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class LatencyTracker:
+    '''
+    latency samples (secs) of the last "window_size" calls,
+    the sorted samples are cached until a new sample is added
+    '''
+
+    def __init__(self, window_size: int = 200):
+        self.__samples: Deque[float] = deque(maxlen=window_size)
+        self.__sorted: Optional[list] = None
+
+    def __len__(self) -> int:
+        return len(self.__samples)
+
+    def add(self, latency: float):
+        self.__samples.append(latency)
+        self.__sorted = None
+
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self.__samples) == 0:
+            return None
+
+        if self.__sorted is None:
+            self.__sorted = sorted(self.__samples)
+
+        # nearest-rank
+        rank = max(1, math.ceil(p / 100.0 * len(self.__sorted)))
+        return self.__sorted[rank - 1]
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        return {
+            'samples': len(self.__samples),
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
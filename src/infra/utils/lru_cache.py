@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    '''
+    in-process LRU cache with per-key TTL
+    - the least recently used key is evicted when "max_size" is exceeded
+    - expired keys are treated as missed and removed on access
+    '''
+
+    def __init__(self, max_size: int, ttl: float = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        # key: (expire_at, value); expire_at=None means no expiry
+        self.__data: OrderedDict[Hashable, Tuple[Optional[float], Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.__lookup(key) is not None
+
+    def __lookup(self, key: Hashable) -> Optional[Tuple[Optional[float], Any]]:
+        entry = self.__data.get(key, None)
+        if entry is None:
+            return None
+
+        expire_at = entry[0]
+        if expire_at is not None and expire_at <= time.monotonic():
+            del self.__data[key]
+            return None
+
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.__lookup(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        self.__data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, val: Any, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        expire_at = None if not ttl else time.monotonic() + ttl
+        self.__data[key] = (expire_at, val)
+        self.__data.move_to_end(key)
+        while len(self.__data) > self.max_size:
+            self.__data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        return self.__data.pop(key, None) is not None
+
+    def clear(self):
+        self.__data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'size': len(self.__data),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+        }
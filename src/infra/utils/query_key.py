@@ -0,0 +1,49 @@
+import json
+import hashlib
+from typing import Any, Dict, Iterable
+
+
+# free-text params, case-insensitive
+LOWER_CASE_PARAMS = ('patterns',)
+# ISO codes
+UPPER_CASE_PARAMS = ('continent_code', 'country_code')
+
+
+'''
+the canonical form of the search query params (e.g. "fine_dict()"):
+the lists are de-duplicated and sorted, the blanks are removed,
+"patterns" are lower-cased and the region codes upper-cased.
+the cursor ("search_after") is opaque, kept as is.
+'''
+def canonical_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    canonical: Dict[str, Any] = {}
+    for name, value in params.items():
+        if isinstance(value, (list, tuple, set)):
+            value = sorted({__normalize(name, v) for v in value if __present(v)})
+        elif isinstance(value, str):
+            value = __normalize(name, value)
+        canonical[name] = value
+    return canonical
+
+
+def __present(value: Any) -> bool:
+    return value is not None and (not isinstance(value, str) or value.strip() != '')
+
+
+def __normalize(name: str, value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+
+    value = value.strip()
+    if name in LOWER_CASE_PARAMS:
+        return value.lower()
+    if name in UPPER_CASE_PARAMS:
+        return value.upper()
+    return value
+
+
+# the hash of the canonical query, "exclude": e.g. the cursor
+def query_key(url: str, params: Dict[str, Any], exclude: Iterable[str] = ()) -> str:
+    canonical = {k: v for k, v in canonical_params(params).items() if k not in exclude}
+    raw = json.dumps([url, canonical], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
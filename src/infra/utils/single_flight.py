@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    '''
+    coalesce concurrent calls by key:
+    the 1st caller starts the call, the others await the same in-flight task
+    - the result (or the exception) is shared by all waiters
+    - a cancelled waiter does not cancel the shared call
+    - the key is released as soon as the call finished, nothing is memoized
+    '''
+
+    def __init__(self):
+        self.__calls: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self.__calls
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        task = self.__calls.get(key, None)
+        if task is None:
+            self.calls += 1
+            task = asyncio.create_task(fn(*args, **kwargs))
+            self.__calls[key] = task
+            task.add_done_callback(lambda t: self.__release(key, t))
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
+
+    def __release(self, key: Hashable, task: asyncio.Task):
+        if self.__calls.get(key, None) is task:
+            del self.__calls[key]
+
+        # avoid "Task exception was never retrieved" when all waiters are cancelled
+        if not task.cancelled() and task.exception() is not None:
+            log.debug('single flight call failed, key:%s, err:%s', key, task.exception())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'in_flight': len(self.__calls),
+            'calls': self.calls,
+            'shared': self.shared,
+        }
+
+
+# shared by the read-through paths of all services
+single_flight = SingleFlight()
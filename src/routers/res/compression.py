@@ -0,0 +1,280 @@
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ...configs.conf import (
+    COMPRESSION_ENABLE,
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_ON_LAMBDA,
+)
+import logging
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+GZIP = 'gzip'
+BR = 'br'
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'text/',
+)
+
+# the attribute set on the endpoints by "uncompressed"
+UNCOMPRESSED = '__uncompressed__'
+
+
+# per-route opt-out, put it under the route decorator
+def uncompressed(endpoint: Callable) -> Callable:
+    setattr(endpoint, UNCOMPRESSED, True)
+    return endpoint
+
+
+class CompressionMetrics:
+    '''
+    per encoding: the responses, the bytes in/out (ratio = out / in)
+    and the CPU time (thread time) of the compression;
+    and the responses skipped by reason, for tuning the min size
+    '''
+
+    def __init__(self):
+        self.encodings: Dict[str, Dict[str, Any]] = {}
+        self.skipped: Dict[str, int] = {}
+
+    def skip(self, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, cpu_secs: float):
+        metrics = self.encodings.setdefault(encoding, {
+            'responses': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+            'cpu_secs': 0.0,
+        })
+        metrics['responses'] += 1
+        metrics['bytes_in'] += bytes_in
+        metrics['bytes_out'] += bytes_out
+        metrics['cpu_secs'] += cpu_secs
+
+    def stats(self) -> Dict[str, Any]:
+        encodings = {}
+        for encoding, metrics in self.encodings.items():
+            stats = dict(metrics)
+            stats.update({
+                'ratio': metrics['bytes_out'] / metrics['bytes_in'] if metrics['bytes_in'] else 0.0,
+                'cpu_ms_per_response': metrics['cpu_secs'] * 1000 / metrics['responses'] if metrics['responses'] else 0.0,
+            })
+            encodings[encoding] = stats
+
+        return {
+            'encodings': encodings,
+            'skipped': dict(self.skipped),
+        }
+
+
+compression_metrics = CompressionMetrics()
+
+
+class Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == BR:
+            self.compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits=31: gzip container
+            self.compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    # flush: emit the compressed bytes so far (streaming)
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        if self.encoding == BR:
+            out = self.compressor.process(data)
+            return out + self.compressor.flush() if flush else out
+
+        out = self.compressor.compress(data)
+        return out + self.compressor.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self.encoding == BR:
+            return self.compressor.finish()
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+'''
+Accept-Encoding: "br" (if brotli is installed) > "gzip", by the q-values;
+"*" matches both, q=0 refuses
+'''
+def negotiate(accept_encoding: str) -> Optional[str]:
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+
+        q = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+
+    supported: List[str] = [BR, GZIP] if brotli is not None else [GZIP]
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = qualities.get(coding, qualities.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    '''
+    compresses the responses by the content negotiation (Accept-Encoding):
+    - skipped: below "min_size", not compressible (e.g. images),
+      already encoded, "Cache-Control: no-transform",
+      or the endpoint is "uncompressed"
+    - a single-message body is compressed at once; a streaming body
+      (more_body) is compressed incrementally, each chunk is flushed
+    - the ETag is weakened (W/), the compressed body is another representation
+
+    skipped on lambda (Mangum) by default: the body would be returned base64
+    encoded (binary), API Gateway decodes it only with the binary media types
+    "*/*" (not declared in serverless.yml), see COMPRESSION_ON_LAMBDA
+    '''
+
+    def __init__(self, app: ASGIApp,
+                 min_size: int = COMPRESSION_MIN_SIZE,
+                 metrics: CompressionMetrics = compression_metrics):
+        self.app = app
+        self.min_size = min_size
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or not COMPRESSION_ENABLE:
+            await self.app(scope, receive, send)
+            return
+
+        if 'aws.event' in scope and not COMPRESSION_ON_LAMBDA:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(self, scope, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, send: Send, encoding: str):
+        self.middleware = middleware
+        self.metrics = middleware.metrics
+        self.scope = scope
+        self._send = send
+        self.encoding = encoding
+        self.start: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+        # None: not decided yet (waiting for the 1st body)
+        self.compress: Optional[bool] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_secs = 0.0
+
+    async def send(self, message: Message):
+        if message['type'] == 'http.response.start':
+            self.start = message
+            if self.__skip_reason(Headers(raw=message['headers'])) is not None:
+                self.compress = False
+                await self._send(message)
+            return
+
+        if message['type'] != 'http.response.body' or self.compress is False:
+            await self._send(message)
+            return
+
+        body: bytes = message.get('body', b'')
+        more_body: bool = message.get('more_body', False)
+        if self.compress is None:
+            # the 1st body, a small single-message body is not compressed
+            if not more_body and len(body) < self.middleware.min_size:
+                self.metrics.skip('min_size')
+                self.compress = False
+                await self._send(self.start)
+                await self._send(message)
+                return
+
+            self.compress = True
+            self.compressor = Compressor(self.encoding)
+            body = self.__compress(body, more_body)
+            await self._send(self.__compressed_start(None if more_body else len(body)))
+        else:
+            body = self.__compress(body, more_body)
+
+        await self._send({
+            'type': 'http.response.body',
+            'body': body,
+            'more_body': more_body,
+        })
+        if not more_body:
+            self.metrics.record(self.encoding, self.bytes_in, self.bytes_out, self.cpu_secs)
+
+    def __skip_reason(self, headers: Headers) -> Optional[str]:
+        reason = None
+        endpoint = self.scope.get('endpoint', None)
+        if endpoint is not None and getattr(endpoint, UNCOMPRESSED, False):
+            reason = 'route'
+        elif 'content-encoding' in headers or 'content-range' in headers:
+            reason = 'encoded'
+        elif 'no-transform' in headers.get('cache-control', '').lower():
+            reason = 'no_transform'
+        elif not headers.get('content-type', '').lower().startswith(COMPRESSIBLE_TYPES):
+            reason = 'content_type'
+        elif 'content-length' in headers and int(headers['content-length']) < self.middleware.min_size:
+            reason = 'min_size'
+
+        if reason is not None:
+            self.metrics.skip(reason)
+        return reason
+
+    # content_length: None for a streaming body
+    def __compressed_start(self, content_length: Optional[int]) -> Message:
+        headers = MutableHeaders(raw=list(self.start['headers']))
+        headers['Content-Encoding'] = self.encoding
+        headers.add_vary_header('Accept-Encoding')
+        if content_length is None:
+            del headers['Content-Length']
+        else:
+            headers['Content-Length'] = str(content_length)
+        etag = headers.get('etag', None)
+        if etag is not None and not etag.startswith('W/'):
+            headers['ETag'] = f'W/{etag}'
+        self.start['headers'] = headers.raw
+        return self.start
+
+    def __compress(self, body: bytes, more_body: bool) -> bytes:
+        started = time.thread_time()
+        if more_body:
+            out = self.compressor.compress(body, flush=True)
+        else:
+            out = self.compressor.compress(body) + self.compressor.finish()
+        self.cpu_secs += time.thread_time() - started
+        self.bytes_in += len(body)
+        self.bytes_out += len(out)
+        return out
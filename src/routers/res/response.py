@@ -1,8 +1,9 @@
+import hashlib
 from typing import Optional, Any, Dict
 from pydantic import create_model, BaseModel
-from fastapi import status
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from fastapi import status, Request
+from fastapi.responses import JSONResponse, Response
+from .serializer import envelope
 
 # ref: https://github.com/tiangolo/fastapi/issues/3737
 def idempotent_response(route: str, model: Any) -> Dict:
@@ -24,23 +25,62 @@ def post_response(route: str, model: Any) -> Dict:
 
 
 def post_success(data=None, msg="ok", code="0"):
-    return JSONResponse(
+    return Response(
         status_code=status.HTTP_201_CREATED,
-        content=jsonable_encoder({
-            "code": code,
-            "msg": msg,
-            "data": data,
-    }))
+        content=envelope(data, msg, code),
+        media_type=JSONResponse.media_type,
+    )
 
 
-def res_success(data=None, msg="ok", code="0"):
-    return JSONResponse(
+'''
+response validation (GET):
+    pass "request" to answer "If-None-Match" with 304 Not Modified;
+    the (strong) ETag is the hash of the serialized body, or of "version"
+    (a version of the cached entity) which is known before serialization,
+    so a 304 skips the serialization entirely
+'''
+def res_success(data=None, msg="ok", code="0", request: Request = None, version: str = None):
+    etag = None
+    if request is not None and version is not None:
+        etag = __etag(f'{version}:{code}:{msg}'.encode('utf-8'))
+        if __not_modified(request, etag):
+            return __not_modified_response(etag)
+
+    response = Response(
         status_code=status.HTTP_200_OK,
-        content=jsonable_encoder({
-            "code": code,
-            "msg": msg,
-            "data": data,
-    }))
+        content=envelope(data, msg, code),
+        media_type=JSONResponse.media_type,
+    )
+    if request is None:
+        return response
+
+    etag = etag or __etag(response.body)
+    if __not_modified(request, etag):
+        return __not_modified_response(etag)
+
+    response.headers['ETag'] = etag
+    return response
+
+
+def __etag(content: bytes) -> str:
+    return '"' + hashlib.blake2b(content, digest_size=16).hexdigest() + '"'
+
+
+# weak comparison (RFC 9110: If-None-Match)
+def __not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get('if-none-match', None)
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == '*':
+        return True
+
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return etag in [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+
+
+def __not_modified_response(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
 
 
 def res_err(data=None, msg="error", code="1"):
@@ -0,0 +1,56 @@
+import json
+from typing import Any
+from pydantic import BaseModel
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+'''
+serializes the response envelope {"code", "msg", "data"} to bytes,
+the same bytes as JSONResponse(content=jsonable_encoder(...)):
+- a pydantic model is dumped by pydantic-core (model_dump_json)
+- primitive data (e.g. a model_dump()'d dict) is dumped as is by orjson
+  (or the stdlib json), without the recursive walk of jsonable_encoder;
+  jsonable_encoder is only the fallback of the non-primitive values.
+
+NOTE: floats in exponent form (>= 1e16 or < 1e-4) are written
+without "+" and the zero padding, e.g. 1e16 instead of 1e+16
+'''
+
+
+def __default(obj: Any) -> Any:
+    return jsonable_encoder(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump_json().encode('utf-8')
+
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=__default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. int over 64 bits, fallback
+            pass
+
+    return json.dumps(
+        obj,
+        default=__default,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+
+def envelope(data: Any = None, msg: str = 'ok', code: str = '0') -> bytes:
+    return b''.join([
+        b'{"code":', dumps(code),
+        b',"msg":', dumps(msg),
+        b',"data":', dumps(data),
+        b'}',
+    ])
@@ -18,6 +18,7 @@ from ...domains.match.teacher.services.teacher_service import TeacherProfileServ
 from ...domains.payment.services.payment_service import PaymentService
 from ...domains.notify.value_objects import email_value_objects as email_vo
 from ...apps.resources.adapters import service_client, gw_cache
+from ...apps.events.pub.event_bus import event_bus
 from ...configs.conf import \
     MY_STATUS_OF_COMPANY_APPLY, STATUS_OF_COMPANY_APPLY, MY_STATUS_OF_COMPANY_REACTION, STATUS_OF_COMPANY_REACTION
 from ...configs.constants import Apply
@@ -56,9 +57,10 @@ COMPANY = 'company'
 _payment_service = PaymentService(
     service_client, 
     gw_cache,
+    event_bus,
 )
-_company_profile_service = CompanyProfileService(service_client)
-_company_job_service = CompanyJobService(service_client)
+_company_profile_service = CompanyProfileService(service_client, gw_cache, event_bus)
+_company_job_service = CompanyJobService(service_client, gw_cache, event_bus)
 _follow_resume_service = FollowResumeService(
     service_client,
     gw_cache,
@@ -96,10 +98,10 @@ async def create_profile(company_id: int,
 
 @router.get("/{company_id}", 
             responses=idempotent_response(f'{COMPANY}.get_profile', vo.CompanyProfileVO))
-async def get_profile(company_id: int, match_host=Depends(get_match_host)):
+async def get_profile(request: Request, company_id: int, match_host=Depends(get_match_host)):
     data = await _company_profile_service.get_profile(
         host=match_host, company_id=company_id)
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.put("/{company_id}", 
@@ -136,25 +138,25 @@ async def create_job(company_id: int,
 # 然後才是有變數的 ("/{company_id}/jobs/{job_id}")
 @router.get("/{company_id}/brief-jobs",
             responses=idempotent_response(f'{COMPANY}.get_brief_jobs', vo.JobListVO))
-async def get_brief_jobs(company_id: int,
+async def get_brief_jobs(request: Request, company_id: int,
                    size: int = Query(10),
                    job_id: int = Query(0),
                    match_host=Depends(get_match_host),
                    ):
     data = await _company_job_service.get_brief_jobs(
         host=match_host, company_id=company_id, size=size, job_id=job_id)
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.get("/{company_id}/jobs/{job_id}",
             responses=idempotent_response(f'{COMPANY}.get_job', vo.CompanyProfileAndJobVO))
-async def get_job(company_id: int,
+async def get_job(request: Request, company_id: int,
             job_id: int,
             match_host=Depends(get_match_host),
             ):
     data = await _company_job_service.get_job(
         host=match_host, company_id=company_id, job_id=job_id)
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 # TODO: 未來如果允許使用多個 resumes, 須考慮 idempotent
@@ -224,7 +226,7 @@ async def upsert_follow_resume(company_id: int,
 
 @router.get("/{company_id}/resume-follows",
             responses=idempotent_response(f'{COMPANY}.get_followed_resume_list', vo.FollowResumeListVO))
-async def get_followed_resume_list(company_id: int,
+async def get_followed_resume_list(request: Request, company_id: int,
                              size: int = Query(10),
                              next_ts: int = Query(0),
                              match_host=Depends(get_match_host),
@@ -232,7 +234,7 @@ async def get_followed_resume_list(company_id: int,
     data = await _follow_resume_service.get_followed_resume_list(
         host=match_host, company_id=company_id, size=size, next_ts=next_ts)
 
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 # @router.get("/{company_id}/resume-follows/{resume_id}",
@@ -310,7 +312,7 @@ async def apply_resume(company_id: int = Path(...),
 
 @router.get("/{company_id}/resume-contacts",
             responses=idempotent_response(f'{COMPANY}.get_applied_resume_list', vo.ContactResumeListVO))
-async def get_applied_resume_list(company_id: int = Path(...),
+async def get_applied_resume_list(request: Request, company_id: int = Path(...),
                               size: int = Query(10),
                               next_ts: int = Query(0),
                               match_host=Depends(get_match_host),
@@ -326,12 +328,12 @@ async def get_applied_resume_list(company_id: int = Path(...),
         size=size,
         next_ts=next_ts,
     )
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.get("/{company_id}/resume-applications",
             responses=idempotent_response(f'{COMPANY}.get_resume_application_list', vo.ContactResumeListVO))
-async def get_resume_application_list(company_id: int = Path(...),
+async def get_resume_application_list(request: Request, company_id: int = Path(...),
                                 size: int = Query(10),
                                 next_ts: int = Query(0),
                                 match_host=Depends(get_match_host),
@@ -347,7 +349,7 @@ async def get_resume_application_list(company_id: int = Path(...),
         size=size,
         next_ts=next_ts,
     )
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.delete("/{company_id}/resume-contacts/{resume_id}",
@@ -367,23 +369,23 @@ async def delete_any_contacted_resume(company_id: int,
 
 @router.get("/{company_id}/follow-and-contact/resumes",
             responses=idempotent_response(f'{COMPANY}.get_follows_and_contacts_at_first', vo.CompanyFollowAndContactVO))
-async def get_follows_and_contacts_at_first(company_id: int,
+async def get_follows_and_contacts_at_first(request: Request, company_id: int,
                                       size: int = Query(10),
                                       match_host=Depends(get_match_host),
                                       ):
     data = await _company_aggregate_service.get_resume_follows_and_contacts(
         host=match_host, company_id=company_id, size=size)
 
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.get("/{company_id}/matchdata",
             responses=idempotent_response(f'{COMPANY}.get_matchdata', vo.CompanyMatchDataVO))
-async def get_matchdata(company_id: int,
+async def get_matchdata(request: Request, company_id: int,
                   size: int = Query(10),
                   match_host=Depends(get_match_host),
                   ):
     data = await _company_aggregate_service.get_matchdata(
         host=match_host, company_id=company_id, size=size)
 
-    return res_success(data=data)
+    return res_success(data=data, request=request)
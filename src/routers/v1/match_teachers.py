@@ -15,6 +15,7 @@ from ...domains.match.teacher.services.teacher_service import TeacherProfileServ
 from ...domains.match.teacher.services.teacher_resume_service import TeacherResumeService
 from ...domains.match.teacher.services.follow_and_contact_job_service import FollowJobService, ContactJobService
 from ...apps.resources.adapters import service_client, gw_cache
+from ...apps.events.pub.event_bus import event_bus
 from ...configs.conf import \
     MY_STATUS_OF_TEACHER_APPLY, STATUS_OF_TEACHER_APPLY, MY_STATUS_OF_TEACHER_REACTION, STATUS_OF_TEACHER_REACTION
 from ...configs.constants import Apply
@@ -43,8 +44,8 @@ def get_match_host():
 
 
 TEACHER = 'teacher'
-_teacher_profile_service = TeacherProfileService(service_client)
-_teacher_resume_service = TeacherResumeService(service_client)
+_teacher_profile_service = TeacherProfileService(service_client, gw_cache, event_bus)
+_teacher_resume_service = TeacherResumeService(service_client, gw_cache, event_bus)
 _follow_job_service = FollowJobService(
     service_client,
     gw_cache,
@@ -82,10 +83,10 @@ async def create_profile(teacher_id: int,
 
 @router.get("/{teacher_id}", 
             responses=idempotent_response(f'{TEACHER}.get_profile', vo.TeacherProfileVO))
-async def get_profile(teacher_id: int, match_host=Depends(get_match_host)):
+async def get_profile(request: Request, teacher_id: int, match_host=Depends(get_match_host)):
     data = await _teacher_profile_service.get_profile(
         host=match_host, teacher_id=teacher_id)
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.put("/{teacher_id}", 
@@ -123,23 +124,23 @@ async def create_resume(teacher_id: int,
 # 然后才是有变量的 ("/{teacher_id}/resumes/{resume_id}")
 @router.get("/{teacher_id}/brief-resumes",
             responses=idempotent_response(f'{TEACHER}.get_brief_resumes', vo.ResumeListVO))
-async def get_brief_resumes(teacher_id: int,
+async def get_brief_resumes(request: Request, teacher_id: int,
                       match_host=Depends(get_match_host),
                       ):
     data = await _teacher_resume_service.get_brief_resumes(
         host=match_host, teacher_id=teacher_id)
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.get("/{teacher_id}/resumes/{resume_id}",
             responses=idempotent_response(f'{TEACHER}.get_resume', vo.TeacherProfileAndResumeVO))
-async def get_resume(teacher_id: int,
+async def get_resume(request: Request, teacher_id: int,
                resume_id: int,
                match_host=Depends(get_match_host),
                ):
     data = await _teacher_resume_service.get_resume(
         host=match_host, teacher_id=teacher_id, resume_id=resume_id)
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 # TODO: 未来如果允许使用多个 resumes, 需要考虑 idempotent
@@ -241,7 +242,7 @@ async def upsert_follow_job(teacher_id: int,
 
 @router.get("/{teacher_id}/job-follows",
             responses=idempotent_response(f'{TEACHER}.get_followed_job_list', vo.FollowJobListVO))
-async def get_followed_job_list(teacher_id: int,
+async def get_followed_job_list(request: Request, teacher_id: int,
                           size: int = Query(10),
                           next_ts: int = Query(0),
                           match_host=Depends(get_match_host),
@@ -249,7 +250,7 @@ async def get_followed_job_list(teacher_id: int,
     data = await _follow_job_service.get_followed_job_list(
         host=match_host, teacher_id=teacher_id, size=size, next_ts=next_ts)
 
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.delete("/{teacher_id}/job-follows/{job_id}",
@@ -282,7 +283,7 @@ async def apply_job(teacher_id: int = Path(...),
 
 @router.get("/{teacher_id}/job-applications",
             responses=idempotent_response(f'{TEACHER}.get_applied_job_list', vo.ContactJobListVO))
-async def get_applied_job_list(teacher_id: int = Path(...),
+async def get_applied_job_list(request: Request, teacher_id: int = Path(...),
                          size: int = Query(10),
                          next_ts: int = Query(0),
                          match_host=Depends(get_match_host),
@@ -298,12 +299,12 @@ async def get_applied_job_list(teacher_id: int = Path(...),
         size=size,
         next_ts=next_ts,
     )
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.get("/{teacher_id}/job-positions",
             responses=idempotent_response(f'{TEACHER}.get_job_position_list', vo.ContactJobListVO))
-async def get_job_position_list(teacher_id: int = Path(...),
+async def get_job_position_list(request: Request, teacher_id: int = Path(...),
                           size: int = Query(10),
                           next_ts: int = Query(0),
                           match_host=Depends(get_match_host),
@@ -319,7 +320,7 @@ async def get_job_position_list(teacher_id: int = Path(...),
         size=size,
         next_ts=next_ts,
     )
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.delete("/{teacher_id}/job-contacts/{job_id}",
@@ -339,23 +340,23 @@ async def delete_any_contacted_job(teacher_id: int,
 
 @router.get("/{teacher_id}/follow-and-application/jobs",
             responses=idempotent_response(f'{TEACHER}.get_follows_and_applications_at_first', vo.TeacherFollowAndContactVO))
-async def get_follows_and_applications_at_first(teacher_id: int,
+async def get_follows_and_applications_at_first(request: Request, teacher_id: int,
                                           size: int = Query(10),
                                           match_host=Depends(get_match_host),
                                           ):
     data = await _teacher_aggregate_service.get_job_follows_and_contacts(
         host=match_host, teacher_id=teacher_id, size=size)
 
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.get("/{teacher_id}/matchdata",
             responses=idempotent_response(f'{TEACHER}.get_matchdata', vo.TeacherMatchDataVO))
-async def get_matchdata(teacher_id: int,
+async def get_matchdata(request: Request, teacher_id: int,
                   size: int = Query(10),
                   match_host=Depends(get_match_host),
                   ):
     data = await _teacher_aggregate_service.get_matchdata(
         host=match_host, teacher_id=teacher_id, size=size)
 
-    return res_success(data=data)
+    return res_success(data=data, request=request)
@@ -10,6 +10,7 @@ from ...domains.payment.models import dtos, value_objects as vo
 from ...domains.payment.models.stripe import stripe_dtos, stripe_vos
 from ...domains.payment.services.payment_service import PaymentService, PaymentPlanService
 from ...apps.resources.adapters import service_client, gw_cache
+from ...apps.events.pub.event_bus import event_bus
 from ...configs.conf import *
 
 import logging
@@ -21,6 +22,7 @@ log = logging.getLogger(__name__)
 _payment_service = PaymentService(
     service_client, 
     gw_cache,
+    event_bus,
 )
 _payment_plan_service = PaymentPlanService(
     service_client,
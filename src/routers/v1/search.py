@@ -1,7 +1,7 @@
 from typing import List
 from unicodedata import name
 from fastapi import APIRouter, \
-    Depends, Header, Query
+    Request, Depends, Header, Query
 from ..req.search_validation import *
 from ..res.response import *
 from ...apps.resources.adapters import service_client, gw_cache
@@ -14,6 +14,8 @@ from ...domains.search.value_objects import \
 from ...domains.match.company.value_objects import c_value_objects as match_c
 from ...domains.match.teacher.value_objects import t_value_objects as match_t
 from ...domains.search.services.search_service import SearchService
+from ...infra.cache.page_prefetcher import PagePrefetcher
+from ...infra.cache.search_result_cache import SearchResultCache
 from ...domains.match.star_tracker_service import StarTrackerService
 from ...domains.user.services.auth_service import AuthService
 from ...domains.user.value_objects.auth_vo import BaseAuthDTO
@@ -44,6 +46,8 @@ SEARCH = 'search'
 _search_service = SearchService(
     service_client,
     gw_cache,
+    prefetcher=PagePrefetcher() if SEARCH_PREFETCH_ENABLE else None,
+    results=SearchResultCache() if SEARCH_RESULT_CACHE_ENABLE else None,
 )
 _star_tracker_service = StarTrackerService(
     service_client,
@@ -54,6 +58,7 @@ _star_tracker_service = StarTrackerService(
 @router.get("/resumes",
             responses=idempotent_response(f'{SEARCH}.get_resumes', search_t.SearchResumeListVO))
 async def get_resumes(
+    request: Request,
     size: int = Query(10, gt=0, le=100),
     sort_by: SortField = Query(SortField.UPDATED_AT),
     sort_dirction: SortDirection = Query(SortDirection.DESC),
@@ -73,38 +78,41 @@ async def get_resumes(
         tags=tags,
     )
     data = await _search_service.get_resumes(search_host, query)
-    if len(data.items) and AuthService.is_login(gw_cache, visitor):
+    if len(data.items) and await AuthService.is_login(gw_cache, visitor):
         data.items = await _star_tracker_service.all_marks(
             match_host,
             visitor,
             data.items,
         )
-    return res_success(data=data.model_dump())
+    return res_success(data=data, request=request)
 
 
 @router.get("/resumes/{tid}/{rid}",
             responses=idempotent_response(f'{SEARCH}.get_resume_by_id', match_t.TeacherProfileAndResumeVO))
 async def get_resume_by_id(
+    request: Request,
     tid: int,
     rid: int,
     match_host=Depends(get_match_host),
 ):
-    (data, msg) = await _search_service.get_resume_by_id(match_host, tid, rid)
-    return res_success(data=data, msg=msg)
+    (data, msg, rev) = await _search_service.get_resume_by_id(match_host, tid, rid)
+    return res_success(data=data, msg=msg, request=request, version=rev)
 
 
 @router.get('/resumes-info/tags',
             responses=idempotent_response(f'{SEARCH}.get_resume_tags', search_public.ResumeTagsVO))
 async def get_resume_tags(
+    request: Request,
     search_host=Depends(get_search_host),
 ):
     data = await _search_service.get_resume_tags(search_host)
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.get("/jobs",
             responses=idempotent_response(f'{SEARCH}.get_jobs', search_c.SearchJobListVO))
 async def get_jobs(
+    request: Request,
     size: int = Query(10, gt=0, le=100),
     sort_by: SortField = Query(SortField.UPDATED_AT),
     sort_dirction: SortDirection = Query(SortDirection.DESC),
@@ -126,45 +134,47 @@ async def get_jobs(
         country_code=country_code,
     )
     data = await _search_service.get_jobs(search_host, query)
-    if len(data.items) and AuthService.is_login(gw_cache, visitor):
+    if len(data.items) and await AuthService.is_login(gw_cache, visitor):
         data.items = await _star_tracker_service.all_marks(
             match_host,
             visitor,
             data.items,
         )
-    return res_success(data=data.model_dump())  # 返回 JSON 序列化的数据
+    return res_success(data=data, request=request)  # 返回 JSON 序列化的数据
 
 
 @router.get("/jobs/{cid}/{jid}",
             responses=idempotent_response(f'{SEARCH}.get_job_by_id', match_c.CompanyProfileAndJobVO))
 async def get_job_by_id(
+    request: Request,
     cid: int,
     jid: int,
     match_host=Depends(get_match_host),
 ):
-    (data, msg) = await _search_service.get_job_by_id(match_host, cid, jid)
-    return res_success(data=data, msg=msg)
+    (data, msg, rev) = await _search_service.get_job_by_id(match_host, cid, jid)
+    return res_success(data=data, msg=msg, request=request, version=rev)
 
 
 @router.get('/jobs-info/continents',
             responses=idempotent_response(f'{SEARCH}.get_continents', search_public.ContinentListVO))
-async def get_continents(search_host=Depends(get_search_host)):
+async def get_continents(request: Request, search_host=Depends(get_search_host)):
     data = await _search_service.get_continents(search_host)
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 # TODO: this route rule(get_all_continents_and_countries) is same as 'get_countries',
 # so it has to be put before 'get_countries'
 @router.get('/jobs-info/continents/all/countries',
             responses=idempotent_response(f'{SEARCH}.get_all_continents_and_countries', List[search_public.CountryListVO]))
-async def get_all_continents_and_countries(search_host=Depends(get_search_host)):
+async def get_all_continents_and_countries(request: Request, search_host=Depends(get_search_host)):
     data = await _search_service.get_all_continents_and_countries(search_host)
-    return res_success(data=data)
+    return res_success(data=data, request=request)
 
 
 @router.get('/jobs-info/continents/{continent_code}/countries',
             responses=idempotent_response(f'{SEARCH}.get_countries', List[search_public.CountryListVO]))
 async def get_countries(
+    request: Request,
     continent_code: str,
     search_host=Depends(get_search_host),
 ):
@@ -172,4 +182,4 @@ async def get_countries(
         search_host,
         continent_code,
     )
-    return res_success(data=data)
+    return res_success(data=data, request=request)
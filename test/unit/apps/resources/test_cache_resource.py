@@ -0,0 +1,57 @@
+import pytest
+from src.apps.resources.handlers import cache_resource
+from src.apps.resources.handlers.cache_resource import DynamodbCacheResourceHandler
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class FakeContext:
+    def __init__(self, value=None, error: Exception = None):
+        self.value = value
+        self.error = error
+        self.entered = False
+        self.exited = False
+
+    async def __aenter__(self):
+        if self.error is not None:
+            raise self.error
+        self.entered = True
+        return self.value
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.exited = True
+
+
+class FakeSession:
+    def __init__(self, resource: FakeContext, client: FakeContext):
+        self.__resource = resource
+        self.__client = client
+
+    def resource(self, *args, **kwargs):
+        return self.__resource
+
+    def client(self, *args, **kwargs):
+        return self.__client
+
+
+async def test_resource_is_exited_if_the_client_fails(monkeypatch):
+    resource = FakeContext(value=object())
+    client = FakeContext(error=ConnectionError('client'))
+    monkeypatch.setattr(cache_resource.aioboto3, 'Session', lambda: FakeSession(resource, client))
+
+    handler = DynamodbCacheResourceHandler()
+    with pytest.raises(ConnectionError):
+        await handler.initial()
+
+    assert resource.entered and resource.exited
+    assert handler.table is None
+    assert handler.dynamodb is None
+    assert handler.client is None
+    # nothing left to close
+    await handler.close()
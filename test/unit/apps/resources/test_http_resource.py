@@ -0,0 +1,108 @@
+import socket
+import asyncio
+import pytest
+from src.apps.resources.handlers import http_resource
+from src.apps.resources.handlers.http_resource import HttpResourceHandler
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class HttpServer:
+    '''
+    a local HTTP/1.1 server, counts the connections;
+    replies 200 to every request (or never, if it hangs)
+    '''
+
+    def __init__(self, hang: bool = False):
+        self.hang = hang
+        self.connections = 0
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.__handle, '127.0.0.1', 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f'http://127.0.0.1:{port}'
+
+    async def close(self):
+        self.server.close()
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while await reader.readuntil(b'\r\n\r\n'):
+                if self.hang:
+                    await asyncio.sleep(10)
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n')
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+def closed_port_url() -> str:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return f'http://127.0.0.1:{s.getsockname()[1]}'
+
+
+@pytest.fixture(autouse=True)
+def http1(monkeypatch):
+    monkeypatch.setattr(http_resource, 'HTTP2_ENABLE', False)
+    monkeypatch.setattr(http_resource, 'HTTP_WARMUP_ENABLE', False)
+    monkeypatch.setattr(http_resource, 'HTTP_WARMUP_CONNECTS', 3)
+
+
+async def test_warm_up_opens_connections_of_all_domains():
+    a, b = HttpServer(), HttpServer()
+    urls = [await a.start(), await b.start()]
+    handler = HttpResourceHandler(domains=[f'{url}/some/path' for url in urls])
+    await handler.initial()
+    try:
+        report = await handler.warm_up(budget_secs=2.0)
+
+        assert set(report.keys()) == {url.split('://')[1] for url in urls}
+        assert all(r['ok'] and r['latency'] >= 0 for r in report.values())
+        assert a.connections == b.connections == 3
+        assert handler.warmup_report == report
+
+        # the 1st request reuses a warm connection
+        client = await handler.access(url=f'{urls[0]}/x')
+        await client.get(f'{urls[0]}/x')
+        assert a.connections == 3
+
+    finally:
+        await handler.close()
+        await a.close()
+        await b.close()
+
+
+async def test_warm_up_is_bounded_by_the_budget():
+    ok, slow = HttpServer(), HttpServer(hang=True)
+    ok_url, slow_url, down_url = await ok.start(), await slow.start(), closed_port_url()
+    handler = HttpResourceHandler(domains=[ok_url, slow_url, down_url])
+    await handler.initial()
+    try:
+        started = asyncio.get_running_loop().time()
+        report = await handler.warm_up(budget_secs=0.3)
+
+        assert asyncio.get_running_loop().time() - started < 1.0
+        assert report[ok_url.split('://')[1]]['ok']
+        assert report[slow_url.split('://')[1]] == {'ok': False, 'err': 'timeout(0.3s)'}
+        assert report[down_url.split('://')[1]]['ok'] is False
+
+    finally:
+        await handler.close()
+        await ok.close()
+        await slow.close()
+
+
+async def test_no_domains():
+    handler = HttpResourceHandler()
+    assert await handler.warm_up() == {}
@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from src.domains.match.public_value_objects import MarkVO
+from src.domains.match.star_tracker_service import StarTrackerService
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class MemoryCache:
+    def __init__(self, sets=None):
+        self.sets = dict(sets or {})
+        self.reads = []
+
+    async def smembers(self, key):
+        self.reads.append([key])
+        return self.sets.get(key, None)
+
+    async def msmembers(self, keys):
+        self.reads.append(list(keys))
+        return {key: self.sets.get(key, None) for key in keys}
+
+    async def sadd(self, key, values, ex=None):
+        self.sets.setdefault(key, set()).update(values)
+        return len(values)
+
+
+class FakeServiceApi:
+    def __init__(self, data):
+        self.data = data
+        self.gets = []
+        self.active = 0
+        self.max_active = 0
+
+    async def simple_get(self, url, params=None, headers=None, policy=None):
+        self.gets.append(url)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return self.data[url]
+
+
+class JobMark(MarkVO):
+    jid: int
+
+    def id(self) -> int:
+        return self.jid
+
+
+FOLLOW_URL = 'https://match/teachers/7/follow/job-ids'
+CONTACT_URL = 'https://match/teachers/7/contact/job-ids'
+
+
+async def test_all_id_sets_reads_both_sets_in_one_round_trip():
+    cache = MemoryCache({'tea:7:follow:jids': {1, 2}, 'tea:7:contact:jids': set()})
+    req = FakeServiceApi({})
+    service = StarTrackerService(req, cache)
+
+    followed, contacted = await service.all_id_sets('https://match', 'teacher', 7)
+
+    assert (followed, contacted) == ({1, 2}, set())
+    assert cache.reads == [['tea:7:follow:jids', 'tea:7:contact:jids']]
+    # an empty set is cached, not a miss
+    assert req.gets == []
+
+
+async def test_all_id_sets_fetches_the_missed_sets_concurrently():
+    cache = MemoryCache()
+    req = FakeServiceApi({FOLLOW_URL: [1, 2], CONTACT_URL: [3]})
+    service = StarTrackerService(req, cache)
+
+    followed, contacted = await service.all_id_sets('https://match', 'teacher', 7)
+
+    assert (set(followed), set(contacted)) == ({1, 2}, {3})
+    assert sorted(req.gets) == [CONTACT_URL, FOLLOW_URL]
+    assert req.max_active == 2
+    assert cache.sets == {'tea:7:follow:jids': {1, 2}, 'tea:7:contact:jids': {3}}
+
+
+async def test_all_id_sets_fetches_only_the_missed_set():
+    cache = MemoryCache({'tea:7:follow:jids': {1}})
+    req = FakeServiceApi({CONTACT_URL: [3]})
+    service = StarTrackerService(req, cache)
+
+    followed, contacted = await service.all_id_sets('https://match', 'teacher', 7)
+
+    assert (followed, set(contacted)) == ({1}, {3})
+    assert req.gets == [CONTACT_URL]
+
+
+async def test_cross_marks():
+    cache = MemoryCache({'tea:7:follow:jids': {1, 2}, 'tea:7:contact:jids': {2, 3}})
+    service = StarTrackerService(FakeServiceApi({}), cache)
+    followed_list = [JobMark(jid=1, followed=True), JobMark(jid=2, followed=True)]
+    contact_list = [JobMark(jid=2, contacted=True), JobMark(jid=3, contacted=True)]
+
+    followed_list, contact_list = await service.cross_marks(
+        'https://match', 'teacher', 7, followed_list, contact_list)
+
+    assert [(m.jid, m.followed, m.contacted) for m in followed_list] == [(1, True, False), (2, True, True)]
+    assert [(m.jid, m.followed, m.contacted) for m in contact_list] == [(2, True, True), (3, False, True)]
+    assert len(cache.reads) == 1
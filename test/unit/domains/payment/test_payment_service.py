@@ -0,0 +1,109 @@
+import json
+import pytest
+from src.configs.conf import SHORT_TERM_TTL
+from src.domains.event_bus import CACHE_INVALIDATION
+from src.domains.payment.services.payment_service import PaymentService
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class MemoryCache:
+    def __init__(self, data=None):
+        self.data = dict(data or {})
+        self.calls = []
+
+    async def get(self, key):
+        return self.data.get(key, None)
+
+    async def delete(self, key):
+        self.calls.append(('delete', key))
+        return self.data.pop(key, None) is not None
+
+    async def mset(self, items):
+        self.calls.append(('mset', [(key, ex) for key, _, ex in items]))
+        self.data.update({key: val for key, val, _ in items})
+        return True
+
+    async def mdelete(self, keys):
+        self.calls.append(('mdelete', list(keys)))
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class FakeEventBus:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, channel, events):
+        self.published.append((channel, events))
+
+
+class FakeServiceApi:
+    def __init__(self, payment_status):
+        self.payment_status = payment_status
+
+    async def simple_get(self, url, params=None, headers=None, policy=None):
+        return self.payment_status
+
+    async def post_data(self, url, byte_data=None, headers=None):
+        return {'received': True}
+
+
+class FakeRequest:
+    def __init__(self, body: bytes):
+        self.headers = {'Stripe-Signature': 'sig'}
+        self.__body = body
+
+    async def body(self):
+        return self.__body
+
+
+PAYMENT_STATUS = {
+    'role_id': 7,
+    'customer_id': 'cus_1',
+    'status': 'paid',
+    'subscribe_status': 'active',
+    'current_period_end': None,
+    'plan_id': None,
+}
+
+
+async def test_payment_status_is_cached_with_one_mset():
+    cache = MemoryCache({'7': {'email': 'user@example.com'}})
+    bus = FakeEventBus()
+    shared = dict(PAYMENT_STATUS)
+    service = PaymentService(FakeServiceApi(shared), cache, bus)
+
+    status = await service.get_payment_status('https://payment', 7)
+
+    assert status.role_id == 7
+    assert cache.calls == [('mset', [('pay_handling:cus_1', SHORT_TERM_TTL), ('pay:7', SHORT_TERM_TTL)])]
+    assert cache.data['pay_handling:cus_1'] == '7'
+    assert 'customer_id' not in cache.data['pay:7']
+    # the (possibly shared) GET result is not mutated
+    assert shared == PAYMENT_STATUS
+    assert bus.published[0][0] == CACHE_INVALIDATION
+
+    # cache hit
+    assert (await service.get_payment_status('https://payment', 7)).role_id == 7
+    assert len(cache.calls) == 1
+
+
+async def test_webhook_drops_both_keys_with_one_mdelete():
+    cache = MemoryCache({'pay_handling:cus_1': '7', 'pay:7': {'role_id': 7}})
+    bus = FakeEventBus()
+    service = PaymentService(FakeServiceApi(None), cache, bus)
+    body = json.dumps({'data': {'object': {'customer': 'cus_1'}}}).encode()
+
+    res = await service.webhook('https://payment', FakeRequest(body))
+
+    assert res.status_code == 201
+    assert cache.calls == [('mdelete', ['pay_handling:cus_1', 'pay:7'])]
+    assert cache.data == {}
+    assert bus.published[0][1][0]['keys'] == ['pay_handling:cus_1', 'pay:7']
@@ -0,0 +1,143 @@
+import json
+import asyncio
+import pytest
+from src.configs.exceptions import ClientException, NotFoundException
+from src.infra.cache.negative_cache import NegativeCache, CLOSED, JOB
+from src.infra.cache.search_result_cache import SearchResultCache
+from src.domains.search.services.search_service import SearchService
+from src.domains.search.value_objects.c_value_objects import SearchJobListQueryDTO
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class MemoryCache:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key, None)
+
+    async def mget(self, keys):
+        return {key: self.data.get(key, None) for key in keys}
+
+    async def set(self, key, val, ex=None):
+        self.data[key] = val
+        return True
+
+
+class FakeServiceApi:
+    '''
+    replies the job page (or raises) of the url,
+    "on_get" runs while the request is in flight
+    '''
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.gets = []
+        self.on_get = None
+
+    async def simple_get(self, url, params=None, headers=None, policy=None):
+        self.gets.append(url)
+        if self.on_get is not None:
+            self.on_get()
+        await asyncio.sleep(0)
+        page = self.pages[url]
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+    async def get_bytes(self, url, params=None, headers=None, policy=None):
+        self.gets.append(url)
+        await asyncio.sleep(0)
+        return self.pages[url]
+
+
+def job_page(enable: bool, title: str = 'teacher'):
+    return {
+        'profile': {'cid': 1, 'name': 'school'},
+        'job': {'jid': 2, 'cid': 1, 'title': title, 'enable': enable},
+    }
+
+
+URL = 'https://match/companies/1/jobs/2'
+
+
+async def test_not_found_is_cached_until_invalidated():
+    negative = NegativeCache(max_size=10, ttl=60)
+    req = FakeServiceApi({URL: NotFoundException(msg='not found')})
+    service = SearchService(req, MemoryCache(), negative)
+
+    for _ in range(3):
+        with pytest.raises(ClientException):
+            await service.get_job_by_id('https://match', 1, 2)
+    assert len(req.gets) == 1
+
+    # the job is created
+    negative.invalidate(JOB, 1, 2)
+    req.pages[URL] = job_page(enable=True)
+    (data, msg, rev) = await service.get_job_by_id('https://match', 1, 2)
+    assert (data['job']['title'], msg) == ('teacher', 'ok')
+    assert rev is not None
+
+
+async def test_closed_is_cached():
+    negative = NegativeCache(max_size=10, ttl=60)
+    req = FakeServiceApi({URL: job_page(enable=False)})
+    service = SearchService(req, MemoryCache(), negative)
+
+    assert await service.get_job_by_id('https://match', 1, 2) == (None, 'job closed', None)
+    assert await service.get_job_by_id('https://match', 1, 2) == (None, 'job closed', None)
+    assert len(req.gets) == 1
+    assert negative.get(JOB, 1, 2) == CLOSED
+
+
+async def test_closed_marker_is_not_cached_if_invalidated_while_loading():
+    negative = NegativeCache(max_size=10, ttl=60)
+    req = FakeServiceApi({URL: job_page(enable=False)})
+    # the job is enabled while the closed page is in flight
+    req.on_get = lambda: negative.invalidate(JOB, 1, 2)
+    service = SearchService(req, MemoryCache(), negative)
+
+    assert await service.get_job_by_id('https://match', 1, 2) == (None, 'job closed', None)
+    assert negative.get(JOB, 1, 2) is None
+
+    req.on_get = None
+    req.pages[URL] = job_page(enable=True)
+    (data, msg, _) = await service.get_job_by_id('https://match', 1, 2)
+    assert msg == 'ok'
+
+
+def search_page(*jids: int) -> bytes:
+    items = [{'jid': jid, 'cid': 1, 'title': 'teacher', 'region': 'jp'} for jid in jids]
+    return json.dumps({'code': '0', 'msg': 'ok', 'data': {'items': items, 'next': None}}).encode()
+
+
+async def test_popular_query_is_served_from_the_result_cache():
+    req = FakeServiceApi({'https://search/jobs': search_page(1, 2)})
+    results = SearchResultCache(ttl=60, max_size=10, min_hits=2, admission_window=60)
+    service = SearchService(req, MemoryCache(), NegativeCache(), results=results)
+
+    # the same query, spelled differently
+    queries = [
+        SearchJobListQueryDTO(size=10, patterns=['Math', 'english'], country_code='jp'),
+        SearchJobListQueryDTO(size=10, patterns=['english', 'math'], country_code='JP'),
+        SearchJobListQueryDTO(size=10, patterns=['MATH', 'English'], country_code='jp'),
+    ]
+    pages = [await service.get_jobs('https://search', query) for query in queries]
+
+    # admitted at the 2nd request, the 3rd is a hit
+    assert len(req.gets) == 2
+    assert [[item.jid for item in page.items] for page in pages] == [[1, 2]] * 3
+
+    # each request decodes its own copy (the star marks are per visitor)
+    pages[2].items[0].followed = True
+    page = await service.get_jobs('https://search', queries[0])
+    assert page.items[0].followed is False
+    assert page.items[0].url_path is not None
+    assert len(req.gets) == 2
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from src.configs.conf import SHORT_TERM_TTL, REQUEST_INTERVAL_TTL
+from src.configs.exceptions import TooManyRequestsException
+from src.domains.user.services import auth_service
+from src.domains.user.services.auth_service import AuthService
+from src.domains.user.value_objects.auth_vo import ResetPasswordVO
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class MemoryCache:
+    def __init__(self):
+        self.data = {}
+        self.writes = []
+
+    async def get(self, key):
+        return self.data.get(key, None)
+
+    async def set(self, key, val, ex=None):
+        self.writes.append(key)
+        self.data[key] = val
+        return True
+
+    async def mset(self, items):
+        self.writes.append([(key, ex) for key, _, ex in items])
+        self.data.update({key: val for key, val, _ in items})
+        return True
+
+    async def mdelete(self, keys):
+        self.writes.append(list(keys))
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class FakeServiceApi:
+    def __init__(self):
+        self.gets = []
+        self.puts = []
+
+    async def simple_get(self, url, params=None, headers=None, policy=None):
+        self.gets.append((url, params))
+        await asyncio.sleep(0.02)
+        if url.endswith('/password/reset/email'):
+            return {'token': 'TOKEN'}
+        return 'PUBKEY'
+
+    async def simple_put(self, url, json=None, headers=None):
+        self.puts.append(url)
+        return None
+
+
+async def test_public_key_misses_are_coalesced(monkeypatch):
+    monkeypatch.setattr(auth_service, 'gen_timestamp', lambda: 1234)
+    cache, req = MemoryCache(), FakeServiceApi()
+    service = AuthService(req, cache)
+
+    results = await asyncio.gather(*[service.get_public_key('https://auth') for _ in range(10)])
+
+    assert results == [{'pubkey': 'PUBKEY'}] * 10
+    assert req.gets == [('https://auth/security/pubkey', {'ts': 1234})]
+    assert cache.writes == ['pubkey_34']
+
+    # cached
+    assert await service.get_public_key('https://auth') == {'pubkey': 'PUBKEY'}
+    assert len(req.gets) == 1
+
+
+async def test_reset_password_keys_are_written_and_removed_together():
+    cache, req = MemoryCache(), FakeServiceApi()
+    service = AuthService(req, cache)
+    email = 'user@example.com'
+
+    await service.send_reset_password_comfirm_email('https://auth', email)
+    assert cache.writes == [[(f'{email}:reset_pw', REQUEST_INTERVAL_TTL), ('TOKEN', SHORT_TERM_TTL)]]
+    assert cache.data == {f'{email}:reset_pw': '1', 'TOKEN': email}
+
+    # throttled by the reset_pw key
+    with pytest.raises(TooManyRequestsException):
+        await service.send_reset_password_comfirm_email('https://auth', email)
+
+    body = ResetPasswordVO(register_email=email, password1='pw', password2='pw')
+    await service.reset_passwrod('https://auth', 'TOKEN', body)
+    assert req.puts == ['https://auth/password/update']
+    assert cache.writes[-1] == [f'{email}:reset_pw', 'TOKEN']
+    assert cache.data == {}
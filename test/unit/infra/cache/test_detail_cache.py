@@ -0,0 +1,118 @@
+import asyncio
+import pytest
+from src.infra.cache.detail_cache import DetailCache
+from src.infra.utils.single_flight import SingleFlight
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class MemoryCache:
+    def __init__(self):
+        self.data = {}
+        self.fail = False
+
+    async def mget(self, keys):
+        if self.fail:
+            raise Exception('cache down')
+        return {key: self.data.get(key, None) for key in keys}
+
+    async def set(self, key, val, ex=None):
+        self.data[key] = val
+        return True
+
+
+class Loader:
+    def __init__(self, data=None, delay: float = 0):
+        self.data = {'title': 'v1'} if data is None else data
+        self.delay = delay
+        self.calls = 0
+        self.on_load = None
+
+    async def __call__(self, url: str):
+        self.calls += 1
+        if self.on_load is not None:
+            await self.on_load()
+        await asyncio.sleep(self.delay)
+        return None if self.data == 'closed' else dict(self.data)
+
+
+def detail_cache(cache: MemoryCache) -> DetailCache:
+    return DetailCache(cache, ttl=60, flight=SingleFlight())
+
+
+async def test_hit_after_load():
+    cache, load = MemoryCache(), Loader()
+    detail = detail_cache(cache)
+
+    data, rev = await detail.get('job', 1, 2, load, 'url')
+    assert data == {'title': 'v1'} and rev is not None
+    assert await detail.get('job', 1, 2, load, 'url') == (data, rev)
+    assert load.calls == 1
+    assert detail.stats() == {'hits': 1, 'misses': 1, 'invalidations': 0}
+
+
+async def test_version_bump_invalidates_all_details_of_the_owner():
+    cache, load = MemoryCache(), Loader()
+    detail = detail_cache(cache)
+    _, rev_2 = await detail.get('job', 1, 2, load, 'url')
+    await detail.get('job', 1, 3, load, 'url')
+    await detail.get('job', 9, 2, load, 'url')
+
+    await detail.invalidate('job', 1)
+    load.data = {'title': 'v2'}
+
+    data, rev = await detail.get('job', 1, 2, load, 'url')
+    assert data == {'title': 'v2'} and rev != rev_2
+    await detail.get('job', 1, 3, load, 'url')
+    # another owner is untouched
+    assert (await detail.get('job', 9, 2, load, 'url'))[0] == {'title': 'v1'}
+    assert load.calls == 5
+
+
+async def test_entry_loaded_across_an_invalidation_never_matches():
+    cache, load = MemoryCache(), Loader()
+    detail = detail_cache(cache)
+
+    # the owner writes while the (old) detail is in flight
+    async def write():
+        load.on_load = None
+        await detail.invalidate('job', 1)
+    load.on_load = write
+
+    assert (await detail.get('job', 1, 2, load, 'url'))[0] == {'title': 'v1'}
+    load.data = {'title': 'v2'}
+    assert (await detail.get('job', 1, 2, load, 'url'))[0] == {'title': 'v2'}
+    assert load.calls == 2
+
+
+async def test_concurrent_misses_share_one_load():
+    cache, load = MemoryCache(), Loader(delay=0.02)
+    detail = detail_cache(cache)
+
+    results = await asyncio.gather(*[detail.get('job', 1, 2, load, 'url') for _ in range(5)])
+    assert all(r == results[0] for r in results)
+    assert load.calls == 1
+
+
+async def test_closed_is_not_cached():
+    cache, load = MemoryCache(), Loader(data='closed')
+    detail = detail_cache(cache)
+
+    assert await detail.get('job', 1, 2, load, 'url') == (None, None)
+    assert await detail.get('job', 1, 2, load, 'url') == (None, None)
+    assert load.calls == 2
+    assert cache.data == {}
+
+
+async def test_cache_failure_falls_back_to_the_loader():
+    cache, load = MemoryCache(), Loader()
+    cache.fail = True
+    detail = detail_cache(cache)
+
+    assert await detail.get('job', 1, 2, load, 'url') == ({'title': 'v1'}, None)
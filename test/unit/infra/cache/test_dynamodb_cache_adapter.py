@@ -0,0 +1,241 @@
+import time
+import pytest
+from types import SimpleNamespace
+from src.configs.conf import TABLE_CACHE
+from src.apps.resources.handlers.cache_resource import DynamodbCacheResourceHandler
+from src.infra.cache import dynamodb_cache_adapter
+from src.infra.cache.dynamodb_cache_adapter import DynamoDbCacheAdapter
+
+boto3 = pytest.importorskip('boto3')
+moto_server = pytest.importorskip('moto.server')
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+# a local DynamoDB (moto server): the aio clients are not patched by moto's in-process mock
+@pytest.fixture(scope='module')
+def endpoint():
+    server = moto_server.ThreadedMotoServer(ip_address='127.0.0.1', port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f'http://{host}:{port}'
+    server.stop()
+
+
+@pytest.fixture
+def client(endpoint, monkeypatch):
+    monkeypatch.setenv('AWS_ENDPOINT_URL_DYNAMODB', endpoint)
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'ap-northeast-1')
+    client = boto3.client('dynamodb')
+    client.create_table(
+        TableName=TABLE_CACHE,
+        KeySchema=[{'AttributeName': 'cache_key', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'cache_key', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    yield client
+    client.delete_table(TableName=TABLE_CACHE)
+
+
+@pytest.fixture
+async def cache(client):
+    handler = DynamodbCacheResourceHandler()
+    yield DynamoDbCacheAdapter(handler)
+    await handler.close()
+
+
+def put_legacy_set(client, key: str, members: str, ttl: int = None):
+    item = {'cache_key': {'S': key}, 'value': {'S': members}}
+    if ttl is not None:
+        item['ttl'] = {'N': str(ttl)}
+    client.put_item(TableName=TABLE_CACHE, Item=item)
+
+
+def put_number_set(client, key: str, members: list, ttl: int):
+    client.put_item(TableName=TABLE_CACHE, Item={
+        'cache_key': {'S': key},
+        'members': {'NS': [str(m) for m in members]},
+        'ttl': {'N': str(ttl)},
+    })
+
+
+def exists(client, key: str) -> bool:
+    return 'Item' in client.get_item(TableName=TABLE_CACHE, Key={'cache_key': {'S': key}})
+
+
+async def test_get_set_round_trip(cache):
+    for val in (1, 1.5, True, 'text', {'a': [1, None]}, [1, 'x']):
+        await cache.set('k', val, 60)
+        assert await cache.get('k') == val
+    assert await cache.get('missing') is None
+
+
+# Number Set
+
+async def test_sadd_smembers(cache, client):
+    assert await cache.sadd('s', [1, 2, 2], ex=60) == 2
+    assert await cache.sadd('s', [2, 3]) == 1
+    assert await cache.smembers('s') == {1, 2, 3}
+    assert client.get_item(TableName=TABLE_CACHE, Key={'cache_key': {'S': 's'}})['Item']['members']['NS']
+
+
+async def test_missing_set_vs_empty_set(cache):
+    assert await cache.smembers('missing') is None
+
+    assert await cache.sadd('empty', [], ex=60) == 0
+    assert await cache.smembers('empty') == set()
+
+    await cache.sadd('s', [1], ex=60)
+    assert await cache.srem('s', 1) == 1
+    assert await cache.smembers('s') == set()
+
+
+async def test_srem(cache, client):
+    await cache.sadd('s', [1, 2], ex=60)
+    assert await cache.srem('s', 1, ex=60) == 1
+    assert await cache.srem('s', 1) == 0
+    assert await cache.smembers('s') == {2}
+
+    # no set is created for a missing key
+    assert await cache.srem('missing', 1, ex=60) == 0
+    assert not exists(client, 'missing')
+
+
+async def test_msmembers(cache, client):
+    await cache.sadd('a', [1, 2], ex=60)
+    put_legacy_set(client, 'legacy', '[3]')
+    assert await cache.msmembers(['a', 'legacy', 'missing']) == {
+        'a': {1, 2},
+        'legacy': {3},
+        'missing': None,
+    }
+
+
+async def test_mget_in_batches(cache):
+    # batch_get_item accepts 100 keys at most
+    keys = [f'k{i}' for i in range(150)]
+    await cache.mset([(key, i, 60) for i, key in enumerate(keys[:120])])
+    vals = await cache.mget(keys + ['missing'])
+    assert vals == {**{key: i for i, key in enumerate(keys[:120])}, **{key: None for key in keys[120:]}, 'missing': None}
+
+
+async def test_mset_mdelete_in_batches(cache, client):
+    # batch_write_item accepts 25 items at most
+    keys = [f'k{i}' for i in range(60)]
+    assert await cache.mset([(key, i, 60 if i % 2 else None) for i, key in enumerate(keys)])
+    item = client.get_item(TableName=TABLE_CACHE, Key={'cache_key': {'S': 'k1'}})['Item']
+    assert int(item['ttl']['N']) > time.time()
+    assert 'ttl' not in client.get_item(TableName=TABLE_CACHE, Key={'cache_key': {'S': 'k0'}})['Item']
+
+    await cache.mdelete(keys[:55] + ['missing'])
+    assert await cache.mget(keys[50:]) == {**{key: None for key in keys[50:55]}, **{key: i + 55 for i, key in enumerate(keys[55:])}}
+
+
+# expired (not yet deleted by DynamoDB)
+
+async def test_expired_set(cache, client):
+    put_number_set(client, 's', [1, 2], ttl=int(time.time()) - 10)
+    assert await cache.smembers('s') is None
+
+    # the expired members are not merged
+    assert await cache.sadd('s', [3], ex=60) == 1
+    assert await cache.smembers('s') == {3}
+
+
+async def test_srem_on_an_expired_set(cache, client):
+    put_number_set(client, 's', [1], ttl=int(time.time()) - 10)
+    assert await cache.srem('s', 1) == 0
+    assert not exists(client, 's')
+
+
+# legacy: the set written by "set" as a JSON list
+
+async def test_sadd_on_a_legacy_set(cache, client):
+    put_legacy_set(client, 'legacy', '[1, 2]')
+    assert await cache.smembers('legacy') == {1, 2}
+
+    # dropped, then the members are added
+    assert await cache.sadd('legacy', [3, 4], ex=60) == 2
+    assert await cache.smembers('legacy') == {3, 4}
+
+
+async def test_srem_on_a_legacy_set(cache, client):
+    put_legacy_set(client, 'member', '[1, 2]')
+    assert await cache.srem('member', 1) == 1
+    assert not exists(client, 'member')
+
+    put_legacy_set(client, 'not_member', '[1, 2]')
+    assert await cache.srem('not_member', 3) == 0
+    assert not exists(client, 'not_member')
+
+
+async def test_srem_on_an_expired_legacy_set(cache, client):
+    put_legacy_set(client, 'legacy', '[1, 2]', ttl=int(time.time()) - 10)
+    assert await cache.srem('legacy', 1) == 0
+    assert not exists(client, 'legacy')
+
+
+# ttl enforcement & expiry index
+
+def put_value(client, key: str, val: str, ttl: int):
+    client.put_item(TableName=TABLE_CACHE, Item={
+        'cache_key': {'S': key},
+        'value': {'S': val},
+        'ttl': {'N': str(ttl)},
+    })
+
+
+def clock(monkeypatch, secs_later: float):
+    now = time.time() + secs_later
+    monkeypatch.setattr(dynamodb_cache_adapter, 'time', SimpleNamespace(time=lambda: now))
+
+
+async def test_expired_item_is_a_miss(cache, client):
+    # written by another instance, not yet deleted by DynamoDB
+    put_value(client, 'k', 'v', ttl=int(time.time()) - 10)
+    put_value(client, 'alive', 'v', ttl=int(time.time()) + 60)
+
+    assert await cache.get('k') is None
+    assert await cache.mget(['k', 'alive']) == {'k': None, 'alive': 'v'}
+    assert cache.stats()['expired_reads'] == 2
+    assert cache.stats()['short_circuits'] == 0
+
+
+async def test_known_expired_key_skips_one_read(cache, client, monkeypatch):
+    await cache.set('k', 'v', 60)
+    await cache.sadd('s', [1], ex=60)
+    assert await cache.get('k') == 'v'
+
+    clock(monkeypatch, 120)
+    # answered by the expiry index: no item is read
+    assert await cache.get('k') is None
+    assert await cache.msmembers(['s']) == {'s': None}
+    assert cache.stats()['short_circuits'] == 2
+    assert cache.stats()['expired_reads'] == 0
+
+    # once only: another instance may have rewritten the key with a fresh TTL
+    assert await cache.mget(['k']) == {'k': None}
+    assert await cache.smembers('s') is None
+    assert cache.stats()['short_circuits'] == 2
+    assert cache.stats()['expired_reads'] == 2
+
+
+async def test_expiry_index_is_cleared(cache, client, monkeypatch):
+    await cache.set('no_ex', 'v', 60)
+    await cache.set('no_ex', 'v2')
+    await cache.set('deleted', 'v', 60)
+    await cache.delete('deleted')
+    put_value(client, 'deleted', 'v3', ttl=int(time.time()) + 600)
+
+    clock(monkeypatch, 120)
+    assert await cache.get('no_ex') == 'v2'
+    assert await cache.get('deleted') == 'v3'
+    assert cache.stats()['short_circuits'] == 0
@@ -0,0 +1,41 @@
+import time
+from src.infra.cache.negative_cache import NegativeCache, CLOSED, NOT_FOUND, JOB, RESUME
+
+
+def test_set_get_invalidate():
+    negative = NegativeCache(max_size=10, ttl=60)
+    assert negative.get(JOB, 1, 2) is None
+
+    assert negative.set(negative.token(), CLOSED, JOB, 1, 2)
+    assert negative.get(JOB, 1, 2) == CLOSED
+    assert negative.get(RESUME, 1, 2) is None
+
+    negative.invalidate(JOB, 1, 2)
+    assert negative.get(JOB, 1, 2) is None
+
+
+def test_token_blocks_a_write_after_an_invalidation():
+    negative = NegativeCache(max_size=10, ttl=60)
+    token = negative.token()
+    # the job is enabled while the (closed) page is loaded
+    negative.invalidate(JOB, 1, 2)
+
+    assert not negative.set(token, CLOSED, JOB, 1, 2)
+    assert negative.get(JOB, 1, 2) is None
+
+    # a load started after the invalidation is cached
+    assert negative.set(negative.token(), CLOSED, JOB, 1, 2)
+    assert negative.stats()['invalidations'] == 1
+
+
+def test_ttl_and_size_bound():
+    negative = NegativeCache(max_size=2, ttl=0.05)
+    for i in range(3):
+        negative.set(negative.token(), NOT_FOUND, RESUME, 1, i)
+
+    assert negative.get(RESUME, 1, 0) is None
+    assert negative.get(RESUME, 1, 2) == NOT_FOUND
+    assert negative.stats()['evictions'] == 1
+
+    time.sleep(0.06)
+    assert negative.get(RESUME, 1, 2) is None
@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from src.infra.cache.page_prefetcher import PagePrefetcher
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class Upstream:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.calls = []
+
+    async def fetch(self, page: bytes) -> bytes:
+        self.calls.append(page)
+        await asyncio.sleep(self.delay)
+        if page == b'error':
+            raise Exception('upstream error')
+        return page
+
+
+def prefetcher(**kwargs) -> PagePrefetcher:
+    kwargs = {'ttl': 60, 'max_pages': 10, 'max_bytes': 1000, 'max_concurrency': 2, **kwargs}
+    return PagePrefetcher(**kwargs)
+
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def test_prefetched_page_is_served():
+    upstream, p = Upstream(), prefetcher()
+    assert p.prefetch('p2', upstream.fetch, b'page-2')
+    await settle()
+
+    assert await p.get('p2') == b'page-2'
+    assert await p.get('p2') == b'page-2'
+    assert await p.get('p3') is None
+    stats = p.stats()
+    assert (stats['hits'], stats['misses'], stats['used'], stats['prefetched']) == (2, 1, 1, 1)
+    # already prefetched
+    assert not p.prefetch('p2', upstream.fetch, b'page-2')
+    assert len(upstream.calls) == 1
+
+
+async def test_in_flight_page_is_awaited():
+    upstream, p = Upstream(delay=0.02), prefetcher()
+    p.prefetch('p2', upstream.fetch, b'page-2')
+
+    assert await p.get('p2') == b'page-2'
+    assert p.stats()['inflight_hits'] == 1
+    assert len(upstream.calls) == 1
+
+
+async def test_concurrency_budget():
+    upstream, p = Upstream(delay=0.02), prefetcher(max_concurrency=2)
+    assert p.prefetch('p1', upstream.fetch, b'1')
+    assert p.prefetch('p2', upstream.fetch, b'2')
+    # dropped, not queued
+    assert not p.prefetch('p3', upstream.fetch, b'3')
+    assert p.stats()['in_flight'] == 2
+    assert p.stats()['dropped'] == 1
+
+    await asyncio.sleep(0.05)
+    assert p.stats()['in_flight'] == 0
+    assert p.prefetch('p3', upstream.fetch, b'3')
+    await settle()
+    assert upstream.calls == [b'1', b'2', b'3']
+
+
+async def test_byte_budget_drops_the_oldest_pages():
+    upstream, p = Upstream(), prefetcher(max_bytes=10, max_concurrency=10)
+    for key in ('a', 'b', 'c'):
+        p.prefetch(key, upstream.fetch, key.encode() * 4)
+        await settle()
+
+    # 12 bytes > 10: "a" is dropped unused
+    assert p.stats()['bytes'] == 8
+    assert await p.get('a') is None
+    assert await p.get('c') == b'cccc'
+    assert p.stats()['wasted'] == 1
+
+    # a page over the whole budget is never held
+    p.prefetch('big', upstream.fetch, b'x' * 11)
+    await settle()
+    assert p.stats()['pages'] == 2
+    assert p.stats()['dropped'] == 1
+
+
+async def test_page_budget():
+    upstream, p = Upstream(), prefetcher(max_pages=2, max_concurrency=10)
+    for key in ('a', 'b', 'c'):
+        p.prefetch(key, upstream.fetch, b'x')
+        await settle()
+
+    assert p.stats()['pages'] == 2
+    assert await p.get('a') is None
+
+
+async def test_expired_unused_page_is_wasted():
+    upstream, p = Upstream(), prefetcher(ttl=0.02)
+    p.prefetch('used', upstream.fetch, b'1')
+    p.prefetch('unused', upstream.fetch, b'2')
+    await settle()
+    assert await p.get('used') == b'1'
+
+    await asyncio.sleep(0.03)
+    assert await p.get('used') is None
+    stats = p.stats()
+    assert (stats['pages'], stats['used'], stats['wasted']) == (0, 1, 1)
+
+
+async def test_failed_prefetch():
+    upstream, p = Upstream(), prefetcher()
+    p.prefetch('p', upstream.fetch, b'error')
+
+    assert await p.get('p') is None
+    assert p.stats()['failed'] == 1
+    assert p.stats()['pages'] == 0
@@ -0,0 +1,158 @@
+import time
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.infra.utils.single_flight import SingleFlight
+from src.infra.cache import read_through_cache
+from src.infra.cache.read_through_cache import ReadThroughCache, ENVELOPE
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class MemoryCache:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key, None)
+
+    async def set(self, key, val, ex=None):
+        self.data[key] = val
+
+
+class Loader:
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    async def load(self, val):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise ConnectionError('upstream')
+        return f'{val}:{self.calls}'
+
+
+def cached(cache: MemoryCache, key: str, value, soft_in: float, delta: float = 0.01):
+    cache.data[key] = {ENVELOPE: 1, 'value': value, 'soft': time.time() + soft_in, 'delta': delta}
+
+
+def read_through(cache, beta: float = 0.0, refresh_inline: bool = False) -> ReadThroughCache:
+    return ReadThroughCache(cache, flight=SingleFlight(), beta=beta, refresh_inline=refresh_inline)
+
+
+async def settle(rt: ReadThroughCache):
+    for _ in range(100):
+        if rt.stats()['refreshing'] == 0:
+            return
+        await asyncio.sleep(0.01)
+
+
+async def test_missed_is_loaded_once():
+    cache, loader = MemoryCache(), Loader()
+    rt = read_through(cache)
+    results = await asyncio.gather(*[rt.get('k', loader.load, 'v', ttl=60) for _ in range(10)])
+
+    assert results == ['v:1'] * 10
+    assert loader.calls == 1
+    assert cache.data['k']['value'] == 'v:1'
+    assert cache.data['k']['soft'] > time.time() + 59
+    assert rt.stats()['misses'] == 10
+
+
+async def test_fresh_is_not_refreshed():
+    cache, loader = MemoryCache(), Loader()
+    cached(cache, 'k', 'old', soft_in=60)
+    rt = read_through(cache)
+
+    assert await rt.get('k', loader.load, 'v', ttl=60) == 'old'
+    assert loader.calls == 0
+    assert rt.stats()['hits'] == 1
+
+
+async def test_stale_is_served_and_refreshed_in_background():
+    cache, loader = MemoryCache(), Loader()
+    cached(cache, 'k', 'old', soft_in=-1)
+    rt = read_through(cache)
+
+    assert await rt.get('k', loader.load, 'v', ttl=60) == 'old'
+    assert await rt.get('k', loader.load, 'v', ttl=60) == 'old'
+    await settle(rt)
+
+    # one refresh for both stale reads
+    assert loader.calls == 1
+    assert cache.data['k']['value'] == 'v:1'
+    assert rt.stats()['stale'] == 2
+
+
+async def test_failed_background_refresh_keeps_the_stale_value():
+    cache, loader = MemoryCache(), Loader(fail=True)
+    cached(cache, 'k', 'old', soft_in=-1)
+    rt = read_through(cache)
+
+    assert await rt.get('k', loader.load, 'v', ttl=60) == 'old'
+    await settle(rt)
+    assert cache.data['k']['value'] == 'old'
+
+
+@pytest.fixture
+def rand(monkeypatch):
+    # -log(1 - 0.5) ~ 0.69
+    monkeypatch.setattr(read_through_cache, 'random', SimpleNamespace(random=lambda: 0.5))
+
+
+async def test_early_refresh(rand):
+    cache, loader = MemoryCache(), Loader()
+    # fresh for 1s, but the loading took 10s: 10 * 0.69 >= 1, refreshed early
+    cached(cache, 'k', 'old', soft_in=1, delta=10)
+    rt = read_through(cache, beta=1.0)
+
+    assert await rt.get('k', loader.load, 'v', ttl=60) == 'old'
+    await settle(rt)
+    assert loader.calls == 1
+    assert rt.stats()['early'] == 1
+
+
+async def test_no_early_refresh_far_from_expiry(rand):
+    cache, loader = MemoryCache(), Loader()
+    cached(cache, 'k', 'old', soft_in=3600, delta=0.001)
+    rt = read_through(cache, beta=1.0)
+
+    for _ in range(20):
+        await rt.get('k', loader.load, 'v', ttl=60)
+    assert loader.calls == 0
+
+
+async def test_inline_refresh():
+    cache, loader = MemoryCache(), Loader()
+    cached(cache, 'k', 'old', soft_in=-1)
+    rt = read_through(cache, refresh_inline=True)
+
+    # refreshed before returning, no background task
+    assert await rt.get('k', loader.load, 'v', ttl=60) == 'v:1'
+    assert rt.stats()['refreshing'] == 0
+    assert cache.data['k']['value'] == 'v:1'
+
+
+async def test_inline_refresh_fail_serves_the_stale_value():
+    cache, loader = MemoryCache(), Loader(fail=True)
+    cached(cache, 'k', 'old', soft_in=-1)
+    rt = read_through(cache, refresh_inline=True)
+
+    assert await rt.get('k', loader.load, 'v', ttl=60) == 'old'
+    assert cache.data['k']['value'] == 'old'
+
+
+async def test_plain_cached_value_is_served():
+    cache, loader = MemoryCache(), Loader()
+    cache.data['k'] = {'written': 'by cache.set'}
+    rt = read_through(cache)
+
+    assert await rt.get('k', loader.load, 'v', ttl=60) == {'written': 'by cache.set'}
+    assert loader.calls == 0
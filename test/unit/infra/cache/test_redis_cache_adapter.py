@@ -0,0 +1,143 @@
+import pytest
+from fakeredis import FakeAsyncRedis
+from src.infra.cache.redis_cache_adapter import RedisCacheAdapter, SET_SENTINEL
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class FakeRedisResource:
+    def __init__(self):
+        self.redis = FakeAsyncRedis(decode_responses=True)
+
+    async def access(self, **kwargs):
+        return self.redis
+
+
+@pytest.fixture
+def resource():
+    return FakeRedisResource()
+
+
+@pytest.fixture
+def cache(resource):
+    return RedisCacheAdapter(resource)
+
+
+async def test_get_set(cache):
+    assert await cache.get('missing') is None
+
+    await cache.set('str', 'text')
+    await cache.set('dict', {'a': 1, 'b': [1, 2]})
+    await cache.set('list', [1, 'x'])
+    assert await cache.get('str') == 'text'
+    assert await cache.get('dict') == {'a': 1, 'b': [1, 2]}
+    assert await cache.get('list') == [1, 'x']
+
+
+@pytest.mark.parametrize('val', [
+    0, 12, -3, 1.5, True, False, None,
+    '', 'text', '{"a": 1}', '[1]', '123', 'true',
+    {'a': 1, 'b': [1, 2], 'c': None}, [1, 'x', {'y': False}],
+])
+async def test_round_trip(cache, val):
+    await cache.set('k', val)
+    result = await cache.get('k')
+    assert result == val
+    assert type(result) is type(val)
+
+    await cache.mset([('m', val, None)])
+    assert (await cache.mget(['m']))['m'] == val
+
+
+async def test_legacy_plain_string(cache, resource):
+    await resource.redis.set('legacy', 'plain text')
+    assert await cache.get('legacy') == 'plain text'
+
+
+async def test_set_ttl(cache, resource):
+    await cache.set('k', 'v', ex=60)
+    await cache.set('no_ttl', 'v')
+    assert 0 < await resource.redis.ttl('k') <= 60
+    assert await resource.redis.ttl('no_ttl') == -1
+
+
+async def test_mget(cache):
+    await cache.set('a', {'x': 1})
+    await cache.set('b', 'text')
+    assert await cache.mget(['a', 'b', 'missing']) == {'a': {'x': 1}, 'b': 'text', 'missing': None}
+    assert await cache.mget([]) == {}
+
+
+async def test_mset(cache, resource):
+    assert await cache.mset([('a', {'x': 1}, 60), ('b', [1, 2], None), ('c', 'text', 0)])
+    assert await cache.mget(['a', 'b', 'c']) == {'a': {'x': 1}, 'b': [1, 2], 'c': 'text'}
+    assert 0 < await resource.redis.ttl('a') <= 60
+    assert await resource.redis.ttl('b') == -1
+    assert await resource.redis.ttl('c') == -1
+
+
+async def test_delete_mdelete(cache):
+    await cache.mset([('a', 1, None), ('b', 2, None), ('c', 3, None)])
+    await cache.delete('a')
+    assert await cache.get('a') is None
+
+    await cache.mdelete(['b', 'c', 'missing'])
+    assert await cache.mget(['b', 'c']) == {'b': None, 'c': None}
+    await cache.mdelete([])
+
+
+async def test_sadd_smembers(cache, resource):
+    assert await cache.sadd('s', [1, 2, 2, 3], ex=60) == 3
+    assert await cache.sadd('s', [3, 4]) == 1
+    # the members are numbers, the sentinel is hidden
+    assert await cache.smembers('s') == {1, 2, 3, 4}
+    assert SET_SENTINEL in await resource.redis.smembers('s')
+    assert 0 < await resource.redis.ttl('s') <= 60
+
+
+async def test_members_coercion(cache):
+    await cache.sadd('s', [12, -3, 'abc'])
+    assert await cache.smembers('s') == {12, -3, 'abc'}
+
+
+async def test_missing_set_vs_empty_set(cache):
+    # not cached
+    assert await cache.smembers('missing') is None
+
+    # cached, but empty
+    assert await cache.sadd('empty', [], ex=60) == 0
+    assert await cache.smembers('empty') == set()
+
+    # all members removed, still cached
+    await cache.sadd('s', [1])
+    assert await cache.srem('s', 1) == 1
+    assert await cache.smembers('s') == set()
+
+
+async def test_srem_sismember(cache, resource):
+    await cache.sadd('s', [1, 2])
+    assert await cache.sismember('s', 1)
+    assert await cache.srem('s', 1, ex=60) == 1
+    assert await cache.srem('s', 1) == 0
+    assert not await cache.sismember('s', 1)
+    assert 0 < await resource.redis.ttl('s') <= 60
+
+    # no set is created for a missing key
+    assert await cache.srem('missing', 1, ex=60) == 0
+    assert not await resource.redis.exists('missing')
+
+
+async def test_msmembers(cache):
+    await cache.sadd('a', [1, 2])
+    await cache.sadd('empty', [])
+    assert await cache.msmembers(['a', 'empty', 'missing']) == {
+        'a': {1, 2},
+        'empty': set(),
+        'missing': None,
+    }
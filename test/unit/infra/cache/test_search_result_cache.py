@@ -0,0 +1,40 @@
+import time
+from src.infra.cache.search_result_cache import SearchResultCache
+
+
+def test_admitted_at_min_hits():
+    results = SearchResultCache(ttl=60, max_size=10, min_hits=3, admission_window=60)
+
+    assert not results.admit('q', b'page')
+    assert not results.admit('q', b'page')
+    assert results.get('q') is None and 'q' not in results
+
+    assert results.admit('q', b'page')
+    assert results.get('q') == b'page' and 'q' in results
+    stats = results.stats()
+    assert (stats['admitted'], stats['rejected'], stats['tracked_queries']) == (1, 2, 0)
+
+
+def test_min_hits_of_one_admits_at_once():
+    results = SearchResultCache(ttl=60, max_size=10, min_hits=1, admission_window=60)
+    assert results.admit('q', b'page')
+    assert results.get('q') == b'page'
+
+
+def test_hits_out_of_the_window_are_forgotten():
+    results = SearchResultCache(ttl=60, max_size=10, min_hits=2, admission_window=0.02)
+    assert not results.admit('q', b'page')
+    time.sleep(0.03)
+    assert not results.admit('q', b'page')
+    assert results.admit('q', b'page')
+
+
+def test_ttl_and_size_bound():
+    results = SearchResultCache(ttl=0.02, max_size=2, min_hits=1, admission_window=60)
+    for key in ('a', 'b', 'c'):
+        results.admit(key, key.encode())
+
+    assert results.get('a') is None
+    assert results.get('c') == b'c'
+    time.sleep(0.03)
+    assert results.get('c') is None
@@ -0,0 +1,136 @@
+import asyncio
+import pytest
+from fakeredis import FakeAsyncRedis
+from src.configs.conf import parse_ttl_policies, LOCAL_CACHE_TTL, LOCAL_CACHE_POLICIES
+from src.infra.cache.redis_cache_adapter import RedisCacheAdapter
+from src.infra.cache.two_tier_cache_adapter import TwoTierCacheAdapter
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class FakeRedisResource:
+    def __init__(self):
+        self.redis = FakeAsyncRedis(decode_responses=True)
+
+    async def access(self, **kwargs):
+        return self.redis
+
+
+@pytest.fixture
+def backend():
+    return RedisCacheAdapter(FakeRedisResource())
+
+
+@pytest.fixture
+def cache(backend):
+    return TwoTierCacheAdapter(backend, max_size=100, ttl=0,
+                               policies={'ref': 60, 'ref:private': 0, 'short': 0.05})
+
+
+# policies
+
+def test_parse_ttl_policies():
+    assert parse_ttl_policies('a:=0; b=1.5;;c=d=60') == {'a:': 0.0, 'b': 1.5, 'c=d': 60.0}
+    assert parse_ttl_policies('') == {}
+    assert parse_ttl_policies(None) == {}
+
+
+def test_longest_prefix_wins(cache):
+    assert cache.local_ttl('ref:1') == 60
+    assert cache.local_ttl('ref:private:1') == 0
+    assert cache.local_ttl('other') == 0
+
+
+def test_user_keys_are_not_cached_locally_by_default(backend):
+    cache = TwoTierCacheAdapter(backend, max_size=100, ttl=LOCAL_CACHE_TTL, policies=LOCAL_CACHE_POLICIES)
+    # auth record, email token, reset-password token, star-tracker set, payment
+    for key in ('12345', 'someone@mail.com', 'someone@mail.com:reset_pw', 'c:1:follow:jids', 'pay:1'):
+        assert cache.local_ttl(key) == 0
+
+    assert cache.local_ttl('pubkey_1') > 0
+
+
+# reads/writes
+
+async def test_served_locally(cache, backend):
+    await backend.set('ref:1', {'a': 1})
+    assert await cache.get('ref:1') == {'a': 1}
+
+    # changed in the backend only: the local copy is served
+    await backend.set('ref:1', {'a': 2})
+    assert await cache.get('ref:1') == {'a': 1}
+    assert cache.stats()['hits'] == 1
+
+
+async def test_bypass(cache, backend):
+    await backend.set('other', 1)
+    assert await cache.get('other') == 1
+    await backend.set('other', 2)
+    assert await cache.get('other') == 2
+    assert cache.stats()['bypass'] == 2
+    assert len(cache.local) == 0
+
+
+async def test_local_ttl(cache, backend):
+    await cache.set('short', 1)
+    await backend.set('short', 2)
+    assert await cache.get('short') == 1
+
+    await asyncio.sleep(0.06)
+    assert await cache.get('short') == 2
+
+
+async def test_missed_is_not_cached_locally(cache, backend):
+    assert await cache.get('ref:1') is None
+    await backend.set('ref:1', 1)
+    assert await cache.get('ref:1') == 1
+
+
+async def test_values_are_copied(cache):
+    await cache.set('ref:1', {'items': [1]})
+    val = await cache.get('ref:1')
+    val['items'].append(2)
+    assert await cache.get('ref:1') == {'items': [1]}
+
+
+async def test_writes_refresh_or_evict_the_local_copy(cache, backend):
+    await cache.set('ref:1', 1)
+    await cache.set('ref:1', 2)
+    assert await cache.get('ref:1') == 2
+
+    await cache.delete('ref:1')
+    assert await cache.get('ref:1') is None
+
+    await cache.mset([('ref:1', 1, None), ('ref:2', 2, None)])
+    await cache.mdelete(['ref:1'])
+    assert await cache.mget(['ref:1', 'ref:2']) == {'ref:1': None, 'ref:2': 2}
+
+
+async def test_mget_mixes_local_and_backend(cache, backend):
+    await cache.set('ref:1', 1)
+    await backend.set('other', 2)
+    assert await cache.mget(['ref:1', 'other', 'missing']) == {'ref:1': 1, 'other': 2, 'missing': None}
+    assert cache.stats()['hits'] == 1
+
+
+async def test_sets(cache, backend):
+    await cache.sadd('ref:s', [1, 2])
+    assert await cache.smembers('ref:s') == {1, 2}
+    assert await cache.sismember('ref:s', 1)
+
+    # the local copy is evicted on write
+    await cache.srem('ref:s', 1)
+    assert await cache.smembers('ref:s') == {2}
+    assert await cache.msmembers(['ref:s', 'missing']) == {'ref:s': {2}, 'missing': None}
+
+
+def test_evict_local(cache):
+    cache.local.set('ref:1', 1, 60)
+    assert cache.evict_local(['ref:1', 'ref:2']) == 1
+    assert cache.local.get('ref:1') is None
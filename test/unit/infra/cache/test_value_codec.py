@@ -0,0 +1,93 @@
+import pytest
+from src.configs.exceptions import ServerException
+from src.infra.cache import value_codec as codec
+from src.infra.cache.value_codec import (
+    ValueCodec,
+    VERSION,
+    FORMAT_JSON,
+    FORMAT_MSGPACK,
+    COMPRESSION_NONE,
+    COMPRESSION_ZLIB,
+    COMPRESSION_ZSTD,
+)
+
+
+VALUES = [
+    None,
+    0,
+    'text',
+    ['a', 1, 2.5, True],
+    {'jid': 1, 'tags': ['english', '日本語'], 'nested': {'a': None}},
+]
+
+LARGE = {'items': [{'jid': i, 'title': 'English teacher'} for i in range(200)]}
+
+
+@pytest.mark.parametrize('val', VALUES)
+@pytest.mark.parametrize('compression', ['none', 'zlib'])
+def test_json_round_trip(val, compression):
+    c = ValueCodec(format='json', compression=compression, compress_threshold=0)
+    assert c.decode(c.encode(val)) == val
+
+
+def test_default_is_json_zlib():
+    c = ValueCodec()
+    data = c.encode(LARGE)
+    assert data[:3] == bytes((VERSION, FORMAT_JSON, COMPRESSION_ZLIB))
+    assert c.decode(data) == LARGE
+
+
+def test_small_values_are_not_compressed():
+    c = ValueCodec(format='json', compression='zlib', compress_threshold=1024)
+    data = c.encode({'a': 1})
+    assert data[2] == COMPRESSION_NONE
+    assert c.decode(data) == {'a': 1}
+
+
+def test_incompressible_values_are_kept_uncompressed():
+    c = ValueCodec(format='json', compression='zlib', compress_threshold=0)
+    data = c.encode('x')
+    assert data[2] == COMPRESSION_NONE
+
+
+def test_decoded_by_the_header_not_by_the_settings():
+    written = ValueCodec(format='json', compression='zlib', compress_threshold=0).encode(LARGE)
+    reader = ValueCodec(format='json', compression='none')
+    assert reader.decode(written) == LARGE
+
+
+def test_unknown_version():
+    with pytest.raises(ServerException):
+        ValueCodec().decode(bytes((VERSION + 1, FORMAT_JSON, COMPRESSION_NONE)) + b'{}')
+
+
+def test_too_short():
+    with pytest.raises(ServerException):
+        ValueCodec().decode(b'\x01')
+
+
+def test_msgpack_falls_back_to_json_if_not_installed(monkeypatch):
+    monkeypatch.setattr(codec, 'msgpack', None)
+    monkeypatch.setattr(codec, 'zstandard', None)
+    c = ValueCodec(format='msgpack', compression='zstd', compress_threshold=0)
+    data = c.encode(LARGE)
+    assert data[:3] == bytes((VERSION, FORMAT_JSON, COMPRESSION_ZLIB))
+    assert c.decode(data) == LARGE
+
+
+def test_msgpack_value_without_msgpack(monkeypatch):
+    monkeypatch.setattr(codec, 'msgpack', None)
+    with pytest.raises(ServerException):
+        ValueCodec().decode(bytes((VERSION, FORMAT_MSGPACK, COMPRESSION_NONE)) + b'\x80')
+
+
+@pytest.mark.parametrize('val', VALUES + [LARGE])
+def test_msgpack_zstd_round_trip(val):
+    pytest.importorskip('msgpack')
+    pytest.importorskip('zstandard')
+    c = ValueCodec(format='msgpack', compression='zstd', compress_threshold=0)
+    data = c.encode(val)
+    assert data[1] == FORMAT_MSGPACK
+    assert c.decode(data) == val
+    if val is LARGE:
+        assert data[2] == COMPRESSION_ZSTD
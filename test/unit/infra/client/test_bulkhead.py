@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+from src.configs.exceptions import ServiceUnavailableException
+from src.infra.client.bulkhead import Bulkhead, BulkheadRegistry, parse_limits
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+async def hold(bulkhead: Bulkhead, release: asyncio.Event, order: list = None, name: str = None):
+    async with bulkhead:
+        if order is not None:
+            order.append(name)
+        await release.wait()
+
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def test_in_flight_limit_and_fifo_handoff():
+    bulkhead = Bulkhead('payment', max_in_flight=2, max_queue=10, queue_timeout=1)
+    release, order = asyncio.Event(), []
+    tasks = []
+    for name in 'abcde':
+        tasks.append(asyncio.create_task(hold(bulkhead, release, order, name)))
+        await settle()
+
+    assert order == ['a', 'b']
+    assert (bulkhead.in_flight, bulkhead.queue_depth) == (2, 3)
+
+    release.set()
+    await asyncio.gather(*tasks)
+    # the queued ones are admitted in arrival order
+    assert order == ['a', 'b', 'c', 'd', 'e']
+    stats = bulkhead.stats()
+    assert (stats['in_flight'], stats['queue_depth'], stats['admitted'], stats['queued']) == (0, 0, 5, 3)
+
+
+async def test_rejected_when_the_queue_is_full():
+    bulkhead = Bulkhead('payment', max_in_flight=1, max_queue=1, queue_timeout=1)
+    release = asyncio.Event()
+    running = asyncio.create_task(hold(bulkhead, release))
+    queued = asyncio.create_task(hold(bulkhead, release))
+    await settle()
+
+    with pytest.raises(ServiceUnavailableException) as e:
+        await bulkhead.acquire()
+    assert (e.value.msg, e.value.data) == ('upstream_busy', 'payment')
+    assert bulkhead.stats()['rejected'] == 1
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert bulkhead.in_flight == 0
+
+
+async def test_queue_timeout():
+    bulkhead = Bulkhead('payment', max_in_flight=1, max_queue=10, queue_timeout=0.02)
+    release = asyncio.Event()
+    running = asyncio.create_task(hold(bulkhead, release))
+    await settle()
+
+    with pytest.raises(ServiceUnavailableException):
+        await bulkhead.acquire()
+    assert bulkhead.stats()['timeouts'] == 1
+    assert bulkhead.queue_depth == 0
+
+    # the slot is not leaked
+    release.set()
+    await running
+    assert bulkhead.in_flight == 0
+    async with bulkhead:
+        assert bulkhead.in_flight == 1
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    bulkhead = Bulkhead('payment', max_in_flight=1, max_queue=10, queue_timeout=1)
+    release, order = asyncio.Event(), []
+    running = asyncio.create_task(hold(bulkhead, release, order, 'a'))
+    await settle()
+    cancelled = asyncio.create_task(hold(bulkhead, release, order, 'b'))
+    waiting = asyncio.create_task(hold(bulkhead, release, order, 'c'))
+    await settle()
+
+    cancelled.cancel()
+    await settle()
+    assert bulkhead.queue_depth == 1
+
+    release.set()
+    await asyncio.gather(running, waiting)
+    assert order == ['a', 'c']
+    assert bulkhead.in_flight == 0
+
+
+def test_registry_by_the_longest_host():
+    registry = BulkheadRegistry({
+        'https://api.example.com': 'match',
+        'https://api.example.com/payment': 'payment',
+        'https://auth.example.com': 'auth',
+    }, limits='payment:3:5:0.5;invalid')
+
+    assert registry.get('https://api.example.com/payment/stripe').name == 'payment'
+    assert registry.get('https://api.example.com/teachers/1').name == 'match'
+    assert registry.get('https://other.example.com/') is None
+    payment = registry.get('https://api.example.com/payment')
+    assert (payment.max_in_flight, payment.max_queue, payment.queue_timeout) == (3, 5, 0.5)
+    assert set(registry.snapshot().keys()) == {'match', 'payment', 'auth'}
+
+
+def test_parse_limits():
+    assert parse_limits('payment:3:5:0.5; search:10:20:1 ;bad:1') == {
+        'payment': (3, 5, 0.5),
+        'search': (10, 20, 1.0),
+    }
@@ -0,0 +1,144 @@
+import pytest
+from src.configs.conf import HTTP_TIMEOUT, ADAPTIVE_TIMEOUT_MIN
+from src.configs.exceptions import ServiceUnavailableException
+from src.infra.client import circuit_breaker as cb
+from src.infra.client.circuit_breaker import CircuitBreaker, BreakerState
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    monkeypatch.setattr(cb, 'CB_ENABLE', True)
+    monkeypatch.setattr(cb, 'CB_MIN_CALLS', 10)
+    monkeypatch.setattr(cb, 'CB_ERROR_RATE', 0.5)
+    monkeypatch.setattr(cb, 'CB_SLOW_CALL_SECS', 5.0)
+    monkeypatch.setattr(cb, 'CB_SLOW_RATE', 0.8)
+    monkeypatch.setattr(cb, 'CB_OPEN_SECS', 60.0)
+    monkeypatch.setattr(cb, 'CB_HALF_OPEN_CALLS', 2)
+    monkeypatch.setattr(cb, 'ADAPTIVE_TIMEOUT_ENABLE', True)
+    monkeypatch.setattr(cb, 'ADAPTIVE_TIMEOUT_MIN_SAMPLES', 20)
+    return CircuitBreaker('upstream')
+
+
+def call(breaker: CircuitBreaker, ok: bool = True, latency: float = 0.1):
+    breaker.before_call()
+    if ok:
+        breaker.on_success(latency)
+    else:
+        breaker.on_failure(latency)
+
+
+def open_breaker(breaker: CircuitBreaker):
+    for _ in range(10):
+        call(breaker, ok=False)
+    assert breaker.state == BreakerState.OPEN
+
+
+# state transitions
+
+def test_opens_on_the_error_rate(breaker):
+    for _ in range(5):
+        call(breaker)
+    for _ in range(4):
+        call(breaker, ok=False)
+    # 4/9, and below the min calls
+    assert breaker.state == BreakerState.CLOSED
+
+    call(breaker, ok=False)
+    assert breaker.state == BreakerState.OPEN
+    with pytest.raises(ServiceUnavailableException):
+        breaker.before_call()
+    assert breaker.rejected == 1
+
+
+def test_opens_on_the_slow_rate(breaker):
+    for _ in range(8):
+        call(breaker, latency=6.0)
+    call(breaker)
+    assert breaker.state == BreakerState.CLOSED
+
+    call(breaker, latency=6.0)
+    assert breaker.state == BreakerState.OPEN
+
+
+def test_half_open_trials_close_it(breaker, monkeypatch):
+    open_breaker(breaker)
+    monkeypatch.setattr(cb, 'CB_OPEN_SECS', 0.0)
+
+    breaker.before_call()
+    assert breaker.state == BreakerState.HALF_OPEN
+    breaker.before_call()
+    # only 2 trial calls in flight
+    with pytest.raises(ServiceUnavailableException):
+        breaker.before_call()
+
+    breaker.on_success(0.1)
+    assert breaker.state == BreakerState.HALF_OPEN
+    breaker.on_success(0.1)
+    assert breaker.state == BreakerState.CLOSED
+    # the window starts over
+    call(breaker, ok=False)
+    assert breaker.state == BreakerState.CLOSED
+
+
+def test_half_open_failure_opens_it_again(breaker, monkeypatch):
+    open_breaker(breaker)
+    monkeypatch.setattr(cb, 'CB_OPEN_SECS', 0.0)
+
+    call(breaker, ok=False)
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.opened == 2
+
+
+def test_cancelled_trial_frees_its_slot(breaker, monkeypatch):
+    open_breaker(breaker)
+    monkeypatch.setattr(cb, 'CB_OPEN_SECS', 0.0)
+
+    breaker.before_call()
+    breaker.before_call()
+    breaker.on_cancel()
+    breaker.before_call()
+    assert breaker.state == BreakerState.HALF_OPEN
+
+
+# adaptive timeout
+
+def test_timeout_adapts_to_the_latency(breaker):
+    assert breaker.timeout() == HTTP_TIMEOUT
+    for _ in range(19):
+        call(breaker, latency=1.0)
+    assert breaker.timeout() == HTTP_TIMEOUT
+
+    call(breaker, latency=1.0)
+    # p99 * 3, within [ADAPTIVE_TIMEOUT_MIN, HTTP_TIMEOUT]
+    assert breaker.timeout() == pytest.approx(3.0)
+    assert breaker.timeout('POST') == HTTP_TIMEOUT
+
+
+def test_timeout_is_clamped(breaker):
+    for _ in range(20):
+        call(breaker, latency=0.01)
+    assert breaker.timeout() == ADAPTIVE_TIMEOUT_MIN
+
+
+def test_timed_out_calls_grow_the_timeout_back(breaker):
+    for _ in range(20):
+        call(breaker, latency=0.01)
+    timeout = breaker.timeout()
+    assert timeout == ADAPTIVE_TIMEOUT_MIN
+
+    # the upstream slows down past the timeout
+    breaker.before_call()
+    breaker.on_failure(timeout, timeout=timeout)
+    assert breaker.timeout() == pytest.approx(min(timeout * 3, HTTP_TIMEOUT))
+    assert breaker.timeout() > timeout
+
+
+def test_timeout_is_not_recomputed_on_every_call(breaker, monkeypatch):
+    adaptations = []
+    percentile = breaker.latency.percentile
+    monkeypatch.setattr(breaker.latency, 'percentile', lambda p: adaptations.append(p) or percentile(p))
+
+    # more than the latency window (200)
+    for _ in range(300):
+        call(breaker)
+    assert len(adaptations) == 300 // 20
@@ -0,0 +1,50 @@
+import json
+import pytest
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+from src.configs.exceptions import ServerException
+from src.infra.client.data_envelope import decode_data
+
+
+class ItemVO(BaseModel):
+    id: int
+    name: Optional[str] = None
+    tags: List[str] = []
+
+
+def body(data, code: str = '0', msg: str = 'ok') -> bytes:
+    return json.dumps({'code': code, 'msg': msg, 'data': data}).encode()
+
+
+def test_decode_into_a_model():
+    content = body({'id': 1, 'name': '名稱', 'tags': ['a'], 'extra': True})
+    item = decode_data(content, ItemVO)
+    assert item == ItemVO(id=1, name='名稱', tags=['a'])
+    # the same as validating the dict of the "data"
+    assert item == ItemVO.model_validate(json.loads(content)['data'])
+
+
+def test_decode_into_a_generic_type():
+    content = body([{'id': 1}, {'id': 2, 'tags': ['x']}])
+    assert decode_data(content, List[ItemVO]) == [ItemVO(id=1), ItemVO(id=2, tags=['x'])]
+    assert decode_data(body({'a': 1}), Dict[str, int]) == {'a': 1}
+    assert decode_data(body(None), Optional[ItemVO]) is None
+
+
+def test_envelopes_are_cached_per_model():
+    assert decode_data(body({'id': 1}), ItemVO) == decode_data(body({'id': 1}), ItemVO)
+    assert decode_data(body([{'id': 1}]), List[ItemVO]) == [ItemVO(id=1)]
+
+
+@pytest.mark.parametrize('content', [
+    body({'name': 'no id'}),
+    body({'id': 'not a number'}),
+    body(None),
+    json.dumps({'code': '0', 'msg': 'ok'}).encode(),
+    b'not json',
+    b'',
+])
+def test_invalid_response_data(content):
+    with pytest.raises(ServerException) as e:
+        decode_data(content, ItemVO)
+    assert e.value.msg == 'invalid_response_data'
@@ -0,0 +1,205 @@
+import ssl
+import asyncio
+import datetime
+import ipaddress
+import httpx
+import httpcore
+import pytest
+from src.infra.client.http2_transport import Http2Transport
+
+h2_events = pytest.importorskip('h2.events')
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+def transport(max_streams: int = 10, fallback_errors: int = 3) -> Http2Transport:
+    limits = httpx.Limits(max_connections=4)
+    return Http2Transport(limits, limits, max_streams, fallback_errors)
+
+
+# ALPN: a TLS server offering HTTP/1.1 only
+
+@pytest.fixture
+def cert_file(tmp_path, monkeypatch):
+    x509 = pytest.importorskip('cryptography.x509')
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(x509.oid.NameOID.COMMON_NAME, '127.0.0.1')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = x509.CertificateBuilder() \
+        .subject_name(name).issuer_name(name) \
+        .public_key(key.public_key()) \
+        .serial_number(x509.random_serial_number()) \
+        .not_valid_before(now - datetime.timedelta(days=1)) \
+        .not_valid_after(now + datetime.timedelta(days=1)) \
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address('127.0.0.1'))]), critical=False) \
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True) \
+        .sign(key, hashes.SHA256())
+
+    cert_path, key_path = tmp_path / 'cert.pem', tmp_path / 'key.pem'
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    # trusted by the httpx clients (trust_env)
+    monkeypatch.setenv('SSL_CERT_FILE', str(cert_path))
+    return cert_path, key_path
+
+
+@pytest.fixture
+async def http1_origin(cert_file):
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(*cert_file)
+    context.set_alpn_protocols(['http/1.1'])
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while await reader.readuntil(b'\r\n\r\n'):
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok')
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0, ssl=context)
+    yield f'https://127.0.0.1:{server.sockets[0].getsockname()[1]}'
+    server.close()
+
+
+async def test_falls_back_to_http1_when_h2_is_not_offered(http1_origin):
+    t = transport()
+    async with httpx.AsyncClient(transport=t) as client:
+        response = await client.get(f'{http1_origin}/')
+        assert (response.status_code, response.text, response.http_version) == (200, 'ok', 'HTTP/1.1')
+        assert t.fallback
+        assert t.stats()['in_flight'] == 0
+
+        # the next requests go through the HTTP/1.1 transport
+        response = await client.get(f'{http1_origin}/')
+        assert response.text == 'ok'
+        assert t.stats()['versions'] == {'HTTP/1.1': 2}
+
+
+# scripted h2 transport
+
+def goaway(error_code: int = 0) -> httpx.RemoteProtocolError:
+    event = h2_events.ConnectionTerminated()
+    event.error_code = error_code
+    error = httpx.RemoteProtocolError('<ConnectionTerminated>')
+    error.__cause__ = httpcore.RemoteProtocolError(event)
+    return error
+
+
+class Body(httpx.AsyncByteStream):
+    # a streamed body, like the one of httpcore
+    async def __aiter__(self):
+        yield b'ok'
+
+
+class ScriptedTransport(httpx.AsyncBaseTransport):
+    '''
+    raises the scripted errors in order, then responds with HTTP/2
+    '''
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.requests = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if len(self.errors) > 0:
+            raise self.errors.pop(0)
+        return httpx.Response(200, stream=Body(), extensions={'http_version': b'HTTP/2'})
+
+    async def aclose(self):
+        pass
+
+
+def scripted(t: Http2Transport, *errors: Exception) -> ScriptedTransport:
+    t.http2 = ScriptedTransport(*errors)
+    return t.http2
+
+
+async def test_h2_is_kept_and_the_stream_released():
+    t = transport()
+    scripted(t)
+    async with httpx.AsyncClient(transport=t) as client:
+        response = await client.get('https://h/')
+        assert response.text == 'ok'
+
+    assert not t.fallback
+    assert t.stats()['in_flight'] == 0
+    assert t.stats()['versions'] == {'HTTP/2': 1}
+
+
+async def test_graceful_goaway_resends_an_idempotent_request():
+    t = transport()
+    inner = scripted(t, goaway())
+    async with httpx.AsyncClient(transport=t) as client:
+        assert (await client.get('https://h/')).text == 'ok'
+
+    assert inner.requests == 2
+    assert (t.goaways, t.protocol_errors, t.fallback) == (1, 0, False)
+    assert t.stats()['in_flight'] == 0
+
+
+async def test_graceful_goaway_raises_a_write():
+    t = transport()
+    inner = scripted(t, goaway())
+    async with httpx.AsyncClient(transport=t) as client:
+        with pytest.raises(httpx.RemoteProtocolError):
+            await client.post('https://h/', content=b'{}')
+
+    assert inner.requests == 1
+    assert (t.goaways, t.protocol_errors) == (1, 0)
+    assert t.stats()['in_flight'] == 0
+
+
+async def test_protocol_errors_in_a_row_fall_back():
+    t = transport(fallback_errors=2)
+    scripted(t, goaway(error_code=1), httpx.RemoteProtocolError('broken'))
+    async with httpx.AsyncClient(transport=t) as client:
+        for _ in range(2):
+            with pytest.raises(httpx.RemoteProtocolError):
+                await client.get('https://h/')
+
+    assert (t.goaways, t.protocol_errors, t.fallback) == (0, 2, True)
+    assert t.stats()['in_flight'] == 0
+
+
+async def test_a_success_resets_the_errors_in_a_row():
+    t = transport(fallback_errors=2)
+    scripted(t, httpx.RemoteProtocolError('broken'))
+    async with httpx.AsyncClient(transport=t) as client:
+        with pytest.raises(httpx.RemoteProtocolError):
+            await client.get('https://h/')
+        await client.get('https://h/')
+        t.http2.errors.append(httpx.RemoteProtocolError('broken'))
+        with pytest.raises(httpx.RemoteProtocolError):
+            await client.get('https://h/')
+
+    assert (t.protocol_errors, t.fallback) == (2, False)
+
+
+async def test_streams_are_limited():
+    t = transport(max_streams=1)
+    scripted(t)
+    async with httpx.AsyncClient(transport=t) as client:
+        async with client.stream('GET', 'https://h/') as response:
+            second = asyncio.create_task(client.get('https://h/'))
+            await asyncio.sleep(0.02)
+            # waits for the slot of the open response
+            assert not second.done()
+            assert t.stats()['in_flight'] == 1
+            await response.aread()
+
+        assert (await asyncio.wait_for(second, 1)).text == 'ok'
+    assert t.stats()['in_flight'] == 0
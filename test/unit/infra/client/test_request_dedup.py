@@ -0,0 +1,46 @@
+import pytest
+from src.infra.client.request_dedup import RequestDedup, endpoint_of, OTHER
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+def test_key_is_canonical():
+    dedup = RequestDedup(ignore_headers='x-request-id;traceparent')
+    a = dedup.key('GET', 'https://h/jobs', {'size': 10, 'next': 'x'}, {'Auth': 't', 'X-Request-Id': '1'})
+    b = dedup.key('GET', 'https://h/jobs', {'next': 'x', 'size': 10}, {'x-request-id': '2', 'auth': 't'})
+    assert a == b
+    assert hash(a) == hash(b)
+
+
+def test_key_differs():
+    dedup = RequestDedup(ignore_headers='')
+    base = dedup.key('GET', 'https://h/jobs', {'size': 10}, {'auth': 't'})
+    assert base != dedup.key('GET', 'https://h/jobs', {'size': '10'}, {'auth': 't'})
+    assert base != dedup.key('GET', 'https://h/jobs', {'size': 10}, {'auth': 'other'})
+    assert base != dedup.key('GET', 'https://h/other', {'size': 10}, {'auth': 't'})
+    assert base != dedup.key('GET', 'https://h/jobs', {'size': 10}, {'auth': 't'}, 'decoder')
+    # no params/headers are the same as empty ones
+    assert dedup.key('GET', 'https://h/jobs') == dedup.key('GET', 'https://h/jobs', {}, {})
+
+
+def test_endpoint_of():
+    assert endpoint_of('https://h/api/teachers/123/resumes/9f1c2e4a-8b7d-4c1e-9a2b-3c4d5e6f7a8b?x=1') == \
+        'h/api/teachers/{id}/resumes/{id}'
+    assert endpoint_of('https://h/api/jobs-info/continents') == 'h/api/jobs-info/continents'
+
+
+async def test_endpoints_are_bounded():
+    dedup = RequestDedup(max_endpoints=1)
+
+    async def call():
+        return 1
+
+    await dedup.do(dedup.key('GET', 'https://h/a'), call)
+    await dedup.do(dedup.key('GET', 'https://h/b'), call)
+    assert set(dedup.stats()['endpoints'].keys()) == {'h/a', OTHER}
@@ -0,0 +1,156 @@
+import json
+import time
+import asyncio
+import httpx
+import pytest
+from src.configs.exceptions import ServerException, ServiceUnavailableException
+from src.infra.client.circuit_breaker import BreakerState
+from src.infra.client.retry_policy import RetryPolicy
+from src.infra.client.service_api_dapter import ServiceApiAdapter
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class ScriptedClient:
+    '''
+    replies with the scripted (delay, status_code | exception) in order,
+    the last one is repeated
+    '''
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.requests = 0
+
+    async def request(self, method, url, timeout=None, **kwargs):
+        delay, reply = self.replies[min(self.requests, len(self.replies) - 1)]
+        self.requests += 1
+        await asyncio.sleep(delay)
+        if isinstance(reply, Exception):
+            raise reply
+        body = {'code': '0', 'msg': 'ok', 'data': {'status': reply}}
+        return httpx.Response(reply, content=json.dumps(body).encode())
+
+
+class FakeHttpResource:
+    def __init__(self, client: ScriptedClient):
+        self.client = client
+
+    async def access(self, **kwargs):
+        return self.client
+
+    def parse_domain(self, url):
+        return httpx.URL(url).host
+
+    def bulkhead(self, url):
+        return None
+
+    def bulkhead_stats(self):
+        return {}
+
+
+def adapter(client: ScriptedClient) -> ServiceApiAdapter:
+    api = ServiceApiAdapter(FakeHttpResource(client))
+    api.dedup = None
+    return api
+
+
+def policy(**kwargs) -> RetryPolicy:
+    kwargs = {'max_attempts': 3, 'base_delay': 0.001, 'max_delay': 0.002, 'budget': 2, 'hedge': False, **kwargs}
+    return RetryPolicy(**kwargs)
+
+
+def test_backoff_is_bounded(monkeypatch):
+    p = RetryPolicy(base_delay=0.1, max_delay=1.0)
+    delay = p.base_delay
+    for _ in range(100):
+        delay = p.backoff(delay)
+        assert 0.1 <= delay <= 1.0
+
+    # random(base, prev * 3), capped
+    monkeypatch.setattr('src.infra.client.retry_policy.random.uniform', lambda a, b: b)
+    assert p.backoff(0.2) == pytest.approx(0.6)
+    assert p.backoff(0.5) == 1.0
+    assert p.backoff(0.0) == pytest.approx(0.3)
+
+
+def test_hedge_delay():
+    p = RetryPolicy(hedge_default_delay=1.0, hedge_min_delay=0.05)
+    assert p.hedge_delay(None) == 1.0
+    assert p.hedge_delay(0.01) == 0.05
+    assert p.hedge_delay(0.3) == 0.3
+
+
+async def test_retry_on_5xx():
+    client = ScriptedClient((0, 503), (0, 502), (0, 200))
+    api = adapter(client)
+
+    assert await api.simple_get('https://h/x', policy=policy()) == {'status': 200}
+    assert client.requests == 3
+    assert api.metrics()['retries'] == 2
+
+
+async def test_retry_on_transport_error():
+    client = ScriptedClient((0, httpx.ConnectError('refused')), (0, 200))
+    api = adapter(client)
+
+    assert await api.simple_get('https://h/x', policy=policy()) == {'status': 200}
+    assert client.requests == 2
+
+
+async def test_retries_are_limited_by_the_budget():
+    client = ScriptedClient((0, 503))
+    api = adapter(client)
+
+    with pytest.raises(ServerException):
+        await api.simple_get('https://h/x', policy=policy(max_attempts=5, budget=1))
+    assert client.requests == 2
+
+
+async def test_no_retry_without_policy():
+    client = ScriptedClient((0, 503), (0, 200))
+    api = adapter(client)
+
+    with pytest.raises(ServerException):
+        await api.simple_get('https://h/x')
+    assert client.requests == 1
+
+
+async def test_open_breaker_is_not_retried():
+    client = ScriptedClient((0, 200))
+    api = adapter(client)
+    breaker = api.breakers.get('h')
+    breaker.state, breaker.opened_at = BreakerState.OPEN, time.monotonic()
+
+    with pytest.raises(ServiceUnavailableException):
+        await api.simple_get('https://h/x', policy=policy())
+    assert client.requests == 0
+    assert api.metrics()['retries'] == 0
+    assert breaker.rejected == 1
+
+
+async def test_hedge_wins_over_a_slow_primary():
+    # the primary hangs, the hedged request (sent after the hedge delay) answers
+    client = ScriptedClient((1.0, 200), (0, 200))
+    api = adapter(client)
+
+    p = policy(hedge=True, hedge_default_delay=0.02)
+    assert await asyncio.wait_for(api.simple_get('https://h/x', policy=p), 0.5) == {'status': 200}
+    assert client.requests == 2
+    assert api.metrics()['hedges'] == 1
+    assert api.metrics()['hedge_wins'] == 1
+
+
+async def test_no_hedge_for_a_fast_primary():
+    client = ScriptedClient((0, 200))
+    api = adapter(client)
+
+    p = policy(hedge=True, hedge_default_delay=0.2)
+    assert await api.simple_get('https://h/x', policy=p) == {'status': 200}
+    assert client.requests == 1
+    assert api.metrics()['hedges'] == 0
@@ -0,0 +1,140 @@
+import json
+import asyncio
+import httpx
+import pytest
+from pydantic import BaseModel
+from src.configs.exceptions import NotFoundException
+from src.infra.client.request_dedup import RequestDedup
+from src.infra.client.service_api_dapter import ServiceApiAdapter
+from src.infra.client import data_envelope
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class ItemVO(BaseModel):
+    id: int
+    tags: list = []
+
+
+class FakeClient:
+    def __init__(self, status_code: int = 200, data=None, delay: float = 0.02):
+        self.status_code = status_code
+        self.data = data
+        self.delay = delay
+        self.requests = []
+
+    async def request(self, method, url, timeout=None, **kwargs):
+        self.requests.append((method, url, kwargs))
+        await asyncio.sleep(self.delay)
+        body = {'code': '0', 'msg': 'ok', 'data': self.data}
+        return httpx.Response(self.status_code, content=json.dumps(body).encode())
+
+
+class FakeHttpResource:
+    def __init__(self, client: FakeClient):
+        self.client = client
+
+    async def access(self, **kwargs):
+        return self.client
+
+    def parse_domain(self, url):
+        return httpx.URL(url).host
+
+    def bulkhead(self, url):
+        return None
+
+    def bulkhead_stats(self):
+        return {}
+
+
+def adapter(client: FakeClient, dedup: bool = True) -> ServiceApiAdapter:
+    api = ServiceApiAdapter(FakeHttpResource(client))
+    api.dedup = RequestDedup() if dedup else None
+    return api
+
+
+async def test_get_as_decodes_once_per_flight(monkeypatch):
+    decodes = []
+    decode_data = data_envelope.decode_data
+    monkeypatch.setattr('src.infra.client.service_api_dapter.decode_data',
+                        lambda content, model: decodes.append(model) or decode_data(content, model))
+    client = FakeClient(data={'id': 1, 'tags': ['a']})
+    api = adapter(client)
+
+    results = await asyncio.gather(*[
+        api.get_as('https://h/items/1', ItemVO, params={'a': 1, 'b': 2}) for _ in range(5)
+    ] + [
+        api.get_as('https://h/items/1', ItemVO, params={'b': 2, 'a': 1}, headers={'X-Request-Id': 'x'}),
+    ])
+
+    assert len(client.requests) == 1
+    assert decodes == [ItemVO]
+    assert all(r is results[0] for r in results)
+    assert results[0] == ItemVO(id=1, tags=['a'])
+    assert api.metrics()['dedup']['shared'] == 5
+
+
+async def test_decoders_do_not_share_a_flight():
+    client = FakeClient(data={'id': 1})
+    api = adapter(client)
+
+    as_model, as_dict, as_bytes = await asyncio.gather(
+        api.get_as('https://h/items/1', ItemVO),
+        api.simple_get('https://h/items/1'),
+        api.get_bytes('https://h/items/1'),
+    )
+    assert as_model == ItemVO(id=1)
+    assert as_dict == {'id': 1}
+    assert json.loads(as_bytes)['data'] == {'id': 1}
+    assert len(client.requests) == 3
+
+
+async def test_simple_get_is_shared():
+    client = FakeClient(data={'id': 1})
+    api = adapter(client)
+
+    a, b = await asyncio.gather(api.simple_get('https://h/items/1'), api.simple_get('https://h/items/1'))
+    assert a is b
+    assert len(client.requests) == 1
+
+
+async def test_error_is_shared_and_not_memoized():
+    client = FakeClient(status_code=404)
+    api = adapter(client)
+
+    results = await asyncio.gather(*[api.get_as('https://h/items/1', ItemVO) for _ in range(3)],
+                                   return_exceptions=True)
+    assert all(isinstance(r, NotFoundException) for r in results)
+    assert len(client.requests) == 1
+
+    # the key is released: the next call goes upstream
+    client.status_code, client.data = 200, {'id': 1}
+    assert await api.get_as('https://h/items/1', ItemVO) == ItemVO(id=1)
+    assert len(client.requests) == 2
+
+
+async def test_cancelled_waiter_does_not_cancel_the_call():
+    client = FakeClient(data={'id': 1}, delay=0.05)
+    api = adapter(client)
+
+    first = asyncio.create_task(api.get_as('https://h/items/1', ItemVO))
+    second = asyncio.create_task(api.get_as('https://h/items/1', ItemVO))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == ItemVO(id=1)
+    assert len(client.requests) == 1
+
+
+async def test_no_dedup():
+    client = FakeClient(data={'id': 1})
+    api = adapter(client, dedup=False)
+
+    await asyncio.gather(*[api.get_as('https://h/items/1', ItemVO) for _ in range(3)])
+    assert len(client.requests) == 3
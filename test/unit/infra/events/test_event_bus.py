@@ -0,0 +1,265 @@
+import json
+import asyncio
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from redis.asyncio import Redis
+from src.domains.event_bus import CACHE_INVALIDATION, JOB, COMPANY, invalidation_event
+from src.infra.events.local_event_bus import LocalEventBus
+from src.infra.events.batching_event_bus import BatchingEventBus
+from src.infra.events import redis_event_bus
+from src.infra.events.redis_event_bus import RedisEventBus
+from src.infra.cache.two_tier_cache_adapter import TwoTierCacheAdapter
+from src.infra.cache.detail_cache import DetailCache
+from src.infra.cache.negative_cache import NegativeCache, CLOSED
+from src.infra.cache import negative_cache as negative
+from src.apps.events.sub.cache_invalidation import CacheInvalidationSubscriber
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class Recorder:
+    def __init__(self):
+        self.batches = []
+
+    async def handle(self, events):
+        self.batches.append(events)
+
+
+class FakeRedisResource:
+    def __init__(self, server: FakeServer):
+        self.redis = FakeAsyncRedis(server=server, decode_responses=True)
+
+    async def access(self, **kwargs):
+        return self.redis
+
+
+async def wait_for(condition, timeout: float = 1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError('timeout')
+        await asyncio.sleep(0.01)
+
+
+# batching
+
+async def test_coalesced_within_the_window():
+    rec = Recorder()
+    bus = BatchingEventBus(LocalEventBus(), window_secs=0.02, max_batch=100)
+    bus.subscribe(CACHE_INVALIDATION, rec.handle)
+
+    await bus.publish(CACHE_INVALIDATION, [invalidation_event(JOB, 1, 2)])
+    await bus.publish(CACHE_INVALIDATION, [invalidation_event(JOB, 1, 2), invalidation_event(COMPANY, 1)])
+    assert rec.batches == []
+
+    await wait_for(lambda: len(rec.batches) == 1)
+    assert rec.batches[0] == [invalidation_event(JOB, 1, 2), invalidation_event(COMPANY, 1)]
+    assert bus.stats()['coalesced'] == 1
+    assert bus.stats()['pending'] == 0
+
+
+async def test_sent_on_publish_without_window():
+    rec = Recorder()
+    bus = BatchingEventBus(LocalEventBus(), window_secs=0, max_batch=100)
+    bus.subscribe(CACHE_INVALIDATION, rec.handle)
+
+    await bus.publish(CACHE_INVALIDATION, [invalidation_event(JOB, 1, 2), invalidation_event(JOB, 1, 2)])
+    # no background task: delivered before publish returns
+    assert rec.batches == [[invalidation_event(JOB, 1, 2)]]
+
+
+async def test_sent_when_the_batch_is_full():
+    rec = Recorder()
+    bus = BatchingEventBus(LocalEventBus(), window_secs=10, max_batch=2)
+    bus.subscribe(CACHE_INVALIDATION, rec.handle)
+
+    await bus.publish(CACHE_INVALIDATION, [invalidation_event(COMPANY, 1)])
+    await bus.publish(CACHE_INVALIDATION, [invalidation_event(COMPANY, 2)])
+    assert rec.batches == [[invalidation_event(COMPANY, 1), invalidation_event(COMPANY, 2)]]
+    await bus.close()
+
+
+async def test_close_flushes_the_pending_events():
+    rec = Recorder()
+    bus = BatchingEventBus(LocalEventBus(), window_secs=10, max_batch=100)
+    bus.subscribe(CACHE_INVALIDATION, rec.handle)
+
+    await bus.publish(CACHE_INVALIDATION, [invalidation_event(COMPANY, 1)])
+    await bus.close()
+    assert rec.batches == [[invalidation_event(COMPANY, 1)]]
+
+
+# redis pub/sub
+
+async def test_origin_is_skipped_by_its_own_listener():
+    server = FakeServer()
+    a = RedisEventBus(FakeRedisResource(server))
+    b = RedisEventBus(FakeRedisResource(server))
+    rec_a, rec_b = Recorder(), Recorder()
+    a.subscribe(CACHE_INVALIDATION, rec_a.handle)
+    b.subscribe(CACHE_INVALIDATION, rec_b.handle)
+    await a.start()
+    await b.start()
+    try:
+        # both listeners subscribed
+        redis = await FakeRedisResource(server).access()
+        async def subscribed():
+            return (await redis.pubsub_numsub(CACHE_INVALIDATION))[0][1] == 2
+        for _ in range(100):
+            if await subscribed():
+                break
+            await asyncio.sleep(0.01)
+
+        await a.publish(CACHE_INVALIDATION, [invalidation_event(COMPANY, 1)])
+        await wait_for(lambda: len(rec_b.batches) == 1)
+        await asyncio.sleep(0.05)
+
+        # "a" handled it on publish, not again from its listener
+        assert rec_a.batches == [[invalidation_event(COMPANY, 1)]]
+        assert rec_b.batches == [[invalidation_event(COMPANY, 1)]]
+        assert a.received == 0
+        assert b.received == 1
+
+    finally:
+        await a.close()
+        await b.close()
+
+
+class PubSubServer:
+    '''
+    a minimal RESP server (SUBSCRIBE/UNSUBSCRIBE/PING), a real socket
+    so that the socket timeout of the redis client applies (fakeredis has none)
+    '''
+
+    def __init__(self):
+        self.subscribers = []
+        self.subscribes = 0
+        self.server = None
+
+    @staticmethod
+    def encode(*items) -> bytes:
+        out = b'*%d\r\n' % len(items)
+        for item in items:
+            if isinstance(item, int):
+                out += b':%d\r\n' % item
+            else:
+                data = item.encode()
+                out += b'$%d\r\n%s\r\n' % (len(data), data)
+        return out
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if line == b'':
+                    return
+                args = []
+                for _ in range(int(line[1:])):
+                    size = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(size + 2))[:-2].decode())
+
+                command = args[0].upper()
+                if command == 'SUBSCRIBE':
+                    self.subscribes += 1
+                    self.subscribers.append(writer)
+                    for i, channel in enumerate(args[1:]):
+                        writer.write(self.encode('subscribe', channel, i + 1))
+                elif command == 'UNSUBSCRIBE':
+                    writer.write(self.encode('unsubscribe', args[1] if len(args) > 1 else '', 0))
+                elif command == 'PING':
+                    writer.write(self.encode('pong', args[1] if len(args) > 1 else ''))
+                else:
+                    writer.write(b'+OK\r\n')
+                await writer.drain()
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            if writer in self.subscribers:
+                self.subscribers.remove(writer)
+
+    async def publish(self, channel: str, data: str):
+        for writer in self.subscribers:
+            writer.write(self.encode('message', channel, data))
+            await writer.drain()
+
+
+class SocketRedisResource:
+    def __init__(self, port: int, socket_timeout: float):
+        self.redis = Redis(port=port, socket_timeout=socket_timeout, decode_responses=True)
+
+    async def access(self, **kwargs):
+        return self.redis
+
+
+async def test_idle_channel_past_the_socket_timeout(monkeypatch):
+    monkeypatch.setattr(redis_event_bus, 'LISTEN_POLL_SECS', 0.05)
+    server = PubSubServer()
+    resource = SocketRedisResource(await server.start(), socket_timeout=0.2)
+    bus = RedisEventBus(resource)
+    rec = Recorder()
+    bus.subscribe(CACHE_INVALIDATION, rec.handle)
+    await bus.start()
+    try:
+        await wait_for(lambda: len(server.subscribers) == 1)
+        # idle for more than the socket timeout
+        await asyncio.sleep(0.5)
+
+        event = invalidation_event(COMPANY, 1)
+        await server.publish(CACHE_INVALIDATION, json.dumps({'origin': 'other', 'events': [event]}))
+        await wait_for(lambda: len(rec.batches) == 1)
+
+        assert rec.batches == [[event]]
+        # no reconnect
+        assert server.subscribes == 1
+
+    finally:
+        await bus.close()
+        await resource.redis.aclose()
+        await server.close()
+
+
+# invalidation subscriber
+
+class NoBackend:
+    async def get(self, key):
+        return None
+
+
+async def test_invalidation_subscriber_evicts_the_local_copies():
+    cache = TwoTierCacheAdapter(NoBackend(), max_size=100, ttl=60)
+    detail = DetailCache(cache)
+    neg = NegativeCache()
+    subscriber = CacheInvalidationSubscriber(cache, neg)
+
+    version_key = detail.version_key(negative.JOB, 1)
+    entry_key = detail.entry_key(negative.JOB, 1, 2)
+    for key in (version_key, entry_key, 'other', 'pay:1'):
+        cache.local.set(key, 'v', 60)
+    neg.set(neg.token(), CLOSED, negative.JOB, 1, 2)
+    assert neg.get(negative.JOB, 1, 2) == CLOSED
+
+    await subscriber.handle([
+        invalidation_event(JOB, 1, 2),
+        invalidation_event('payment', 1, keys=['pay:1']),
+    ])
+
+    assert cache.local.get(version_key) is None
+    assert cache.local.get(entry_key) is None
+    assert cache.local.get('pay:1') is None
+    assert cache.local.get('other') == 'v'
+    assert neg.get(negative.JOB, 1, 2) is None
+    assert subscriber.stats() == {'events': 2, 'evicted': 3}
@@ -0,0 +1,44 @@
+import time
+from src.infra.utils.lru_cache import LRUCache
+
+
+def test_least_recently_used_is_evicted():
+    cache = LRUCache(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    # "a" is used, "b" is the least recently used now
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+    assert len(cache) == 2
+
+
+def test_ttl():
+    cache = LRUCache(max_size=10, ttl=0.05)
+    cache.set('default', 1)
+    cache.set('longer', 2, ttl=60)
+    cache.set('no_expiry', 3, ttl=0)
+    time.sleep(0.06)
+
+    assert cache.get('default') is None
+    assert cache.get('longer') == 2
+    assert cache.get('no_expiry') == 3
+    # the expired key is removed on access
+    assert len(cache) == 2
+
+
+def test_delete_and_stats():
+    cache = LRUCache(max_size=10)
+    cache.set('a', 1)
+    assert cache.delete('a')
+    assert not cache.delete('a')
+
+    assert cache.get('a', 'default') == 'default'
+    cache.set('a', 1)
+    cache.get('a')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_ratio']) == (1, 1, 0.5)
@@ -0,0 +1,38 @@
+from src.infra.utils.query_key import canonical_params, query_key
+
+
+URL = 'https://search/jobs'
+
+
+def test_canonical_params():
+    assert canonical_params({
+        'size': 10,
+        'patterns': [' Math ', 'english', 'MATH', '', None],
+        'continent_code': ' as ',
+        'country_code': 'tw',
+        'search_after': 'AbC=',
+        'tags': ('b', 'a', 'b'),
+    }) == {
+        'size': 10,
+        'patterns': ['english', 'math'],
+        'continent_code': 'AS',
+        'country_code': 'TW',
+        'search_after': 'AbC=',
+        'tags': ['a', 'b'],
+    }
+
+
+def test_equivalent_queries_share_a_key():
+    a = query_key(URL, {'size': 10, 'patterns': ['Math', 'english'], 'country_code': 'tw'})
+    b = query_key(URL, {'country_code': 'TW ', 'patterns': ['ENGLISH', 'math', 'math'], 'size': 10})
+    assert a == b
+
+
+def test_different_queries():
+    params = {'size': 10, 'patterns': ['math']}
+    key = query_key(URL, params)
+    assert key != query_key('https://search/resumes', params)
+    assert key != query_key(URL, {'size': 20, 'patterns': ['math']})
+    # the cursor is case-sensitive (opaque)
+    assert query_key(URL, dict(params, search_after='abc')) != query_key(URL, dict(params, search_after='ABC'))
+    assert query_key(URL, dict(params, search_after='abc'), exclude=('search_after',)) == key
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from src.infra.utils.single_flight import SingleFlight
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+class Loader:
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    async def load(self, val):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        if self.fail:
+            raise ConnectionError('upstream')
+        return {'val': val}
+
+
+async def test_concurrent_callers_share_one_call():
+    flight, loader = SingleFlight(), Loader()
+    results = await asyncio.gather(*[flight.do('k', loader.load, 'v') for _ in range(10)])
+
+    assert loader.calls == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {'in_flight': 0, 'calls': 1, 'shared': 9}
+
+
+async def test_keys_are_independent():
+    flight, loader = SingleFlight(), Loader()
+    a, b = await asyncio.gather(flight.do('a', loader.load, 'a'), flight.do('b', loader.load, 'b'))
+
+    assert (a, b) == ({'val': 'a'}, {'val': 'b'})
+    assert loader.calls == 2
+
+
+async def test_nothing_is_memoized():
+    flight, loader = SingleFlight(), Loader()
+    await flight.do('k', loader.load, 'v')
+    assert not flight.in_flight('k')
+
+    await flight.do('k', loader.load, 'v')
+    assert loader.calls == 2
+
+
+async def test_exception_is_shared():
+    flight, loader = SingleFlight(), Loader(fail=True)
+    results = await asyncio.gather(*[flight.do('k', loader.load, 'v') for _ in range(3)],
+                                   return_exceptions=True)
+
+    assert loader.calls == 1
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert not flight.in_flight('k')
+
+
+async def test_cancelled_waiter_does_not_cancel_the_call():
+    flight, loader = SingleFlight(), Loader()
+    first = asyncio.create_task(flight.do('k', loader.load, 'v'))
+    second = asyncio.create_task(flight.do('k', loader.load, 'v'))
+    await asyncio.sleep(0.005)
+    first.cancel()
+
+    assert await second == {'val': 'v'}
+    assert first.cancelled()
+    assert loader.calls == 1
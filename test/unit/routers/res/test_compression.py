@@ -0,0 +1,133 @@
+import zlib
+import pytest
+from src.routers.res import compression
+from src.routers.res.compression import (
+    CompressionMiddleware,
+    CompressionMetrics,
+    negotiate,
+    uncompressed,
+    GZIP,
+    BR,
+)
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+BODY = b'{"code":"0","msg":"ok","data":[' + b','.join(b'{"id":%d,"name":"item"}' % i for i in range(100)) + b']}'
+
+
+def app(chunks, headers=None, content_length=True):
+    headers = headers or {'content-type': 'application/json'}
+
+    async def asgi(scope, receive, send):
+        raw = [(k.encode(), v.encode()) for k, v in headers.items()]
+        if len(chunks) == 1 and content_length:
+            raw.append((b'content-length', str(len(chunks[0])).encode()))
+        await send({'type': 'http.response.start', 'status': 200, 'headers': raw})
+        for i, chunk in enumerate(chunks):
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': i < len(chunks) - 1})
+    return asgi
+
+
+async def call(asgi, accept_encoding='gzip', min_size=1024, endpoint=None):
+    sent = []
+    scope = {'type': 'http', 'headers': [(b'accept-encoding', accept_encoding.encode())]}
+    if endpoint is not None:
+        scope['endpoint'] = endpoint
+
+    async def send(message):
+        sent.append(message)
+
+    metrics = CompressionMetrics()
+    await CompressionMiddleware(asgi, min_size=min_size, metrics=metrics)(scope, None, send)
+    headers = {k.decode(): v.decode() for k, v in sent[0]['headers']}
+    return headers, [m['body'] for m in sent[1:]], metrics
+
+
+def gunzip(data: bytes) -> bytes:
+    return zlib.decompress(data, 31)
+
+
+def test_negotiate():
+    assert negotiate('gzip, deflate') == GZIP
+    assert negotiate('deflate') is None
+    assert negotiate('gzip;q=0') is None
+    assert negotiate('*') == (BR if compression.brotli is not None else GZIP)
+    assert negotiate('br;q=1.0, gzip;q=0.5') == (BR if compression.brotli is not None else GZIP)
+    assert negotiate('') is None
+
+
+async def test_compressed_above_the_min_size():
+    headers, bodies, metrics = await call(app([BODY], {'content-type': 'application/json', 'etag': '"abc"'}))
+
+    assert headers['content-encoding'] == 'gzip'
+    assert headers['vary'] == 'Accept-Encoding'
+    assert headers['etag'] == 'W/"abc"'
+    assert int(headers['content-length']) == len(bodies[0]) < len(BODY)
+    assert gunzip(bodies[0]) == BODY
+    stats = metrics.stats()['encodings']['gzip']
+    assert (stats['responses'], stats['bytes_in'], stats['bytes_out']) == (1, len(BODY), len(bodies[0]))
+
+
+async def test_not_compressed_below_the_min_size():
+    headers, bodies, metrics = await call(app([BODY]), min_size=len(BODY) + 1)
+    assert 'content-encoding' not in headers
+    assert bodies == [BODY]
+    assert metrics.stats()['skipped'] == {'min_size': 1}
+
+    # the size is known at the 1st body only (no content-length)
+    headers, bodies, metrics = await call(app([BODY], content_length=False), min_size=len(BODY) + 1)
+    assert 'content-encoding' not in headers
+    assert bodies == [BODY]
+    assert metrics.stats()['skipped'] == {'min_size': 1}
+
+
+@pytest.mark.parametrize('headers,reason', [
+    ({'content-type': 'image/png'}, 'content_type'),
+    ({'content-type': 'application/json', 'content-encoding': 'gzip'}, 'encoded'),
+    ({'content-type': 'application/json', 'cache-control': 'no-transform'}, 'no_transform'),
+])
+async def test_skipped(headers, reason):
+    res_headers, bodies, metrics = await call(app([BODY], headers))
+    assert res_headers.get('content-encoding', None) == headers.get('content-encoding', None)
+    assert bodies == [BODY]
+    assert metrics.stats()['skipped'] == {reason: 1}
+
+
+async def test_uncompressed_route():
+    @uncompressed
+    async def endpoint():
+        pass
+
+    headers, bodies, metrics = await call(app([BODY]), endpoint=endpoint)
+    assert 'content-encoding' not in headers
+    assert bodies == [BODY]
+    assert metrics.stats()['skipped'] == {'route': 1}
+
+
+async def test_not_accepted():
+    headers, bodies, _ = await call(app([BODY]), accept_encoding='identity')
+    assert 'content-encoding' not in headers
+    assert bodies == [BODY]
+
+
+async def test_streaming_chunks_are_flushed():
+    chunks = [b'[' + b'"chunk",' * 50, b'"small",', b'"last"]']
+    headers, bodies, metrics = await call(app(chunks))
+
+    assert headers['content-encoding'] == 'gzip'
+    assert 'content-length' not in headers
+    assert len(bodies) == 3
+
+    # each chunk is decodable as soon as it arrives
+    decoder = zlib.decompressobj(31)
+    assert decoder.decompress(bodies[0]) == chunks[0]
+    assert decoder.decompress(bodies[1]) == chunks[1]
+    assert decoder.decompress(bodies[2]) + decoder.flush() == chunks[2]
+    assert metrics.stats()['encodings']['gzip']['bytes_in'] == sum(len(c) for c in chunks)
@@ -0,0 +1,56 @@
+import json
+from fastapi import Request
+from src.routers.res.response import res_success
+
+
+def request(if_none_match: str = None) -> Request:
+    headers = [] if if_none_match is None else [(b'if-none-match', if_none_match.encode())]
+    return Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': headers})
+
+
+def test_no_etag_without_request():
+    response = res_success(data={'a': 1})
+    assert response.status_code == 200
+    assert 'etag' not in response.headers
+    assert json.loads(response.body) == {'code': '0', 'msg': 'ok', 'data': {'a': 1}}
+
+
+def test_etag_of_the_body():
+    a = res_success(data={'a': 1}, request=request())
+    b = res_success(data={'a': 1}, request=request())
+    c = res_success(data={'a': 2}, request=request())
+    assert a.status_code == 200
+    assert a.headers['etag'].startswith('"') and a.headers['etag'].endswith('"')
+    assert a.headers['etag'] == b.headers['etag'] != c.headers['etag']
+
+
+def test_not_modified():
+    etag = res_success(data={'a': 1}, request=request()).headers['etag']
+
+    for if_none_match in (etag, f'W/{etag}', f'"other", {etag}', f'"other",W/{etag}', '*'):
+        response = res_success(data={'a': 1}, request=request(if_none_match))
+        assert response.status_code == 304, if_none_match
+        assert response.headers['etag'] == etag
+        assert response.body == b''
+
+    # changed
+    response = res_success(data={'a': 2}, request=request(etag))
+    assert response.status_code == 200
+    assert json.loads(response.body)['data'] == {'a': 2}
+    assert res_success(data={'a': 1}, request=request('"other"')).status_code == 200
+
+
+def test_versioned_etag_skips_the_serialization():
+    class Unserializable:
+        pass
+
+    etag = res_success(data={'a': 1}, request=request(), version='rev-1').headers['etag']
+    # 304 before the data is touched
+    response = res_success(data=Unserializable(), request=request(f'W/{etag}'), version='rev-1')
+    assert response.status_code == 304
+    assert response.headers['etag'] == etag
+
+    # another version, another ETag
+    response = res_success(data={'a': 1}, request=request(etag), version='rev-2')
+    assert response.status_code == 200
+    assert response.headers['etag'] != etag
@@ -0,0 +1,71 @@
+import enum
+import uuid
+import pytest
+from decimal import Decimal
+from datetime import datetime, date, timezone
+from typing import List, Optional
+from pydantic import BaseModel
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from src.routers.res import serializer
+from src.routers.res.serializer import envelope
+
+
+class Color(enum.Enum):
+    RED = 'red'
+
+
+class ItemVO(BaseModel):
+    id: int
+    name: str
+    price: Optional[float] = None
+    tags: List[str] = []
+    created: Optional[datetime] = None
+
+
+DATA = [
+    None,
+    True,
+    0,
+    -1,
+    2 ** 63,
+    1.5,
+    0.1,
+    -2.25,
+    'text',
+    '中文 "quoted" \\ \n \t   😀',
+    [],
+    {},
+    [1, 'a', None, [2, {'b': False}]],
+    {'nested': {'list': [1.0, 2.5], 'none': None}, 'unicode': '日本語'},
+    {1: 'int key'},
+    ItemVO(id=1, name='n', price=9.5, tags=['a', 'b']),
+    ItemVO(id=1, name='n', created=datetime(2024, 5, 6, 7, 8, 9, 123000, tzinfo=timezone.utc)),
+    [ItemVO(id=1, name='n')],
+    {'item': ItemVO(id=2, name='m')},
+    {'when': datetime(2024, 5, 6, 7, 8, 9), 'day': date(2024, 5, 6)},
+    {'color': Color.RED, 'id': uuid.UUID(int=1), 'price': Decimal('1.5')},
+]
+
+
+def expected(data, msg: str = 'ok', code: str = '0') -> bytes:
+    return JSONResponse(content=jsonable_encoder({'code': code, 'msg': msg, 'data': data})).body
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def backend(request, monkeypatch):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(serializer, 'orjson', None)
+    return request.param
+
+
+@pytest.mark.parametrize('data', DATA, ids=range(len(DATA)))
+def test_envelope_is_byte_identical_to_jsonable_encoder(backend, data):
+    assert envelope(data) == expected(data)
+
+
+def test_msg_and_code(backend):
+    assert envelope({'a': 1}, msg='資料', code='40400') == expected({'a': 1}, msg='資料', code='40400')
+